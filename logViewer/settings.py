@@ -110,9 +110,11 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 os.makedirs(os.path.join(MEDIA_ROOT, 'log_data'), exist_ok=True)
 os.makedirs(os.path.join(MEDIA_ROOT, 'log_images'), exist_ok=True)
 os.makedirs(os.path.join(MEDIA_ROOT, 'mdf_files'), exist_ok=True)
+os.makedirs(os.path.join(MEDIA_ROOT, 'curve_series'), exist_ok=True)
 
 # File Upload settings
 FILE_UPLOAD_HANDLERS = [
+    'robot_logs.mdf_dedup.Sha256UploadHandler',  # Empreinte SHA-256 calculée pendant la réception
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
     'django.core.files.uploadhandler.TemporaryFileUploadHandler',
 ]
@@ -121,6 +123,23 @@ FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 FILE_UPLOAD_PERMISSIONS = 0o644
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
+# Import MDF
+MDF_IMPORT_BATCH_SIZE = 1000  # Nombre d'objets par requête INSERT lors de l'import
+MDF_IMPORT_WORKERS = 1  # Processus de lecture des canaux (1 = séquentiel, 0 = un par cœur)
+MDF_IMPORT_READ_MODE = 'group'  # 'group' : un groupe de données à la fois, 'channel' : canal par canal
+MDF_IMPORT_STREAMING = False  # Importer les canaux volumineux fenêtre par fenêtre
+MDF_IMPORT_STREAM_WINDOW = 100000  # Échantillons par fenêtre (borne la mémoire par canal)
+MDF_IMPORT_LASER_COMPRESSION = 'zlib'  # Compression des distances laser en binaire : None, 'zlib' ou 'lzma'
+MDF_IMPORT_CURVE_STORAGE = 'series'  # 'series' : colonnes binaires (.npy), 'rows' : une ligne CurveMeasurement par mesure
+MDF_IMPORT_CAN_STORAGE = 'frames'  # 'frames' : trames brutes en colonnes binaires (.npy) décodées à la demande, 'rows' : lignes CANMessage et CANSignal
+LASER_OCCUPANCY_CELL_SIZE = 0.05  # Taille des cellules de la carte d'occupation laser des groupes (mètres)
+LASER_OCCUPANCY_RANGE = 20.0  # Demi-côté de la carte d'occupation (mètres), les points plus lointains sont ignorés
+IMAGE_THUMBNAIL_FORMAT = 'WEBP'  # Format des miniatures d'images : 'WEBP' ou 'JPEG'
+IMAGE_THUMBNAIL_WORKERS = 4  # Threads de génération des miniatures
+DBC_CACHE_SIZE = 8  # Fichiers DBC analysés gardés en mémoire par processus
+DBC_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'dbc')  # Cache disque des DBC analysés (plans de décodage compilés), hors de MEDIA_ROOT
+CAN_DECODE_CACHE_MB = 256  # Mémoire des signaux CAN décodés à la demande gardés par processus (Mo)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -0,0 +1,192 @@
+"""
+Module contenant le décodage vectorisé des signaux CAN.
+
+Chaque message d'un fichier DBC est compilé une fois en plan de décodage : pour
+chaque signal, les octets de la trame qui le contiennent et le décalage de chacun,
+le masque, le signe, le facteur et l'offset. Toutes les trames d'un même
+identifiant, rassemblées dans un tableau d'octets (trames, octets), sont alors
+décodées en quelques opérations NumPy par signal au lieu d'un appel par trame.
+"""
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SignalDecodePlan:
+    """
+    Plan de décodage d'un signal CAN
+
+    Les bits du signal sont réunis en un entier 64 bits par OU des octets qui le
+    contiennent, chacun décalé vers la gauche (décalage positif) ou la droite
+    (décalage négatif), puis masqués.
+    """
+
+    __slots__ = (
+        'name', 'unit', 'length', 'is_signed', 'is_float', 'factor', 'offset',
+        'byte_shifts', 'last_byte', 'multiplexer', 'multiplexer_ids',
+    )
+
+    def __init__(self, name, start_bit, length, little_endian=True, is_signed=False, factor=1.0,
+                 offset=0.0, unit='', is_float=False, multiplexer=None, multiplexer_ids=None):
+        """
+        Args:
+            name: Nom du signal
+            start_bit: Bit de départ DBC (bit de poids faible en Intel, de poids fort en Motorola)
+            length: Nombre de bits (1 à 64)
+            little_endian: Ordre Intel (@1) ou Motorola (@0)
+            is_signed: Valeur brute signée (complément à deux)
+            factor, offset: Conversion en valeur physique
+            unit: Unité du signal
+            is_float: Valeur brute IEEE 754 (32 ou 64 bits)
+            multiplexer: Nom du signal multiplexeur dont dépend ce signal (None sinon)
+            multiplexer_ids: Valeurs du multiplexeur pour lesquelles le signal est présent
+        """
+        if not 1 <= length <= 64:
+            raise ValueError(f"Longueur de signal invalide pour {name}: {length} bits")
+
+        self.name = name
+        self.unit = unit or ''
+        self.length = length
+        self.is_signed = is_signed
+        self.is_float = is_float
+        self.factor = float(factor)
+        self.offset = float(offset)
+        self.multiplexer = multiplexer
+        self.multiplexer_ids = list(multiplexer_ids or ())
+        self.byte_shifts = self._compile_byte_shifts(start_bit, length, little_endian)
+        self.last_byte = max(byte for byte, _ in self.byte_shifts)
+
+    def __getstate__(self):
+        # Tuple plutôt que dictionnaire : les plans de tout un DBC sont mis en cache sur disque
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    @staticmethod
+    def _compile_byte_shifts(start_bit, length, little_endian):
+        """
+        Calcule les octets contenant le signal et leur décalage
+
+        Returns:
+            Liste de tuples (index de l'octet, décalage)
+        """
+        first_byte = start_bit // 8
+        if little_endian:
+            # Bits start_bit à start_bit + length - 1, octets de poids croissant
+            last_byte = (start_bit + length - 1) // 8
+            bit_offset = start_bit % 8
+            return [(byte, 8 * (byte - first_byte) - bit_offset) for byte in range(first_byte, last_byte + 1)]
+
+        # Motorola : le bit de poids fort est start_bit, les octets suivants ont un poids décroissant
+        msb = start_bit % 8
+        last_byte = first_byte + max(-(-(length - 1 - msb) // 8), 0)
+        bit_offset = 8 * (last_byte - first_byte) + msb - length + 1
+        return [(byte, 8 * (last_byte - byte) - bit_offset) for byte in range(first_byte, last_byte + 1)]
+
+    def raw_values(self, data):
+        """
+        Extrait les valeurs brutes non signées du signal
+
+        Args:
+            data: Tableau uint8 (trames, octets) ayant au moins last_byte + 1 colonnes
+
+        Returns:
+            Tableau uint64, une valeur par trame
+        """
+        raw = np.zeros(len(data), dtype=np.uint64)
+        for byte, shift in self.byte_shifts:
+            column = data[:, byte].astype(np.uint64)
+            if shift >= 0:
+                raw |= column << np.uint64(shift)
+            else:
+                raw |= column >> np.uint64(-shift)
+        if self.length < 64:
+            raw &= np.uint64((1 << self.length) - 1)
+        return raw
+
+    def decode(self, data):
+        """Décode les valeurs physiques du signal (float64, une par trame)"""
+        raw = self.raw_values(data)
+        if self.is_float:
+            if self.length == 32:
+                values = raw.astype(np.uint32).view(np.float32)
+            elif self.length == 64:
+                values = raw.view(np.float64)
+            else:
+                raise ValueError(f"Signal flottant {self.name} de {self.length} bits non pris en charge")
+        elif self.is_signed:
+            if self.length == 64:
+                values = raw.view(np.int64)
+            else:
+                # Complément à deux sur length bits
+                sign_bit = 1 << (self.length - 1)
+                values = (raw ^ np.uint64(sign_bit)).astype(np.int64) - np.int64(sign_bit)
+        else:
+            values = raw
+        # Un flottant brut peut être un NaN signalant, dont la conversion lève un avertissement
+        with np.errstate(invalid='ignore'):
+            return values.astype(np.float64) * self.factor + self.offset
+
+
+class MessageDecodePlan:
+    """Plan de décodage de tous les signaux d'un message CAN"""
+
+    def __init__(self, frame_id, name, length, signals):
+        """
+        Args:
+            frame_id: Identifiant CAN du message
+            name: Nom du message
+            length: Longueur du message définie par le DBC (octets)
+            signals: Liste de SignalDecodePlan
+        """
+        self.frame_id = frame_id
+        self.name = name
+        self.length = length
+        self.signals = signals
+        self.units = {signal.name: signal.unit for signal in signals}
+
+    def decode(self, data, lengths=None):
+        """
+        Décode toutes les trames d'un message
+
+        Args:
+            data: Tableau uint8 (trames, octets), par exemple (N, 8) en CAN ou (N, 64) en CAN FD
+            lengths: Nombre d'octets utiles de chaque trame (toute la largeur de data par défaut)
+
+        Returns:
+            Dictionnaire {nom du signal: tableau float64}, avec NaN pour les trames trop
+            courtes pour contenir le signal et, pour un signal multiplexé, pour les trames
+            dont le multiplexeur a une autre valeur
+        """
+        data = np.asarray(data, dtype=np.uint8)
+        if data.ndim != 2:
+            raise ValueError(f"Trames de forme {data.shape} : tableau (trames, octets) attendu")
+        frames_count, width = data.shape
+
+        # Les octets absents de data sont considérés comme nuls, puis invalidés via lengths
+        needed = max((signal.last_byte + 1 for signal in self.signals), default=0)
+        if needed > width:
+            data = np.pad(data, ((0, 0), (0, needed - width)))
+        if lengths is None:
+            lengths = np.full(frames_count, width)
+
+        multiplexer_values = {}
+        decoded = {}
+        for signal in self.signals:
+            values = signal.decode(data)
+            missing = lengths <= signal.last_byte
+            if signal.multiplexer:
+                if signal.multiplexer not in multiplexer_values:
+                    multiplexer = next((s for s in self.signals if s.name == signal.multiplexer), None)
+                    multiplexer_values[signal.multiplexer] = (
+                        multiplexer.raw_values(data) if multiplexer else np.zeros(frames_count, dtype=np.uint64)
+                    )
+                missing |= ~np.isin(multiplexer_values[signal.multiplexer], signal.multiplexer_ids)
+            if missing.any():
+                values[missing] = np.nan
+            decoded[signal.name] = values
+        return decoded
@@ -7,6 +7,11 @@ import struct
 import re
 import io
 
+import numpy as np
+
+from .mdf_plan import unpack_array_samples
+from .can_decoder import SignalDecodePlan, MessageDecodePlan
+
 logger = logging.getLogger(__name__)
 
 class DBCParser:
@@ -21,7 +26,45 @@ class DBCParser:
         """
         self.dbc_file_path = dbc_file_path
         self.messages = {}  # {can_id: MessageInfo}
+        self._decode_plans = {}  # {can_id: MessageDecodePlan ou None}, compilés à la demande
         self.load_dbc()
+    
+    @classmethod
+    def from_decode_plans(cls, dbc_file_path, decode_plans, use_cantools, messages=None):
+        """
+        Crée un parser à partir de plans de décodage déjà compilés, sans analyser le fichier
+
+        La base cantools éventuelle n'est chargée qu'au premier accès (voir __getattr__).
+
+        Args:
+            dbc_file_path: Chemin vers le fichier DBC
+            decode_plans: Dictionnaire {identifiant CAN: MessageDecodePlan} de tous les messages
+            use_cantools: Le fichier a été analysé par cantools
+            messages: Messages du parser de base (DBCParser.messages), si use_cantools est faux
+        """
+        parser = cls.__new__(cls)
+        parser.dbc_file_path = dbc_file_path
+        parser.messages = messages or {}
+        parser._decode_plans = dict(decode_plans)
+        parser.use_cantools = use_cantools
+        return parser
+    
+    def __getstate__(self):
+        """
+        État sérialisé (cache disque de dbc_registry) : la base cantools, plus lente à
+        désérialiser qu'à relire, n'en fait pas partie et est rechargée au premier accès
+        """
+        state = self.__dict__.copy()
+        state.pop('db', None)
+        return state
+    
+    def __getattr__(self, name):
+        # Appelé uniquement pour les attributs absents : base cantools d'un parser désérialisé
+        if name == 'db' and self.__dict__.get('use_cantools'):
+            import cantools
+            self.db = cantools.database.load_file(self.dbc_file_path)
+            return self.db
+        raise AttributeError(name)
         
     def load_dbc(self):
         """Charge et parse le fichier DBC"""
@@ -196,10 +239,343 @@ class DBCParser:
                 logger.error(f"Erreur lors du décodage basique du message CAN {can_id}: {e}")
                 return None, {}
 
+    def _compile_decode_plan(self, can_id):
+        """Compile le plan de décodage vectorisé d'un message (None si le message est inconnu)"""
+        if self.use_cantools:
+            try:
+                message = self.db.get_message_by_frame_id(can_id)
+            except KeyError:
+                return None
+            name, length = message.name, message.length
+            definitions = [
+                dict(name=signal.name, start_bit=signal.start, length=signal.length,
+                     little_endian=signal.byte_order == 'little_endian', is_signed=signal.is_signed,
+                     factor=signal.scale, offset=signal.offset, unit=signal.unit, is_float=signal.is_float,
+                     multiplexer=signal.multiplexer_signal, multiplexer_ids=signal.multiplexer_ids)
+                for signal in message.signals
+            ]
+        else:
+            # Le parser de base conserve l'identifiant DBC, dont le bit 31 marque un identifiant étendu
+            message_info = self.messages.get(can_id) or self.messages.get(can_id | 0x80000000)
+            if not message_info:
+                return None
+            name, length = message_info['name'], message_info['length']
+            definitions = [
+                dict(name=signal_name, start_bit=signal_info['start_bit'], length=signal_info['length'],
+                     little_endian=signal_info['byte_order'] == 1, is_signed=signal_info['sign'] == '-',
+                     factor=signal_info['factor'], offset=signal_info['offset'], unit=signal_info['unit'])
+                for signal_name, signal_info in message_info['signals'].items()
+            ]
+
+        signals = []
+        for definition in definitions:
+            try:
+                signals.append(SignalDecodePlan(**definition))
+            except ValueError as e:
+                logger.warning(f"Signal ignoré dans le message {name}: {e}")
+        return MessageDecodePlan(can_id, name, length, signals)
+
+    def get_decode_plan(self, can_id):
+        """
+        Retourne le plan de décodage vectorisé d'un message, compilé au premier appel
+
+        Args:
+            can_id: ID du message CAN (entier)
+
+        Returns:
+            MessageDecodePlan, ou None si le message n'est pas défini dans le DBC
+        """
+        can_id = int(can_id) & CAN_ID_MASK
+        if can_id not in self._decode_plans:
+            self._decode_plans[can_id] = self._compile_decode_plan(can_id)
+        return self._decode_plans[can_id]
+
+    def compile_decode_plans(self):
+        """
+        Compile les plans de décodage de tous les messages du DBC
+
+        Returns:
+            Nombre de messages compilés
+        """
+        if self.use_cantools:
+            frame_ids = [message.frame_id for message in self.db.messages]
+        else:
+            frame_ids = list(self.messages)
+        for frame_id in frame_ids:
+            self.get_decode_plan(frame_id)
+        return len(frame_ids)
+
+    def decode_batch(self, can_id, data, lengths=None):
+        """
+        Décode en une fois toutes les trames d'un même message CAN
+
+        Args:
+            can_id: ID du message CAN (entier)
+            data: Tableau uint8 (trames, octets), par exemple (N, 8) en CAN ou (N, 64) en CAN FD
+            lengths: Nombre d'octets utiles de chaque trame (toute la largeur de data par défaut)
+
+        Returns:
+            Tuple (message_name, {nom du signal: tableau float64}) ou (None, {}) si le
+            message n'est pas défini ; voir MessageDecodePlan.decode
+        """
+        plan = self.get_decode_plan(can_id)
+        if plan is None:
+            return None, {}
+        try:
+            return plan.name, plan.decode(data, lengths)
+        except Exception as e:
+            logger.error(f"Erreur lors du décodage des trames du message CAN {can_id}: {e}")
+            return None, {}
+
+
+# Enregistrement CAN brut de taille fixe : [ID (4 octets LE)][DLC (1 octet)][DATA]
+CAN_RECORD_HEADER_SIZE = 5
+CAN_RECORD_MIN_SIZE = CAN_RECORD_HEADER_SIZE + 8
+
+# Canal de trames CAN des fichiers MDF 4 enregistrés selon la norme ASAM "bus logging"
+# (structure CAN_DataFrame.ID, CAN_DataFrame.DLC, CAN_DataFrame.DataBytes...)
+CAN_DATA_FRAME_CHANNEL = 'CAN_DataFrame'
+
+# Masque de l'identifiant (29 bits) : le bit 31 signale parfois un identifiant étendu
+CAN_ID_MASK = 0x1FFFFFFF
+
+# Trame texte "ID:DATA" (identifiant et données en hexadécimal)
+CAN_TEXT_FRAME_PATTERN = re.compile(rb'^\s*[0-9A-Fa-f]+\s*:[0-9A-Fa-f\s]*$')
+
+# Octets pouvant figurer dans une trame texte de largeur fixe (NUL de remplissage compris)
+CAN_TEXT_FRAME_BYTES = np.zeros(256, dtype=bool)
+CAN_TEXT_FRAME_BYTES[list(b'0123456789ABCDEFabcdef: \t\r\n\0')] = True
+
+# Longueur des données (octets) pour chaque code DLC, trames CAN FD comprises
+CAN_DLC_LENGTHS = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64], dtype=np.uint8)
+
+
+def _get_data_frame_fields(dtype):
+    """
+    Retourne les champs d'une structure CAN_DataFrame, indexés par leur nom court
+
+    Returns:
+        Dictionnaire {'ID': nom complet du champ, ...}, vide si dtype n'est pas une
+        structure de trames CAN (champs ID et DataBytes requis)
+    """
+    if not dtype.names:
+        return {}
+    fields = {name.rsplit('.', 1)[-1]: name for name in dtype.names}
+    if 'ID' not in fields or 'DataBytes' not in fields:
+        return {}
+    return fields
+
+
+def is_can_frame_samples(samples):
+    """
+    Indique si des échantillons ont une disposition de trames CAN reconnue
+
+    Sont reconnus les structures CAN_DataFrame et les enregistrements bruts de taille
+    fixe (tableau d'octets à deux dimensions d'au moins CAN_RECORD_MIN_SIZE colonnes).
+    """
+    if _get_data_frame_fields(samples.dtype):
+        return True
+    return samples.ndim == 2 and samples.dtype == np.uint8 and samples.shape[1] >= CAN_RECORD_MIN_SIZE
+
+
+def is_can_frame_field(channel_name):
+    """Indique si un canal est un champ (CAN_DataFrame.ID...) d'un canal CAN_DataFrame, exposé séparément par asammdf"""
+    return channel_name.startswith(CAN_DATA_FRAME_CHANNEL + '.')
+
+
+def _pad_payloads(payloads):
+    """Convertit des données de longueur variable (objets bytes) en tableau d'octets (trames, longueur maximale)"""
+    width = max((len(payload) for payload in payloads), default=0)
+    padded = b''.join(bytes(payload).ljust(width, b'\0') for payload in payloads)
+    return np.frombuffer(padded, dtype=np.uint8).reshape(len(payloads), width)
+
+
+def _extract_data_frames(samples, fields):
+    """Extrait les trames d'une structure CAN_DataFrame (voir extract_can_frames)"""
+    data = samples[fields['DataBytes']]
+    if data.dtype.kind == 'O':
+        data = _pad_payloads(data)
+    data = np.ascontiguousarray(data, dtype=np.uint8).reshape(len(samples), -1)
+
+    if 'DataLength' in fields:
+        lengths = samples[fields['DataLength']].astype(np.uint8)
+    elif 'DLC' in fields:
+        lengths = CAN_DLC_LENGTHS[np.minimum(samples[fields['DLC']], 15)]
+    else:
+        lengths = np.full(len(samples), data.shape[1], dtype=np.uint8)
+
+    ids = samples[fields['ID']].astype(np.uint32) & CAN_ID_MASK
+    return ids, lengths, data
+
+
+def _extract_raw_records(records):
+    """
+    Extrait les trames d'enregistrements bruts [ID (4 octets)][DLC][DATA] (voir extract_can_frames)
+
+    Les enregistrements sont réinterprétés en tableau structuré, sans copie par trame.
+    """
+    records = np.ascontiguousarray(records, dtype=np.uint8)
+    record_size = records.shape[1]
+    record_dtype = np.dtype({
+        'names': ['id', 'dlc', 'data'],
+        'formats': ['<u4', 'u1', ('u1', (record_size - CAN_RECORD_HEADER_SIZE,))],
+        'offsets': [0, 4, CAN_RECORD_HEADER_SIZE],
+        'itemsize': record_size,
+    })
+    frames = records.view(record_dtype).reshape(-1)
+    lengths = np.minimum(frames['dlc'], record_size - CAN_RECORD_HEADER_SIZE)
+    return frames['id'].astype(np.uint32) & CAN_ID_MASK, lengths, frames['data']
+
+
+def _extract_text_frames(samples):
+    """Extrait les trames de chaînes "ID:DATA" (ID et données en hexadécimal) ; rejette les chaînes invalides"""
+    ids, payloads, kept = [], [], []
+    for i, text in enumerate(samples):
+        try:
+            if isinstance(text, bytes):
+                text = text.decode('latin-1')
+            id_str, data_str = str(text).split(':', 1)
+            payloads.append(binascii.unhexlify(data_str.strip().replace(' ', '')))
+            ids.append(int(id_str.strip(), 16))
+            kept.append(i)
+        except (ValueError, binascii.Error):
+            logger.error(f"Message CAN illisible à l'index {i}: {text!r}")
+    data = _pad_payloads(payloads)
+    lengths = np.array([len(payload) for payload in payloads], dtype=np.uint8)
+    return np.array(ids, dtype=np.uint32), lengths, data, np.array(kept, dtype=np.int64)
+
+
+def _is_text_frame(sample):
+    """Indique si un échantillon est une trame texte "ID:DATA" (et non un enregistrement brut)"""
+    if isinstance(sample, str):
+        return True
+    return isinstance(sample, (bytes, bytearray)) and CAN_TEXT_FRAME_PATTERN.match(bytes(sample)) is not None
+
+
+def _extract_fixed_width_frames(samples):
+    """
+    Extrait les trames d'un tableau d'octets de largeur fixe ('S', voir extract_can_frames)
+
+    Le format est choisi une fois pour tout le canal, sur les octets des éléments :
+    chaînes "ID:DATA" si tous les octets sont hexadécimaux, espaces, ':' ou NUL et
+    que chaque élément contient ':', enregistrements bruts [ID (4 octets LE)][DLC][DATA]
+    sinon. Les enregistrements bruts sont lus sans boucle Python et sans perdre les
+    octets nuls finaux que numpy retire des éléments.
+
+    Returns:
+        Tuple (ids, longueurs, données, positions des échantillons retenus)
+
+    Raises:
+        ValueError: Si les enregistrements bruts sont plus courts que CAN_RECORD_MIN_SIZE
+    """
+    records = np.ascontiguousarray(samples).view(np.uint8).reshape(len(samples), samples.dtype.itemsize)
+    # Le premier élément suffit presque toujours à écarter le texte
+    if CAN_TEXT_FRAME_BYTES[records[:1]].all() and CAN_TEXT_FRAME_BYTES[records].all() \
+            and (records == ord(':')).any(axis=1).all():
+        return _extract_text_frames(samples)
+
+    if records.shape[1] < CAN_RECORD_MIN_SIZE:
+        raise ValueError(f"Enregistrements CAN de {records.shape[1]} octets trop courts")
+    ids, lengths, data = _extract_raw_records(records)
+    return ids, lengths, data, np.arange(len(samples), dtype=np.int64)
+
+
+def _extract_sample_frames(samples):
+    """
+    Extrait les trames d'échantillons objets ou chaînes ('O', 'U', voir extract_can_frames)
+
+    Chaque échantillon est une chaîne "ID:DATA" ou un enregistrement brut
+    [ID (4 octets LE)][DLC][DATA] de longueur variable ; les enregistrements de
+    moins de CAN_RECORD_MIN_SIZE octets sont ignorés.
+
+    Returns:
+        Tuple (ids, longueurs, données, positions des échantillons retenus)
+    """
+    is_text = np.fromiter((_is_text_frame(sample) for sample in samples), dtype=bool, count=len(samples))
+    text_rows = np.flatnonzero(is_text)
+    raw_rows = np.flatnonzero(~is_text)
+
+    parts = []
+    if len(text_rows):
+        ids, lengths, data, kept = _extract_text_frames(samples[text_rows])
+        parts.append((ids, lengths, data, text_rows[kept]))
+
+    if len(raw_rows):
+        record_rows = np.array([
+            row for row in raw_rows.tolist()
+            if isinstance(samples[row], (bytes, bytearray)) and len(samples[row]) >= CAN_RECORD_MIN_SIZE
+        ], dtype=np.int64)
+        records = _pad_payloads(samples[record_rows])
+        if len(record_rows) < len(raw_rows):
+            logger.warning(f"{len(raw_rows) - len(record_rows)} enregistrements CAN de moins de {CAN_RECORD_MIN_SIZE} octets ignorés")
+        if len(record_rows):
+            ids, lengths, data = _extract_raw_records(records)
+            parts.append((ids, lengths, data, record_rows))
+
+    if not parts:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint8), np.empty((0, 0), dtype=np.uint8), np.empty(0, dtype=np.int64)
+
+    # Trames remises dans l'ordre des échantillons, données complétées à la même largeur
+    width = max(part[2].shape[1] for part in parts)
+    kept = np.concatenate([part[3] for part in parts])
+    order = np.argsort(kept, kind='stable')
+    ids = np.concatenate([part[0] for part in parts])[order]
+    lengths = np.concatenate([part[1].astype(np.uint8) for part in parts])[order]
+    data = np.concatenate([np.pad(part[2], ((0, 0), (0, width - part[2].shape[1]))) for part in parts])[order]
+    return ids, lengths, data, kept[order]
+
+
+def extract_can_frames(signal):
+    """
+    Extrait les trames CAN d'un signal MDF sous forme de tableaux par colonne
+
+    Formats reconnus :
+    - structure CAN_DataFrame (norme ASAM bus logging) : champs ID, DLC ou DataLength
+      et DataBytes ;
+    - enregistrements bruts [ID (4 octets LE)][DLC (1 octet)][DATA] : tableau d'octets
+      à deux dimensions, ou éléments bytes d'au moins CAN_RECORD_MIN_SIZE octets ;
+    - chaînes "ID:DATA" en hexadécimal.
+
+    Args:
+        signal: Signal asammdf (déjà lu, voir MDFParser.load_signal)
+
+    Returns:
+        Dictionnaire avec 'timestamps' (secondes relatives), 'ids' (uint32), 'lengths'
+        (octets de données utiles, uint8) et 'data' (uint8 de forme (trames, octets),
+        complété par des zéros au-delà de la longueur)
+
+    Raises:
+        ValueError: Si les échantillons n'ont pas un format de trames CAN reconnu
+    """
+    samples = signal.samples
+    timestamps = np.asarray(signal.timestamps)
+
+    fields = _get_data_frame_fields(samples.dtype)
+    if fields:
+        ids, lengths, data = _extract_data_frames(samples, fields)
+    elif samples.ndim == 2 and samples.dtype.kind == 'u' and samples.dtype.itemsize == 1:
+        if samples.shape[1] < CAN_RECORD_MIN_SIZE:
+            raise ValueError(f"Enregistrements CAN de {samples.shape[1]} octets trop courts")
+        ids, lengths, data = _extract_raw_records(samples)
+    elif samples.dtype.kind == 'S':
+        ids, lengths, data, kept = _extract_fixed_width_frames(samples)
+        timestamps = timestamps[kept]
+    elif samples.dtype.kind in ('U', 'O'):
+        ids, lengths, data, kept = _extract_sample_frames(samples)
+        timestamps = timestamps[kept]
+    else:
+        raise ValueError(f"Format de trames CAN non reconnu ({samples.dtype}, forme {samples.shape})")
+
+    return {'timestamps': timestamps, 'ids': ids, 'lengths': lengths, 'data': data}
+
+
 def extract_can_messages_from_mdf(mdf_file, can_channel_name):
     """
     Extrait les messages CAN d'un canal dans un fichier MDF.
-    
+
+    Lit le canal puis le convertit avec extract_can_frames ; préférer
+    extract_can_frames lorsque le signal est déjà lu.
+
     Args:
         mdf_file: Instance de MDF (asammdf)
         can_channel_name: Nom du canal contenant les données CAN
@@ -215,35 +591,14 @@ def extract_can_messages_from_mdf(mdf_file, can_channel_name):
         
         # Extraire le signal
         channel_group, channel_index = mdf_file.channels_db[can_channel_name][0]
-        signal = mdf_file.get(can_channel_name, group=channel_group, index=channel_index)
-        
-        # Préparer la liste de messages
-        messages = []
-        
-        # Parser le canal selon le format
-        for i, (timestamp, data) in enumerate(zip(signal.timestamps, signal.samples)):
-            try:
-                # Format spécifique au canal, adapter selon les besoins
-                # Exemple : canal contenant des strings de format "ID:DATA"
-                if isinstance(data, (bytes, bytearray)):
-                    # Décodage basique d'un message CAN binaire
-                    # Format: [ID (4 bytes)][DLC (1 byte)][DATA (8 bytes)]
-                    if len(data) >= 13:
-                        can_id = int.from_bytes(data[0:4], byteorder='little')
-                        dlc = data[4]
-                        can_data = data[5:5+dlc]
-                        messages.append((timestamp, can_id, can_data))
-                elif isinstance(data, str):
-                    # Format texte "ID:DATA" (adapter selon format réel)
-                    if ':' in data:
-                        id_str, data_str = data.split(':', 1)
-                        can_id = int(id_str.strip(), 16)
-                        can_data = binascii.unhexlify(data_str.strip().replace(' ', ''))
-                        messages.append((timestamp, can_id, can_data))
-            except Exception as e:
-                logger.error(f"Erreur lors du parsing du message CAN à l'index {i}: {e}")
-        
-        return messages
+        signal = unpack_array_samples(mdf_file.get(can_channel_name, group=channel_group, index=channel_index))
+        frames = extract_can_frames(signal)
+        return [
+            (timestamp, can_id, bytes(data[:length]))
+            for timestamp, can_id, length, data in zip(
+                frames['timestamps'].tolist(), frames['ids'].tolist(), frames['lengths'].tolist(), frames['data']
+            )
+        ]
     
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction des messages CAN du canal {can_channel_name}: {e}")
@@ -0,0 +1,299 @@
+"""
+Module contenant le stockage des trames CAN brutes et leur décodage à la demande.
+
+Au lieu d'une ligne CANMessage par trame et d'une ligne CANSignal par signal de
+chaque trame, les trames d'un canal sont enregistrées en colonnes binaires (.npy)
+liées au RobotLog par un CANFrameSeries : timestamps, identifiants, longueurs et
+données. Les signaux ne sont décodés que lorsqu'une page les demande, pour un
+identifiant à la fois et en une passe vectorisée (DBCParser.decode_batch) ; les
+tableaux décodés sont gardés dans un cache LRU borné en mémoire
+(CAN_DECODE_CACHE_MB). Les logs importés ligne par ligne (MDF_IMPORT_CAN_STORAGE
+= 'rows') restent lus par leurs CANMessage.
+"""
+import math
+import logging
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.urls import reverse
+
+from .models import CANFrameSeries
+from .dbc_registry import get_dbc_parser, get_dbc_sha256
+
+logger = logging.getLogger(__name__)
+
+# Stockage des canaux CAN importés si MDF_IMPORT_CAN_STORAGE n'est pas défini :
+# 'frames' (trames brutes en fichiers binaires) ou 'rows' (lignes CANMessage et CANSignal)
+DEFAULT_CAN_STORAGE = 'frames'
+
+# Mémoire occupée au plus par les messages décodés si CAN_DECODE_CACHE_MB n'est pas défini
+DEFAULT_CAN_DECODE_CACHE_MB = 256
+
+# Nombre de trames lues et décodées ensemble lors de l'export
+CAN_EXPORT_CHUNK = 10000
+
+_decoded = OrderedDict()
+_decoded_bytes = 0
+_lock = threading.Lock()
+
+DecodedSignal = namedtuple('DecodedSignal', ['name', 'value', 'unit'])
+
+
+def get_can_storage():
+    """Retourne le mode de stockage des canaux CAN importés ('frames' ou 'rows')"""
+    return getattr(settings, 'MDF_IMPORT_CAN_STORAGE', DEFAULT_CAN_STORAGE)
+
+
+def get_can_decode_cache_bytes():
+    """Retourne la mémoire occupée au plus par les messages décodés (octets)"""
+    return max(float(getattr(settings, 'CAN_DECODE_CACHE_MB', DEFAULT_CAN_DECODE_CACHE_MB)), 0) * 1024 * 1024
+
+
+def parse_can_id(can_id):
+    """Convertit un identifiant CAN (entier, '0x1A0' ou '416') en entier"""
+    if isinstance(can_id, str):
+        return int(can_id, 16) if can_id.lower().startswith('0x') else int(can_id)
+    return int(can_id)
+
+
+def format_can_id(can_id):
+    """Formate un identifiant CAN comme les CANMessage (0x...)"""
+    return f"0x{int(can_id):X}"
+
+
+def _save_npy(field, name, array):
+    """Enregistre un tableau dans un FileField au format .npy"""
+    with tempfile.TemporaryFile() as npy_file:
+        np.save(npy_file, array)
+        npy_file.seek(0)
+        field.save(name, File(npy_file), save=False)
+
+
+class CANFrameBuffer:
+    """Trames extraites d'un canal CAN, en attente de leur enregistrement en CANFrameSeries"""
+
+    def __init__(self, channel_name, timestamps_ns, frames, dbc_file=None):
+        """
+        Args:
+            channel_name: Nom du canal
+            timestamps_ns: Tableau int64 de nanosecondes epoch, un par trame
+            frames: Trames extraites par extract_can_frames
+            dbc_file: DBCFile utilisé pour décoder les signaux (None sans DBC)
+        """
+        self.channel_name = channel_name
+        self.timestamps_ns = np.ascontiguousarray(timestamps_ns, dtype=np.int64)
+        self.ids = np.ascontiguousarray(frames['ids'], dtype=np.uint32)
+        self.lengths = np.ascontiguousarray(frames['lengths'], dtype=np.uint8)
+        self.data = np.ascontiguousarray(frames['data'], dtype=np.uint8)
+        self.dbc_file = dbc_file
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self, log):
+        """
+        Enregistre les trames et les rattache à un log principal déjà sauvegardé
+
+        Returns:
+            Instance de CANFrameSeries créée
+        """
+        unique_ids, counts = np.unique(self.ids, return_counts=True)
+        series = CANFrameSeries(
+            log=log,
+            channel_name=self.channel_name,
+            frames_count=len(self),
+            payload_width=self.data.shape[1],
+            start_ns=int(self.timestamps_ns[0]) if len(self) else None,
+            end_ns=int(self.timestamps_ns[-1]) if len(self) else None,
+            dbc_file=self.dbc_file,
+        )
+        series.set_id_counts({
+            format_can_id(can_id): count for can_id, count in zip(unique_ids.tolist(), counts.tolist())
+        })
+        _save_npy(series.timestamps_file, f"{log.id}_timestamps.npy", self.timestamps_ns)
+        _save_npy(series.ids_file, f"{log.id}_ids.npy", self.ids)
+        _save_npy(series.lengths_file, f"{log.id}_lengths.npy", self.lengths)
+        _save_npy(series.data_file, f"{log.id}_data.npy", self.data)
+        series.save()
+        return series
+
+
+def _get_cache_key(series, can_id):
+    """Clé du cache : le contenu du DBC en fait partie, un DBC remplacé donne d'autres entrées"""
+    dbc_sha256 = get_dbc_sha256(series.dbc_file) if series.dbc_file else None
+    return series.pk, dbc_sha256, can_id
+
+
+def _get_decoded_size(decoded):
+    return decoded['rows'].nbytes + sum(values.nbytes for values in decoded['signals'].values())
+
+
+def decode_can_message(series, can_id):
+    """
+    Décode toutes les trames d'un identifiant, dans l'ordre chronologique
+
+    Le résultat est gardé dans un cache LRU partagé par le processus ; il ne doit
+    pas être modifié.
+
+    Args:
+        series: Instance de CANFrameSeries
+        can_id: Identifiant CAN (entier ou hexadécimal)
+
+    Returns:
+        Dictionnaire avec 'message_name' (None si l'identifiant n'est pas défini dans
+        le DBC), 'rows' (positions des trames dans la série), 'signals' ({nom: tableau
+        float64}, NaN pour un signal absent d'une trame) et 'units' ({nom: unité})
+    """
+    global _decoded_bytes
+    can_id = parse_can_id(can_id)
+    key = _get_cache_key(series, can_id)
+    with _lock:
+        decoded = _decoded.get(key)
+        if decoded is not None:
+            _decoded.move_to_end(key)
+            return decoded
+
+    arrays = series.get_arrays()
+    rows = np.flatnonzero(arrays['ids'] == can_id)
+    decoded = {'message_name': None, 'rows': rows, 'signals': {}, 'units': {}}
+    if series.dbc_file and len(rows):
+        parser = get_dbc_parser(series.dbc_file)
+        message_name, signals = parser.decode_batch(can_id, arrays['data'][rows], arrays['lengths'][rows])
+        if message_name:
+            decoded.update(
+                message_name=message_name,
+                signals=signals,
+                units=parser.get_decode_plan(can_id).units,
+            )
+
+    size = _get_decoded_size(decoded)
+    max_bytes = get_can_decode_cache_bytes()
+    with _lock:
+        if key not in _decoded and size <= max_bytes:
+            _decoded[key] = decoded
+            _decoded_bytes += size
+            while _decoded_bytes > max_bytes:
+                _, evicted = _decoded.popitem(last=False)
+                _decoded_bytes -= _get_decoded_size(evicted)
+    return decoded
+
+
+def get_signal_values(series, can_id, signal_name, limit=None):
+    """
+    Retourne l'évolution d'un signal décodé (trames où il est présent)
+
+    Returns:
+        Tuple (timestamps en ns epoch int64, valeurs float64)
+    """
+    decoded = decode_can_message(series, can_id)
+    values = decoded['signals'].get(signal_name)
+    if values is None:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    present = ~np.isnan(values)
+    rows = decoded['rows'][present][:limit]
+    timestamps_ns = np.asarray(series.get_arrays()['timestamps_ns'][rows])
+    return timestamps_ns, values[present][:limit]
+
+
+def invalidate_can_decode_cache(series=None):
+    """Vide le cache des messages décodés (ceux d'une série seulement si series est donnée)"""
+    global _decoded_bytes
+    with _lock:
+        for key in [key for key in _decoded if series is None or key[0] == series.pk]:
+            _decoded_bytes -= _get_decoded_size(_decoded.pop(key))
+
+
+class DecodedSignals(list):
+    """Signaux décodés d'une trame, lisibles dans les gabarits comme CANMessage.signals"""
+
+    def all(self):
+        return self
+
+    def exists(self):
+        return bool(self)
+
+
+class CANFrame:
+    """Trame d'un CANFrameSeries, présentée aux pages comme un CANMessage"""
+
+    def __init__(self, series, index, timestamp, can_id, raw_data, message_name=None, signals=()):
+        self.id = index  # Position de la trame dans la série
+        self.log = series.log
+        self.timestamp = timestamp
+        self.can_id = can_id
+        self.raw_data = raw_data
+        self.message_name = message_name
+        self.signals = DecodedSignals(signals)
+
+    def get_absolute_url(self):
+        return reverse('robot_logs:can_frame_detail', args=[self.log.id, self.id])
+
+
+def get_can_frames(series, start=0, count=None, can_id=None, decode=True):
+    """
+    Lit une suite de trames d'un CANFrameSeries, dans l'ordre chronologique
+
+    Args:
+        series: Instance de CANFrameSeries
+        start: Position de la première trame (parmi celles de can_id s'il est donné)
+        count: Nombre de trames (jusqu'à la fin par défaut)
+        can_id: Identifiant des trames à lire (toutes par défaut)
+        decode: Décoder les signaux des trames (voir decode_can_message)
+
+    Returns:
+        Liste de CANFrame
+    """
+    arrays = series.get_arrays()
+    if can_id is not None:
+        rows = decode_can_message(series, can_id)['rows']
+    else:
+        rows = np.arange(series.frames_count)
+    start = max(int(start), 0)
+    rows = rows[start:None if count is None else start + count]
+    if not len(rows):
+        return []
+
+    timestamps = pd.to_datetime(np.asarray(arrays['timestamps_ns'][rows]), unit='ns', utc=True).to_pydatetime()
+    ids = np.asarray(arrays['ids'][rows])
+    lengths = np.asarray(arrays['lengths'][rows]).tolist()
+    data = np.asarray(arrays['data'][rows])
+
+    # Nom et signaux de chaque trame, lus dans les messages décodés de son identifiant
+    names = [None] * len(rows)
+    signals = [()] * len(rows)
+    if decode and series.dbc_file:
+        for frame_id in np.unique(ids).tolist():
+            decoded = decode_can_message(series, frame_id)
+            if not decoded['message_name']:
+                continue
+            positions = np.flatnonzero(ids == frame_id)
+            indexes = np.searchsorted(decoded['rows'], rows[positions])
+            columns = [
+                (name, values[indexes].tolist(), decoded['units'].get(name, ''))
+                for name, values in decoded['signals'].items()
+            ]
+            for column, position in enumerate(positions.tolist()):
+                names[position] = decoded['message_name']
+                signals[position] = [
+                    DecodedSignal(name, values[column], unit)
+                    for name, values, unit in columns
+                    if not math.isnan(values[column])
+                ]
+
+    return [
+        CANFrame(series, index, timestamp, format_can_id(frame_id), payload[:length].tobytes().hex(), name, frame_signals)
+        for index, timestamp, frame_id, length, payload, name, frame_signals
+        in zip(rows.tolist(), timestamps, ids.tolist(), lengths, data, names, signals)
+    ]
+
+
+def iter_can_frames(series, chunk_size=CAN_EXPORT_CHUNK):
+    """Parcourt toutes les trames décodées d'une série, par blocs de chunk_size trames"""
+    for start in range(0, series.frames_count, chunk_size):
+        yield from get_can_frames(series, start, chunk_size)
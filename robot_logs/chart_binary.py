@@ -0,0 +1,81 @@
+"""
+Module contenant le format binaire de transport des données de graphique.
+
+Une réponse binaire contient, dans l'ordre :
+
+- l'en-tête fixe de 12 octets : signature b'RLVB', version (uint8), 3 octets
+  réservés, longueur de l'en-tête JSON (uint32 little-endian) ;
+- l'en-tête JSON (UTF-8) : métadonnées du graphique et description des tableaux
+  (nom, type 'float32' ou 'float64', nombre d'éléments), complété par des espaces
+  pour que les données commencent sur un multiple de 8 octets ;
+- les tableaux, little-endian, chacun complété à un multiple de 8 octets.
+
+Le navigateur obtient ainsi des Float64Array/Float32Array directement sur le
+tampon reçu (voir static/robot_logs/js/chart_binary.js), sans analyse JSON des
+valeurs ; côté serveur, les octets viennent directement des tableaux NumPy.
+"""
+import json
+import struct
+
+import numpy as np
+from django.http import HttpResponse
+
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+BINARY_MAGIC = b'RLVB'
+BINARY_VERSION = 1
+
+# Alignement des tableaux (taille d'un float64)
+BINARY_ALIGNMENT = 8
+
+# Types transportés : float32 est conservé, tout le reste devient float64
+BINARY_DTYPES = {
+    np.dtype(np.float32): ('float32', np.dtype('<f4')),
+    np.dtype(np.float64): ('float64', np.dtype('<f8')),
+}
+
+
+def wants_binary(request):
+    """Indique si le client demande le format binaire (paramètre format=binary ou en-tête Accept)"""
+    if request.GET.get('format') == 'binary':
+        return True
+    return BINARY_CONTENT_TYPE in request.headers.get('Accept', '')
+
+
+def _padding(length):
+    """Nombre d'octets à ajouter pour atteindre un multiple de BINARY_ALIGNMENT"""
+    return -length % BINARY_ALIGNMENT
+
+
+def encode_arrays(arrays, meta=None):
+    """
+    Encode des tableaux NumPy au format binaire
+
+    Args:
+        arrays: Dictionnaire ordonné nom -> tableau à une dimension
+        meta: Métadonnées sérialisables en JSON transmises avec les tableaux
+
+    Returns:
+        Contenu binaire (bytes)
+    """
+    descriptions = []
+    chunks = []
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        type_name, wire_dtype = BINARY_DTYPES.get(array.dtype, BINARY_DTYPES[np.dtype(np.float64)])
+        data = np.ascontiguousarray(array, dtype=wire_dtype).tobytes()
+        descriptions.append({'name': name, 'dtype': type_name, 'length': int(array.size)})
+        chunks.append(data)
+        chunks.append(b'\0' * _padding(len(data)))
+
+    header = json.dumps({'meta': meta or {}, 'arrays': descriptions}).encode('utf-8')
+    header += b' ' * _padding(12 + len(header))
+    prefix = BINARY_MAGIC + struct.pack('<B3xI', BINARY_VERSION, len(header))
+    return b''.join([prefix, header, *chunks])
+
+
+class BinaryArraysResponse(HttpResponse):
+    """Réponse HTTP contenant des tableaux au format binaire"""
+
+    def __init__(self, arrays, meta=None, **kwargs):
+        kwargs.setdefault('content_type', BINARY_CONTENT_TYPE)
+        super().__init__(content=encode_arrays(arrays, meta), **kwargs)
@@ -0,0 +1,297 @@
+"""
+Module contenant la pyramide de niveaux de détail (LOD) des courbes.
+
+Le niveau k découpe la courbe en seaux consécutifs de 2**k échantillons et conserve,
+pour chaque seau, la première et la dernière valeur ainsi que le minimum et le
+maximum avec leur position. Tous les niveaux, du plus fin (LOD_MIN_LEVEL) jusqu'au
+seau unique, sont concaténés dans un seul tableau .npy : l'emplacement de chaque
+niveau se déduit du nombre d'échantillons. Une fenêtre de temps affichée sur une
+largeur donnée se lit alors dans le niveau dont les seaux font environ un pixel,
+quel que soit le zoom.
+"""
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Niveau le plus fin enregistré (seaux de 64 échantillons) : en dessous, les seaux
+# sont calculés à la volée à partir des échantillons, peu nombreux dans la fenêtre
+LOD_MIN_LEVEL = 6
+
+# Échantillons lus par bloc lors de la construction du niveau le plus fin
+LOD_BUILD_CHUNK = 1 << 20
+
+
+def get_lod_dtype(value_dtype):
+    """Type structuré d'un seau de la pyramide pour des valeurs de type value_dtype"""
+    value_dtype = np.dtype(value_dtype)
+    return np.dtype([
+        ('first', value_dtype),
+        ('last', value_dtype),
+        ('min', value_dtype),
+        ('max', value_dtype),
+        ('min_index', np.int64),
+        ('max_index', np.int64),
+    ])
+
+
+def lod_levels(samples_count, min_level=LOD_MIN_LEVEL):
+    """
+    Décrit les niveaux de la pyramide d'une courbe
+
+    Args:
+        samples_count: Nombre d'échantillons de la courbe
+        min_level: Niveau le plus fin enregistré
+
+    Returns:
+        Liste de tuples (niveau, position du premier seau, nombre de seaux), du plus
+        fin au seau unique ; liste vide si la courbe tient dans un seau du niveau le plus fin
+    """
+    levels = []
+    if samples_count <= (1 << min_level):
+        return levels
+
+    offset = 0
+    level = min_level
+    while True:
+        count = -(-samples_count >> level)
+        levels.append((level, offset, count))
+        if count == 1:
+            return levels
+        offset += count
+        level += 1
+
+
+def reduce_samples(values, bucket_size, first_index=0):
+    """
+    Calcule les seaux d'une suite d'échantillons
+
+    Les valeurs NaN ne sont retenues comme minimum ou maximum que si tout le seau en contient.
+
+    Args:
+        values: Échantillons, le premier étant au début d'un seau
+        bucket_size: Nombre d'échantillons par seau
+        first_index: Position du premier échantillon dans la courbe
+
+    Returns:
+        Tableau structuré (voir get_lod_dtype), un élément par seau
+    """
+    values = np.asarray(values)
+    samples_count = len(values)
+    buckets_count = -(-samples_count // bucket_size)
+    buckets = np.empty(buckets_count, dtype=get_lod_dtype(values.dtype))
+    if buckets_count == 0:
+        return buckets
+
+    padded = np.full(buckets_count * bucket_size, np.nan, dtype=values.dtype)
+    padded[:samples_count] = values
+    padded = padded.reshape(buckets_count, bucket_size)
+    missing = np.isnan(padded)
+
+    rows = np.arange(buckets_count)
+    min_position = np.where(missing, np.inf, padded).argmin(axis=1)
+    max_position = np.where(missing, -np.inf, padded).argmax(axis=1)
+    last_position = np.minimum((rows + 1) * bucket_size, samples_count) - 1
+
+    buckets['first'] = padded[:, 0]
+    buckets['last'] = values[last_position]
+    buckets['min'] = padded[rows, min_position]
+    buckets['max'] = padded[rows, max_position]
+    buckets['min_index'] = first_index + rows * bucket_size + min_position
+    buckets['max_index'] = first_index + rows * bucket_size + max_position
+    return buckets
+
+
+def merge_buckets(buckets):
+    """
+    Regroupe les seaux deux à deux pour obtenir le niveau supérieur
+
+    Args:
+        buckets: Seaux d'un niveau (tableau structuré)
+
+    Returns:
+        Seaux du niveau suivant
+    """
+    left = buckets[0::2]
+    right = buckets[1::2]
+    pairs = len(right)
+
+    merged = left.copy()
+    paired = merged[:pairs]
+    left = left[:pairs]
+
+    paired['last'] = right['last']
+
+    # En cas d'égalité, le seau de gauche (le plus ancien) est conservé
+    take_right = (right['min'] < left['min']) | (np.isnan(left['min']) & ~np.isnan(right['min']))
+    paired['min'] = np.where(take_right, right['min'], left['min'])
+    paired['min_index'] = np.where(take_right, right['min_index'], left['min_index'])
+
+    take_right = (right['max'] > left['max']) | (np.isnan(left['max']) & ~np.isnan(right['max']))
+    paired['max'] = np.where(take_right, right['max'], left['max'])
+    paired['max_index'] = np.where(take_right, right['max_index'], left['max_index'])
+
+    merged[:pairs] = paired
+    return merged
+
+
+def build_lod(values, min_level=LOD_MIN_LEVEL):
+    """
+    Construit la pyramide complète d'une courbe
+
+    Le niveau le plus fin est calculé par blocs, si bien que values peut être un
+    tableau projeté en mémoire plus grand que la mémoire disponible.
+
+    Args:
+        values: Valeurs de la courbe
+        min_level: Niveau le plus fin enregistré
+
+    Returns:
+        Tableau structuré concaténant tous les niveaux (voir lod_levels), ou None si
+        la courbe est trop courte pour nécessiter une pyramide
+    """
+    levels = lod_levels(len(values), min_level)
+    if not levels:
+        return None
+
+    bucket_size = 1 << min_level
+    chunk = max(LOD_BUILD_CHUNK // bucket_size, 1) * bucket_size
+    buckets = np.concatenate([
+        reduce_samples(values[start:start + chunk], bucket_size, first_index=start)
+        for start in range(0, len(values), chunk)
+    ])
+
+    pyramid = [buckets]
+    for _ in levels[1:]:
+        buckets = merge_buckets(buckets)
+        pyramid.append(buckets)
+    return np.concatenate(pyramid)
+
+
+def select_level(samples_count, width):
+    """
+    Choisit le niveau dont les seaux couvrent au plus width seaux pour samples_count échantillons
+
+    Returns:
+        Niveau (0 si les échantillons tiennent dans le budget sans réduction)
+    """
+    if samples_count <= 2 * width:
+        return 0
+    return max(math.ceil(math.log2(samples_count / width)), 1)
+
+
+def get_window_buckets(values, lod, first_index, last_index, level, min_level=LOD_MIN_LEVEL):
+    """
+    Retourne les seaux du niveau level couvrant les échantillons [first_index, last_index)
+
+    Les seaux sont lus dans la pyramide quand le niveau y est enregistré, sinon
+    calculés à partir des échantillons de la fenêtre.
+
+    Args:
+        values: Valeurs de la courbe
+        lod: Pyramide enregistrée (ou None)
+        first_index: Position du premier échantillon de la fenêtre
+        last_index: Position suivant le dernier échantillon de la fenêtre
+        level: Niveau à utiliser (voir select_level)
+        min_level: Niveau le plus fin de la pyramide
+
+    Returns:
+        Tableau structuré des seaux (voir get_lod_dtype)
+    """
+    first_bucket = first_index >> level
+    last_bucket = (last_index - 1) >> level
+
+    if lod is not None and level >= min_level:
+        for stored_level, offset, _ in lod_levels(len(values), min_level):
+            if stored_level == level:
+                return lod[offset + first_bucket:offset + last_bucket + 1]
+
+    bucket_size = 1 << level
+    start = first_bucket * bucket_size
+    end = min((last_bucket + 1) * bucket_size, len(values))
+    return reduce_samples(values[start:end], bucket_size, first_index=start)
+
+
+def buckets_to_points(buckets, samples_count, level):
+    """
+    Convertit des seaux en points à tracer
+
+    Chaque seau donne son minimum et son maximum dans l'ordre chronologique ; la
+    première valeur du premier seau et la dernière du dernier seau ancrent le tracé.
+
+    Returns:
+        Tuple (positions des échantillons int64, valeurs)
+    """
+    if len(buckets) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=buckets.dtype['min'])
+
+    min_first = buckets['min_index'] <= buckets['max_index']
+    indexes = np.empty((len(buckets), 2), dtype=np.int64)
+    values = np.empty((len(buckets), 2), dtype=buckets.dtype['min'])
+    indexes[:, 0] = np.where(min_first, buckets['min_index'], buckets['max_index'])
+    indexes[:, 1] = np.where(min_first, buckets['max_index'], buckets['min_index'])
+    values[:, 0] = np.where(min_first, buckets['min'], buckets['max'])
+    values[:, 1] = np.where(min_first, buckets['max'], buckets['min'])
+
+    first_index = (int(buckets['min_index'][0]) >> level) << level
+    last_index = min(((int(buckets['min_index'][-1]) >> level) + 1) << level, samples_count) - 1
+    indexes = np.concatenate(([first_index], indexes.ravel(), [last_index]))
+    values = np.concatenate(([buckets['first'][0]], values.ravel(), [buckets['last'][-1]]))
+
+    # Supprimer les doublons (minimum ou maximum situé sur un bord, seau d'un seul échantillon)
+    keep = np.concatenate(([True], indexes[1:] != indexes[:-1]))
+    return indexes[keep], values[keep]
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Sélectionne threshold points par l'algorithme LTTB (Largest Triangle Three Buckets)
+
+    Le premier et le dernier point sont conservés ; dans chaque seau intermédiaire,
+    le point retenu est celui qui forme le plus grand triangle avec le point retenu
+    précédemment et la moyenne du seau suivant, ce qui préserve l'allure de la courbe.
+
+    Args:
+        x: Abscisses croissantes (float64)
+        y: Ordonnées (les NaN ne sont retenus que si tout le seau en contient)
+        threshold: Nombre de points souhaité (au moins 3)
+
+    Returns:
+        Positions des points retenus (int64, croissantes)
+    """
+    samples_count = len(x)
+    if threshold >= samples_count or threshold < 3:
+        return np.arange(samples_count, dtype=np.int64)
+
+    # Limites des seaux intermédiaires (le premier et le dernier point sont à part)
+    edges = (np.arange(threshold - 1) * (samples_count - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = samples_count - 1
+
+    # Moyenne de chaque seau, utilisée comme troisième sommet du triangle
+    valid = ~np.isnan(y)
+    averages_x = np.empty(threshold - 1)
+    averages_y = np.empty(threshold - 1)
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        bucket_valid = valid[start:end]
+        averages_x[bucket] = x[start:end].mean()
+        averages_y[bucket] = y[start:end][bucket_valid].mean() if bucket_valid.any() else np.nan
+    averages_x[-1] = x[-1]
+    averages_y[-1] = y[-1]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = samples_count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs(
+            (x[previous] - averages_x[bucket + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (averages_y[bucket + 1] - y[previous])
+        )
+        areas = np.where(np.isnan(areas), -1.0, areas)
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
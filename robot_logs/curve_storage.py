@@ -0,0 +1,452 @@
+"""
+Module contenant le stockage en colonnes binaires des courbes.
+
+Une courbe est enregistrée sous forme de deux fichiers .npy contigus liés au
+RobotLog par un CurveSeries : les timestamps (int64, nanosecondes epoch UTC) et
+les valeurs (float64 ou float32). La lecture renvoie directement des tableaux
+NumPy, projetés en mémoire. Les courbes enregistrées ligne par ligne
+(CurveMeasurement) restent lisibles par la même API.
+"""
+import shutil
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Min, Max
+
+from .models import RobotLog, CurveSeries, CurveMeasurement
+from .curve_lod import (
+    LOD_MIN_LEVEL, build_lod, select_level, get_window_buckets, buckets_to_points, lttb_indices,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stockage des courbes importées si MDF_IMPORT_CURVE_STORAGE n'est pas défini :
+# 'series' (fichiers binaires) ou 'rows' (une ligne CurveMeasurement par mesure)
+DEFAULT_CURVE_STORAGE = 'series'
+
+# Taille des blocs copiés lors de l'assemblage des fichiers .npy
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Largeur d'affichage (pixels) par défaut et maximale pour la lecture d'une fenêtre de courbe
+DEFAULT_CURVE_WIDTH = 1500
+MAX_CURVE_WIDTH = 10000
+
+# Méthodes de réduction proposées par get_curve_points
+DOWNSAMPLING_METHODS = ('minmax', 'lttb')
+
+# Nombre maximal de courbes lues ensemble par get_curves_points
+MAX_COMPARED_CURVES = 16
+
+# Points intermédiaires (multiple de max_points) lus dans la pyramide avant l'application de LTTB
+LTTB_OVERSAMPLING = 4
+
+
+def get_curve_storage():
+    """Retourne le mode de stockage des courbes importées ('series' ou 'rows')"""
+    return getattr(settings, 'MDF_IMPORT_CURVE_STORAGE', DEFAULT_CURVE_STORAGE)
+
+
+def get_value_dtype(samples):
+    """Type de stockage des valeurs : float32 est conservé, tout le reste devient float64"""
+    return np.dtype(np.float32) if samples.dtype == np.float32 else np.dtype(np.float64)
+
+
+class SeriesBuffer:
+    """
+    Accumule les échantillons d'une courbe avant leur enregistrement en CurveSeries
+
+    Les fenêtres successives (import en flux) sont écrites dans des fichiers
+    temporaires : la mémoire utilisée ne dépend pas de la longueur de la courbe.
+    """
+
+    def __init__(self, sensor_name, value_dtype=np.float64):
+        self.sensor_name = sensor_name
+        self.value_dtype = np.dtype(value_dtype)
+        self.samples_count = 0
+        self.start_ns = None
+        self.end_ns = None
+        self.min_value = None
+        self.max_value = None
+        self._timestamps_file = tempfile.TemporaryFile()
+        self._values_file = tempfile.TemporaryFile()
+
+    def __len__(self):
+        return self.samples_count
+
+    def append(self, timestamps_ns, values):
+        """
+        Ajoute une fenêtre d'échantillons
+
+        Args:
+            timestamps_ns: Tableau int64 de nanosecondes epoch
+            values: Tableau des valeurs (converti en value_dtype)
+        """
+        if len(timestamps_ns) == 0:
+            return
+
+        timestamps_ns = np.ascontiguousarray(timestamps_ns, dtype=np.int64)
+        values = np.ascontiguousarray(values, dtype=self.value_dtype)
+        self._timestamps_file.write(timestamps_ns.tobytes())
+        self._values_file.write(values.tobytes())
+
+        if self.start_ns is None:
+            self.start_ns = int(timestamps_ns[0])
+        self.end_ns = int(timestamps_ns[-1])
+        self.samples_count += len(timestamps_ns)
+
+        finite = values[np.isfinite(values)]
+        if len(finite):
+            window_min, window_max = float(finite.min()), float(finite.max())
+            self.min_value = window_min if self.min_value is None else min(self.min_value, window_min)
+            self.max_value = window_max if self.max_value is None else max(self.max_value, window_max)
+
+    def _to_npy(self, raw_file, dtype, shape=None):
+        """Assemble un fichier .npy (de forme shape, une dimension par défaut) à partir des données brutes accumulées"""
+        npy_file = tempfile.TemporaryFile()
+        np.lib.format.write_array_header_2_0(npy_file, {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': False,
+            'shape': shape or (self.samples_count,),
+        })
+        raw_file.seek(0)
+        shutil.copyfileobj(raw_file, npy_file, COPY_BUFFER_SIZE)
+        npy_file.seek(0)
+        return npy_file
+
+    def save(self, log):
+        """
+        Enregistre la courbe et la rattache à un log principal déjà sauvegardé
+
+        Returns:
+            Instance de CurveSeries créée
+        """
+        series = CurveSeries(
+            log=log,
+            sensor_name=self.sensor_name,
+            samples_count=self.samples_count,
+            value_dtype=self.value_dtype.name,
+            start_ns=self.start_ns,
+            end_ns=self.end_ns,
+            min_value=self.min_value,
+            max_value=self.max_value,
+        )
+        try:
+            with self._to_npy(self._timestamps_file, np.dtype(np.int64)) as npy_file:
+                series.timestamps_file.save(f"{log.id}_timestamps.npy", File(npy_file), save=False)
+            with self._to_npy(self._values_file, self.value_dtype) as npy_file:
+                series.values_file.save(f"{log.id}_values.npy", File(npy_file), save=False)
+            save_curve_lod(series)
+        finally:
+            self.close()
+        return series
+
+    def close(self):
+        """Libère les fichiers temporaires"""
+        self._timestamps_file.close()
+        self._values_file.close()
+
+
+def save_curve_lod(series):
+    """
+    Construit et enregistre la pyramide de niveaux de détail d'une série
+
+    Les valeurs sont relues depuis le fichier .npy déjà enregistré (projection
+    mémoire), ce qui vaut aussi pour les courbes importées en flux.
+
+    Args:
+        series: CurveSeries dont les fichiers de données sont enregistrés
+
+    Returns:
+        Instance de CurveSeries enregistrée
+    """
+    _, values = series.get_arrays()
+    lod = build_lod(values, LOD_MIN_LEVEL)
+
+    if series.lod_file:
+        series.lod_file.delete(save=False)
+
+    if lod is not None:
+        with tempfile.TemporaryFile() as npy_file:
+            np.save(npy_file, lod)
+            npy_file.seek(0)
+            series.lod_file.save(f"{series.log_id}_lod.npy", File(npy_file), save=False)
+        series.lod_min_level = LOD_MIN_LEVEL
+    else:
+        series.lod_min_level = 0
+
+    series.save()
+    return series
+
+
+def load_curve_arrays(log, mmap_mode='r'):
+    """
+    Retourne les données d'une courbe sous forme de tableaux NumPy
+
+    Les courbes stockées en colonnes binaires sont projetées en mémoire ; les courbes
+    plus anciennes, stockées ligne par ligne, sont relues depuis CurveMeasurement.
+
+    Args:
+        log: RobotLog de type CURVE
+
+    Returns:
+        Tuple (timestamps en ns epoch int64, valeurs, nom du capteur)
+    """
+    try:
+        series = log.curve_series
+    except CurveSeries.DoesNotExist:
+        series = None
+
+    if series is not None:
+        timestamps, values = series.get_arrays(mmap_mode=mmap_mode)
+        return timestamps, values, series.sensor_name
+
+    # Chemin de compatibilité : une ligne CurveMeasurement par mesure
+    rows = list(log.curve_measurements.order_by('timestamp').values_list('timestamp', 'value', 'sensor_name'))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), ""
+
+    timestamps, values, sensor_names = zip(*rows)
+    timestamps = pd.to_datetime(list(timestamps), utc=True).as_unit('ns').asi8
+    return timestamps, np.asarray(values, dtype=np.float64), sensor_names[0]
+
+
+def get_curve_summary(log):
+    """
+    Retourne le nombre d'échantillons et le nom du capteur d'une courbe sans lire ses données
+
+    Returns:
+        Tuple (nombre d'échantillons, nom du capteur)
+    """
+    try:
+        series = log.curve_series
+        return series.samples_count, series.sensor_name
+    except CurveSeries.DoesNotExist:
+        first = log.curve_measurements.values_list('sensor_name', flat=True).first()
+        return log.curve_measurements.count(), first or ""
+
+
+def get_curve_window(log, start_ns=None, end_ns=None, width=DEFAULT_CURVE_WIDTH):
+    """
+    Retourne les points d'une fenêtre de courbe à tracer sur une largeur donnée
+
+    Les positions de la fenêtre sont trouvées par recherche dichotomique dans les
+    timestamps. Si la fenêtre contient plus de 2 x width échantillons, les points
+    sont lus dans le niveau de la pyramide dont les seaux couvrent environ un pixel
+    (minimum et maximum de chaque seau) : au plus ~2 x width points sont renvoyés,
+    quel que soit le zoom.
+
+    Args:
+        log: RobotLog de type CURVE
+        start_ns: Début de la fenêtre (ns epoch, début de la courbe si None)
+        end_ns: Fin de la fenêtre (ns epoch, fin de la courbe si None)
+        width: Largeur d'affichage en pixels
+
+    Returns:
+        Dictionnaire avec les timestamps (ns epoch int64), les valeurs, le nom du
+        capteur, le nombre d'échantillons de la fenêtre et le niveau utilisé
+    """
+    width = min(max(int(width), 1), MAX_CURVE_WIDTH)
+    timestamps, values, sensor_name = load_curve_arrays(log)
+
+    try:
+        series = log.curve_series
+    except CurveSeries.DoesNotExist:
+        series = None
+    lod = series.get_lod() if series is not None else None
+    min_level = series.lod_min_level if lod is not None else LOD_MIN_LEVEL
+
+    samples_count = len(timestamps)
+    first_index = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, side='left'))
+    last_index = samples_count if end_ns is None else int(np.searchsorted(timestamps, end_ns, side='right'))
+
+    # Un échantillon de part et d'autre pour que le tracé atteigne les bords de la fenêtre
+    first_index = max(first_index - 1, 0)
+    last_index = min(last_index + 1, samples_count)
+    window_count = max(last_index - first_index, 0)
+
+    level = select_level(window_count, width)
+    if level == 0:
+        window_timestamps = np.asarray(timestamps[first_index:last_index])
+        window_values = np.asarray(values[first_index:last_index])
+    else:
+        buckets = get_window_buckets(values, lod, first_index, last_index, level, min_level)
+        indexes, window_values = buckets_to_points(buckets, samples_count, level)
+        window_timestamps = np.asarray(timestamps[indexes])
+
+    return {
+        'timestamps_ns': window_timestamps,
+        'values': window_values,
+        'sensor_name': sensor_name,
+        'samples_count': window_count,
+        'level': level,
+    }
+
+
+def get_curve_points(log, start_ns=None, end_ns=None, max_points=2 * DEFAULT_CURVE_WIDTH, method='minmax'):
+    """
+    Retourne au plus max_points points d'une fenêtre de courbe
+
+    Args:
+        log: RobotLog de type CURVE
+        start_ns: Début de la fenêtre (ns epoch, début de la courbe si None)
+        end_ns: Fin de la fenêtre (ns epoch, fin de la courbe si None)
+        max_points: Nombre maximal de points renvoyés
+        method: 'minmax' (minimum et maximum par seau, conserve les pics) ou 'lttb'
+            (un point par seau choisi par LTTB, tracé plus lisse). Dans les deux cas
+            les points sont d'abord lus dans la pyramide de niveaux de détail, si
+            bien que le coût ne dépend pas de la taille de la fenêtre.
+
+    Returns:
+        Dictionnaire de get_curve_window complété par la méthode utilisée
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Méthode de réduction inconnue: {method}")
+    max_points = max(int(max_points), 10)
+
+    if method == 'lttb':
+        window = get_curve_window(log, start_ns, end_ns, width=max_points * LTTB_OVERSAMPLING // 2)
+        if len(window['values']) > max_points:
+            offset = window['timestamps_ns'][0]
+            x = (window['timestamps_ns'] - offset).astype(np.float64)
+            selected = lttb_indices(x, np.asarray(window['values'], dtype=np.float64), max_points)
+            window['timestamps_ns'] = window['timestamps_ns'][selected]
+            window['values'] = window['values'][selected]
+    else:
+        # Chaque seau donne deux points, plus les deux points d'ancrage et un seau
+        # partiel à chaque bord de la fenêtre
+        window = get_curve_window(log, start_ns, end_ns, width=(max_points - 4) // 2)
+
+    window['method'] = method
+    return window
+
+
+def load_curve_logs(log_ids):
+    """
+    Charge en une requête les logs de courbe demandés et leur série binaire
+
+    Args:
+        log_ids: Identifiants des logs (les identifiants inconnus ou d'un autre type sont ignorés)
+
+    Returns:
+        Liste de RobotLog dans l'ordre de log_ids
+    """
+    logs = RobotLog.objects.filter(id__in=log_ids, log_type='CURVE').select_related('curve_series')
+    logs_by_id = {log.id: log for log in logs}
+    return [logs_by_id[log_id] for log_id in dict.fromkeys(log_ids) if log_id in logs_by_id]
+
+
+def get_curves_stats(logs):
+    """
+    Retourne les statistiques de plusieurs courbes sans lire leurs données
+
+    Les courbes binaires utilisent les valeurs enregistrées dans CurveSeries ; les
+    courbes stockées ligne par ligne sont agrégées ensemble en une seule requête.
+
+    Args:
+        logs: RobotLog chargés par load_curve_logs
+
+    Returns:
+        Dictionnaire id du log -> {'samples_count', 'sensor_name', 'min', 'max',
+        'start_ns', 'end_ns'}
+    """
+    stats = {}
+    row_log_ids = []
+    for log in logs:
+        try:
+            series = log.curve_series
+        except CurveSeries.DoesNotExist:
+            row_log_ids.append(log.id)
+            continue
+        stats[log.id] = {
+            'samples_count': series.samples_count,
+            'sensor_name': series.sensor_name,
+            'min': series.min_value,
+            'max': series.max_value,
+            'start_ns': series.start_ns,
+            'end_ns': series.end_ns,
+        }
+
+    if row_log_ids:
+        aggregates = CurveMeasurement.objects.filter(log_id__in=row_log_ids).values('log_id').annotate(
+            samples_count=Count('id'),
+            sensor_name=Max('sensor_name'),
+            min_value=Min('value'),
+            max_value=Max('value'),
+            start=Min('timestamp'),
+            end=Max('timestamp'),
+        )
+        for row in aggregates:
+            stats[row['log_id']] = {
+                'samples_count': row['samples_count'],
+                'sensor_name': row['sensor_name'],
+                'min': row['min_value'],
+                'max': row['max_value'],
+                'start_ns': pd.Timestamp(row['start']).as_unit('ns').value,
+                'end_ns': pd.Timestamp(row['end']).as_unit('ns').value,
+            }
+
+    empty = {'samples_count': 0, 'sensor_name': '', 'min': None, 'max': None, 'start_ns': None, 'end_ns': None}
+    return {log.id: stats.get(log.id, dict(empty)) for log in logs}
+
+
+def get_curves_points(logs, start_ns=None, end_ns=None, max_points=2 * DEFAULT_CURVE_WIDTH,
+                      method='minmax', align=False, stats=None):
+    """
+    Retourne les points de plusieurs courbes sur une même fenêtre
+
+    Args:
+        logs: RobotLog chargés par load_curve_logs (au plus MAX_COMPARED_CURVES)
+        start_ns, end_ns: Fenêtre (ns epoch) ; par défaut l'étendue commune des courbes
+        max_points: Nombre maximal de points par courbe
+        method: Méthode de réduction (voir get_curve_points)
+        align: Rééchantillonner toutes les courbes sur une base de temps commune de
+            max_points instants régulièrement espacés (interpolation linéaire, NaN
+            en dehors de l'étendue de chaque courbe)
+        stats: Statistiques déjà calculées par get_curves_stats
+
+    Returns:
+        Dictionnaire avec 'curves' (fenêtre de chaque courbe, voir get_curve_window)
+        et, si align, 'timestamps_ns' (base de temps commune)
+    """
+    if len(logs) > MAX_COMPARED_CURVES:
+        raise ValueError(f"Au plus {MAX_COMPARED_CURVES} courbes peuvent être comparées")
+
+    if stats is None:
+        stats = get_curves_stats(logs)
+    if start_ns is None:
+        starts = [stats[log.id]['start_ns'] for log in logs if stats[log.id]['start_ns'] is not None]
+        start_ns = min(starts) if starts else None
+    if end_ns is None:
+        ends = [stats[log.id]['end_ns'] for log in logs if stats[log.id]['end_ns'] is not None]
+        end_ns = max(ends) if ends else None
+
+    windows = []
+    for log in logs:
+        window = get_curve_points(log, start_ns, end_ns, max_points=max_points, method=method)
+        window['log_id'] = log.id
+        windows.append(window)
+
+    result = {'curves': windows}
+    if align:
+        if start_ns is None or end_ns is None:
+            grid = np.empty(0, dtype=np.int64)
+        else:
+            grid = np.linspace(start_ns, end_ns, max(int(max_points), 2)).astype(np.int64)
+        for window in windows:
+            timestamps = window['timestamps_ns']
+            if len(timestamps) and len(grid):
+                window['values'] = np.interp(
+                    (grid - grid[0]).astype(np.float64),
+                    (timestamps - grid[0]).astype(np.float64),
+                    np.asarray(window['values'], dtype=np.float64),
+                    left=np.nan, right=np.nan,
+                )
+            else:
+                window['values'] = np.full(len(grid), np.nan)
+            window['timestamps_ns'] = grid
+        result['timestamps_ns'] = grid
+    return result
@@ -0,0 +1,215 @@
+"""
+Module contenant le catalogue des fichiers DBC.
+
+Les définitions de messages et de signaux d'un DBC sont extraites une seule fois,
+au téléversement, dans les tables DBCMessageDef et DBCSignalDef (identifiant,
+longueur, disposition des bits, unités, bornes...). La page de détail d'un DBC
+les lit sans analyser le fichier, les plans de décodage vectorisés peuvent en être
+reconstruits sans cantools (voir dbc_registry) et un signal peut être cherché
+dans tous les DBC par une simple requête indexée.
+"""
+import json
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DBCMessageDef, DBCSignalDef
+from .can_parser import CAN_ID_MASK
+from .can_decoder import SignalDecodePlan, MessageDecodePlan
+
+logger = logging.getLogger(__name__)
+
+# Bit 31 de l'identifiant DBC : identifiant étendu (29 bits)
+DBC_EXTENDED_ID_FLAG = 0x80000000
+
+# Nombre de lignes insérées par requête
+CATALOG_BATCH_SIZE = 2000
+
+
+def _iter_cantools_definitions(db):
+    """Parcourt les messages d'une base cantools"""
+    for message in db.messages:
+        signals = [
+            dict(name=signal.name, start_bit=signal.start, length=signal.length,
+                 little_endian=signal.byte_order == 'little_endian', is_signed=signal.is_signed,
+                 is_float=signal.is_float, factor=signal.scale, offset=signal.offset,
+                 minimum=signal.minimum, maximum=signal.maximum, unit=signal.unit or '',
+                 multiplexer=signal.multiplexer_signal or '', multiplexer_ids=signal.multiplexer_ids or [],
+                 comment=signal.comment)
+            for signal in message.signals
+        ]
+        yield dict(
+            frame_id=message.frame_id & CAN_ID_MASK, name=message.name, length=message.length,
+            is_extended=message.is_extended_frame, sender=', '.join(message.senders or ()),
+            comment=message.comment,
+        ), signals
+
+
+def _iter_basic_definitions(messages):
+    """Parcourt les messages du parser de base (DBCParser.messages)"""
+    for can_id, message_info in messages.items():
+        signals = [
+            dict(name=signal_name, start_bit=signal_info['start_bit'], length=signal_info['length'],
+                 little_endian=signal_info['byte_order'] == 1, is_signed=signal_info['sign'] == '-',
+                 is_float=False, factor=signal_info['factor'], offset=signal_info['offset'],
+                 minimum=signal_info.get('min'), maximum=signal_info.get('max'),
+                 unit=signal_info.get('unit') or '', multiplexer='', multiplexer_ids=[], comment=None)
+            for signal_name, signal_info in message_info.get('signals', {}).items()
+        ]
+        yield dict(
+            frame_id=can_id & CAN_ID_MASK, name=message_info.get('name', 'Inconnu'),
+            length=message_info.get('length', 0), is_extended=bool(can_id & DBC_EXTENDED_ID_FLAG),
+            sender=message_info.get('sender', ''), comment=None,
+        ), signals
+
+
+def iter_dbc_definitions(parser):
+    """
+    Parcourt les définitions de messages d'un DBCParser
+
+    Returns:
+        Itérateur de tuples (champs du message, liste des champs de ses signaux)
+    """
+    if parser.use_cantools:
+        return _iter_cantools_definitions(parser.db)
+    return _iter_basic_definitions(parser.messages)
+
+
+def has_dbc_catalog(dbc_file):
+    """Indique si le catalogue d'un DBC a déjà été établi"""
+    return dbc_file.catalog_built_at is not None
+
+
+@transaction.atomic
+def build_dbc_catalog(dbc_file, parser=None, rebuild=False):
+    """
+    Établit le catalogue des messages et signaux d'un fichier DBC
+
+    Args:
+        dbc_file: Instance de DBCFile
+        parser: DBCParser du fichier (get_dbc_parser par défaut)
+        rebuild: Recréer le catalogue s'il existe déjà
+
+    Returns:
+        Nombre de messages catalogués
+    """
+    from .dbc_registry import get_dbc_parser
+
+    if has_dbc_catalog(dbc_file) and not rebuild:
+        return dbc_file.message_defs.count()
+
+    parser = parser or get_dbc_parser(dbc_file)
+    dbc_file.message_defs.all().delete()
+
+    # Un DBC peut redéfinir un identifiant : la dernière définition l'emporte, comme dans cantools
+    definitions = list({message['frame_id']: (message, signals) for message, signals in iter_dbc_definitions(parser)}.values())
+    message_defs = [
+        DBCMessageDef(dbc_file=dbc_file, signals_count=len(signals), **message)
+        for message, signals in definitions
+    ]
+    DBCMessageDef.objects.bulk_create(message_defs, batch_size=CATALOG_BATCH_SIZE)
+
+    # Les clés primaires ne sont pas renseignées par bulk_create sur toutes les bases
+    message_ids = dict(dbc_file.message_defs.values_list('frame_id', 'id'))
+    signal_defs = []
+    for message, signals in definitions:
+        for signal in signals:
+            signal_def = DBCSignalDef(
+                dbc_file=dbc_file, message_id=message_ids[message['frame_id']],
+                **{key: value for key, value in signal.items() if key != 'multiplexer_ids'}
+            )
+            signal_def.set_multiplexer_ids(signal['multiplexer_ids'])
+            signal_defs.append(signal_def)
+    DBCSignalDef.objects.bulk_create(signal_defs, batch_size=CATALOG_BATCH_SIZE)
+
+    dbc_file.catalog_built_at = timezone.now()
+    dbc_file.parser_type = 'cantools' if parser.use_cantools else 'basic'
+    type(dbc_file).objects.filter(pk=dbc_file.pk).update(
+        catalog_built_at=dbc_file.catalog_built_at, parser_type=dbc_file.parser_type
+    )
+    logger.info(f"Catalogue du DBC {dbc_file.name} établi : {len(message_defs)} messages, {len(signal_defs)} signaux")
+    return len(message_defs)
+
+
+def load_decode_plans(dbc_file):
+    """
+    Reconstruit les plans de décodage de tous les messages d'un DBC à partir de son catalogue
+
+    Returns:
+        Dictionnaire {identifiant CAN: MessageDecodePlan}
+    """
+    # Lignes lues sans instancier les modèles : un DBC compte souvent des dizaines de milliers de signaux
+    message_defs = {
+        message_id: (frame_id, name, length, [])
+        for message_id, frame_id, name, length in dbc_file.message_defs.values_list('id', 'frame_id', 'name', 'length')
+    }
+    signal_rows = dbc_file.signal_defs.order_by('message_id', 'id').values_list(
+        'message_id', 'name', 'start_bit', 'length', 'little_endian', 'is_signed', 'is_float',
+        'factor', 'offset', 'unit', 'multiplexer', 'multiplexer_ids',
+    )
+    for (message_id, name, start_bit, length, little_endian, is_signed, is_float,
+         factor, offset, unit, multiplexer, multiplexer_ids) in signal_rows:
+        try:
+            message_defs[message_id][3].append(SignalDecodePlan(
+                name, start_bit, length, little_endian=little_endian, is_signed=is_signed,
+                factor=factor, offset=offset, unit=unit, is_float=is_float,
+                multiplexer=multiplexer or None, multiplexer_ids=json.loads(multiplexer_ids or '[]'),
+            ))
+        except ValueError as e:
+            logger.warning(f"Signal ignoré dans le message {message_defs[message_id][1]}: {e}")
+
+    return {
+        frame_id: MessageDecodePlan(frame_id, name, length, signals)
+        for frame_id, name, length, signals in message_defs.values()
+    }
+
+
+def load_basic_messages(dbc_file):
+    """
+    Reconstruit le dictionnaire de messages du parser de base (DBCParser.messages) à partir du catalogue
+    """
+    messages = {}
+    message_keys = {}
+    for message_def in dbc_file.message_defs.all():
+        can_id = message_def.frame_id | (DBC_EXTENDED_ID_FLAG if message_def.is_extended else 0)
+        message_keys[message_def.id] = can_id
+        messages[can_id] = {
+            'name': message_def.name,
+            'length': message_def.length,
+            'sender': message_def.sender,
+            'signals': {},
+        }
+    for signal_def in dbc_file.signal_defs.order_by('message_id', 'id'):
+        messages[message_keys[signal_def.message_id]]['signals'][signal_def.name] = {
+            'start_bit': signal_def.start_bit,
+            'length': signal_def.length,
+            'byte_order': 1 if signal_def.little_endian else 0,
+            'sign': '-' if signal_def.is_signed else '+',
+            'factor': signal_def.factor,
+            'offset': signal_def.offset,
+            'min': signal_def.minimum,
+            'max': signal_def.maximum,
+            'unit': signal_def.unit,
+        }
+    return messages
+
+
+def find_signal_defs(name, limit=100):
+    """
+    Cherche un signal dans les catalogues de tous les DBC
+
+    Les signaux portant exactement ce nom sont renvoyés en premier, suivis de ceux
+    dont le nom le contient.
+
+    Returns:
+        Liste de DBCSignalDef (avec leur message et leur DBC)
+    """
+    signal_defs = DBCSignalDef.objects.select_related('message', 'dbc_file')
+    exact = list(signal_defs.filter(name=name).order_by('dbc_file__name', 'message__frame_id')[:limit])
+    if len(exact) < limit:
+        exact += list(
+            signal_defs.filter(name__icontains=name).exclude(name=name)
+            .order_by('name', 'dbc_file__name', 'message__frame_id')[:limit - len(exact)]
+        )
+    return exact
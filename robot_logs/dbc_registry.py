@@ -0,0 +1,183 @@
+"""
+Module contenant le registre des fichiers DBC analysés, partagé par tout le processus.
+
+L'analyse d'un DBC volumineux par cantools prend plusieurs secondes. Les DBCParser
+sont donc conservés, indexés par l'empreinte SHA-256 du contenu du fichier :
+- en mémoire, dans un cache LRU de DBC_CACHE_SIZE entrées ;
+- sur disque (DBC_CACHE_DIR), sous forme sérialisée avec les plans de décodage de
+  tous les messages déjà compilés, pour les autres processus et après un redémarrage.
+
+Le catalogue d'un DBC (voir dbc_catalog), établi au téléversement, est consulté
+avant le cache disque : les plans de décodage en sont reconstruits sans analyser
+le fichier.
+
+Un même contenu donnant toujours le même résultat, une entrée ne devient jamais
+fausse : remplacer ou supprimer un DBCFile retire seulement l'entrée de l'ancien
+contenu (voir DBCFile.save et DBCFile.delete).
+"""
+import os
+import pickle
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .can_parser import DBCParser
+from .dbc_catalog import has_dbc_catalog, load_decode_plans, load_basic_messages
+from .mdf_dedup import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Nombre de DBC analysés gardés en mémoire si DBC_CACHE_SIZE n'est pas défini
+DEFAULT_DBC_CACHE_SIZE = 8
+
+# Version du format des fichiers du cache disque, à incrémenter si DBCParser ou les
+# plans de décodage changent de structure
+DBC_CACHE_VERSION = 1
+
+_parsers = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_dbc_cache_size():
+    """Retourne le nombre de DBC analysés gardés en mémoire"""
+    return max(int(getattr(settings, 'DBC_CACHE_SIZE', DEFAULT_DBC_CACHE_SIZE)), 1)
+
+
+def get_dbc_cache_dir():
+    """
+    Retourne le répertoire du cache disque des DBC analysés
+
+    Il est placé hors de MEDIA_ROOT : les fichiers qui s'y trouvent sont relus avec
+    pickle et ne doivent être ni servis ni déposés par le site.
+    """
+    return getattr(settings, 'DBC_CACHE_DIR', None) or os.path.join(settings.BASE_DIR, 'cache', 'dbc')
+
+
+def _get_parser_version():
+    """Identifie le parser utilisé (cantools et sa version, ou parser de base)"""
+    try:
+        import cantools
+        return f"cantools-{cantools.__version__}"
+    except ImportError:
+        return 'basic'
+
+
+def _get_cache_path(sha256):
+    return os.path.join(get_dbc_cache_dir(), f"{sha256}.pickle")
+
+
+def _load_from_disk(sha256):
+    """Relit un DBCParser du cache disque (None s'il est absent ou d'une autre version)"""
+    path = _get_cache_path(sha256)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as cache_file:
+            entry = pickle.load(cache_file)
+        if entry.get('version') == DBC_CACHE_VERSION and entry.get('parser_version') == _get_parser_version():
+            return entry['parser']
+    except Exception as e:
+        logger.warning(f"Cache DBC illisible ({path}), le fichier sera de nouveau analysé: {e}")
+    return None
+
+
+def _save_to_disk(sha256, parser):
+    """Écrit un DBCParser dans le cache disque (écriture atomique)"""
+    path = _get_cache_path(sha256)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'version': DBC_CACHE_VERSION, 'parser_version': _get_parser_version(), 'parser': parser}
+        with open(temp_path, 'wb') as cache_file:
+            pickle.dump(entry, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.warning(f"Impossible d'écrire le cache DBC {path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_dbc_sha256(dbc_file):
+    """
+    Retourne l'empreinte du contenu d'un DBCFile, calculée et enregistrée au premier appel
+    """
+    if not dbc_file.sha256:
+        dbc_file.sha256 = file_sha256(dbc_file.file.path)
+        if dbc_file.pk:
+            type(dbc_file).objects.filter(pk=dbc_file.pk).update(sha256=dbc_file.sha256)
+    return dbc_file.sha256
+
+
+def _load_from_catalog(dbc_file):
+    """Crée un DBCParser à partir du catalogue d'un DBC (None si le catalogue est inutilisable)"""
+    if not has_dbc_catalog(dbc_file):
+        return None
+    use_cantools = dbc_file.parser_type == 'cantools'
+    if use_cantools and _get_parser_version() == 'basic':
+        # La base cantools ne pourrait pas être rechargée à la demande
+        return None
+    try:
+        return DBCParser.from_decode_plans(
+            dbc_file.file.path, load_decode_plans(dbc_file), use_cantools,
+            messages=None if use_cantools else load_basic_messages(dbc_file),
+        )
+    except Exception as e:
+        logger.warning(f"Catalogue du DBC {dbc_file.name} inutilisable, le fichier sera analysé: {e}")
+        return None
+
+
+def get_dbc_parser(dbc_file):
+    """
+    Retourne le DBCParser d'un fichier DBC, partagé par tous les appelants du processus
+
+    Le parser est cherché dans le cache mémoire, puis reconstruit à partir du
+    catalogue du DBC ou relu du cache disque ; à défaut, le fichier est analysé,
+    tous ses plans de décodage sont compilés et le résultat est ajouté aux deux caches.
+
+    Args:
+        dbc_file: Instance de DBCFile
+
+    Returns:
+        Instance de DBCParser (à ne pas modifier : elle est partagée)
+    """
+    sha256 = get_dbc_sha256(dbc_file)
+    with _lock:
+        parser = _parsers.get(sha256)
+        if parser is not None:
+            _parsers.move_to_end(sha256)
+            return parser
+
+    parser = _load_from_catalog(dbc_file)
+    if parser is not None:
+        logger.info(f"DBC {dbc_file.name} reconstruit depuis son catalogue")
+    else:
+        parser = _load_from_disk(sha256)
+        if parser is not None:
+            # Le chemin sert au rechargement de la base cantools (DBCParser.__getattr__)
+            parser.dbc_file_path = dbc_file.file.path
+            logger.info(f"DBC {dbc_file.name} relu depuis le cache disque")
+        else:
+            parser = DBCParser(dbc_file.file.path)
+            messages_count = parser.compile_decode_plans()
+            _save_to_disk(sha256, parser)
+            logger.info(f"DBC {dbc_file.name} analysé et mis en cache ({messages_count} messages)")
+
+    with _lock:
+        _parsers[sha256] = parser
+        _parsers.move_to_end(sha256)
+        while len(_parsers) > get_dbc_cache_size():
+            _parsers.popitem(last=False)
+    return parser
+
+
+def invalidate_dbc_cache(sha256):
+    """Retire d'un contenu DBC les entrées des caches mémoire et disque"""
+    if not sha256:
+        return
+    with _lock:
+        _parsers.pop(sha256, None)
+    path = _get_cache_path(sha256)
+    if os.path.exists(path):
+        os.remove(path)
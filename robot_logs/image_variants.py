@@ -0,0 +1,202 @@
+"""
+Module contenant les images importées et leurs miniatures.
+
+Les images sont enregistrées avec leurs octets d'origine (aucun réencodage) : seul
+l'en-tête est lu pour connaître le format et les dimensions. Des miniatures de
+quelques tailles fixes (WebP par défaut, JPEG si Pillow ne gère pas WebP) sont
+générées par un pool de threads ; Pillow libère le GIL pendant le décodage, la
+réduction et l'encodage, si bien que les images d'un canal sont traitées en
+parallèle. Les pages demandent la taille dont elles ont besoin (voir
+image_variant_url) et l'original n'est transmis que sur demande explicite.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.urls import reverse
+
+from .models import ImageThumbnail
+
+logger = logging.getLogger(__name__)
+
+# Tailles des miniatures : nom -> plus grande dimension (pixels)
+IMAGE_THUMBNAIL_SIZES = {
+    'small': 160,
+    'medium': 480,
+    'large': 1280,
+}
+
+# Format et qualité des miniatures si IMAGE_THUMBNAIL_FORMAT n'est pas défini
+DEFAULT_THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 80
+
+# Nombre de threads de génération si IMAGE_THUMBNAIL_WORKERS n'est pas défini
+DEFAULT_THUMBNAIL_WORKERS = 4
+
+# Extensions des fichiers enregistrés, par format Pillow
+IMAGE_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+    'BMP': 'bmp',
+    'TIFF': 'tif',
+}
+
+
+def get_thumbnail_format():
+    """Retourne le format des miniatures ('WEBP' ou 'JPEG')"""
+    image_format = getattr(settings, 'IMAGE_THUMBNAIL_FORMAT', DEFAULT_THUMBNAIL_FORMAT).upper()
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def get_thumbnail_workers():
+    """Retourne le nombre de threads de génération des miniatures"""
+    return max(int(getattr(settings, 'IMAGE_THUMBNAIL_WORKERS', DEFAULT_THUMBNAIL_WORKERS)), 1)
+
+
+def get_image_extension(image_format):
+    """Retourne l'extension de fichier d'un format Pillow"""
+    return IMAGE_EXTENSIONS.get(image_format, (image_format or 'bin').lower())
+
+
+def read_image_header(data):
+    """
+    Lit le format et les dimensions d'une image sans décoder ses pixels
+
+    Returns:
+        Tuple (largeur, hauteur, format Pillow)
+
+    Raises:
+        PIL.UnidentifiedImageError: Si les octets ne sont pas une image reconnue
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        return img.width, img.height, img.format or 'JPEG'
+
+
+def render_thumbnails(data, sizes=None, image_format=None):
+    """
+    Génère les miniatures d'une image (sans accès à la base)
+
+    L'image n'est décodée qu'une fois ; pour un JPEG, le décodage est directement
+    réduit à la plus grande taille demandée (Image.draft).
+
+    Args:
+        data: Octets de l'image d'origine
+        sizes: Noms des tailles (toutes les tailles de IMAGE_THUMBNAIL_SIZES par défaut)
+        image_format: Format des miniatures (get_thumbnail_format par défaut)
+
+    Returns:
+        Liste de tuples (nom de la taille, octets, largeur, hauteur)
+    """
+    sizes = sorted(sizes or IMAGE_THUMBNAIL_SIZES, key=IMAGE_THUMBNAIL_SIZES.get, reverse=True)
+    image_format = image_format or get_thumbnail_format()
+
+    with Image.open(io.BytesIO(data)) as img:
+        largest = IMAGE_THUMBNAIL_SIZES[sizes[0]]
+        img.draft('RGB', (largest, largest))
+        img = img.convert('RGBA' if image_format != 'JPEG' and img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        thumbnails = []
+        for size in sizes:
+            max_size = IMAGE_THUMBNAIL_SIZES[size]
+            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, format=image_format, quality=THUMBNAIL_QUALITY)
+            thumbnails.append((size, buffer.getvalue(), img.width, img.height))
+        return thumbnails
+
+
+def _read_and_render(image, sizes, image_format):
+    """Lit le fichier d'une image et génère ses miniatures (exécuté dans un thread)"""
+    try:
+        with image.image_file.open('rb') as image_file:
+            data = image_file.read()
+        return render_thumbnails(data, sizes, image_format)
+    except Exception as e:
+        logger.warning(f"Miniatures impossibles pour l'image {image.id}: {e}")
+        return []
+
+
+def generate_thumbnails(images, sizes=None, workers=None):
+    """
+    Génère les miniatures manquantes d'images déjà enregistrées
+
+    Les miniatures sont calculées en parallèle par un pool de threads ; les fichiers
+    et les lignes ImageThumbnail sont ensuite écrits par le thread appelant.
+
+    Args:
+        images: Instances d'ImageData sauvegardées
+        sizes: Noms des tailles (toutes par défaut)
+        workers: Nombre de threads (get_thumbnail_workers par défaut)
+
+    Returns:
+        Nombre de miniatures créées
+    """
+    images = [image for image in images if image.pk and image.image_file]
+    if not images:
+        return 0
+    sizes = list(sizes or IMAGE_THUMBNAIL_SIZES)
+    image_format = get_thumbnail_format()
+
+    existing = set(
+        ImageThumbnail.objects.filter(image__in=images, size__in=sizes).values_list('image_id', 'size')
+    )
+    pending = [
+        (image, [size for size in sizes if (image.pk, size) not in existing])
+        for image in images
+    ]
+    pending = [(image, missing) for image, missing in pending if missing]
+    if not pending:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=min(get_thumbnail_workers(), len(pending))) as executor:
+        rendered = executor.map(lambda item: _read_and_render(item[0], item[1], image_format), pending)
+
+        thumbnails = []
+        for (image, _), variants in zip(pending, rendered):
+            for size, data, width, height in variants:
+                thumbnail = ImageThumbnail(image=image, size=size, format=image_format, width=width, height=height)
+                thumbnail.file.save(
+                    f"{image.pk}_{size}.{get_image_extension(image_format)}", ContentFile(data), save=False
+                )
+                thumbnails.append(thumbnail)
+
+    ImageThumbnail.objects.bulk_create(thumbnails, ignore_conflicts=True)
+    return len(thumbnails)
+
+
+def get_thumbnail(image, size):
+    """
+    Retourne la miniature d'une image, générée à la demande si elle n'existe pas encore
+
+    Returns:
+        Instance d'ImageThumbnail, ou None si l'image ne peut pas être réduite
+    """
+    thumbnail = ImageThumbnail.objects.filter(image=image, size=size).first()
+    if thumbnail is None:
+        generate_thumbnails([image], sizes=[size])
+        thumbnail = ImageThumbnail.objects.filter(image=image, size=size).first()
+    return thumbnail
+
+
+def image_variant_url(image, size):
+    """
+    Retourne l'URL à utiliser pour afficher une image à une taille donnée
+
+    L'URL du fichier est renvoyée directement si la miniature existe (les miniatures
+    de l'image doivent alors être préchargées avec prefetch_related('thumbnails')
+    pour éviter une requête par image) ; sinon, l'URL de ImageVariantView, qui la
+    génère puis redirige vers le fichier.
+    """
+    if size == 'original':
+        return image.image_file.url
+    for thumbnail in image.thumbnails.all():
+        if thumbnail.size == size:
+            return thumbnail.file.url
+    return reverse('robot_logs:image_variant', args=[image.pk, size])
@@ -0,0 +1,171 @@
+"""
+Module contenant la file d'attente des importations MDF en arrière-plan.
+
+Les vues créent un ImportJob en attente ; la commande run_import_worker réclame les
+tâches une à une dans la base (sans broker externe), lance MDFParser.process_file
+et enregistre l'avancement canal par canal, le débit et l'erreur éventuelle. La
+carte d'occupation laser du groupe est ensuite mise à jour avec les nouveaux scans.
+"""
+import json
+import time
+import logging
+import traceback
+
+from django.utils import timezone
+
+from .models import ImportJob
+from .mdf_parser import MDFParser
+from .laser_occupancy import refresh_group_occupancy
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal (secondes) entre deux mises à jour de l'avancement en base
+PROGRESS_UPDATE_INTERVAL = 1.0
+
+# Statistiques comptées comme échantillons écrits pour le calcul du débit
+SAMPLE_COUNTERS = ('text_logs', 'curve_measurements', 'can_messages')
+
+
+def enqueue_import(mdf_file, log_group=None, dbc_file=None, **options):
+    """
+    Crée une tâche d'importation en attente
+
+    Args:
+        mdf_file: Instance de MDFFile dont le fichier doit être importé
+        log_group: Groupe de logs auquel associer les logs générés
+        dbc_file: Fichier DBC optionnel pour décoder les messages CAN
+        **options: Options supplémentaires passées à MDFParser.process_file
+
+    Returns:
+        Instance d'ImportJob créée
+    """
+    job = ImportJob.objects.create(
+        mdf_file=mdf_file,
+        log_group=log_group,
+        dbc_file=dbc_file,
+        options=json.dumps(options) if options else None,
+    )
+    logger.info(f"Tâche d'importation {job.id} créée pour le fichier MDF {mdf_file.name}")
+    return job
+
+
+def claim_next_job():
+    """
+    Réclame la plus ancienne tâche en attente
+
+    Le passage à RUNNING est conditionné au statut PENDING, si bien que deux
+    processus de travail ne peuvent pas exécuter la même tâche.
+
+    Returns:
+        Instance d'ImportJob réclamée ou None si la file est vide
+    """
+    while True:
+        job = ImportJob.objects.filter(status='PENDING').order_by('created_at', 'id').first()
+        if job is None:
+            return None
+
+        claimed = ImportJob.objects.filter(pk=job.pk, status='PENDING').update(
+            status='RUNNING',
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+class JobProgress:
+    """Enregistre l'avancement d'une tâche, appelé par process_file après chaque canal"""
+
+    def __init__(self, job, interval=PROGRESS_UPDATE_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.processed_channels = 0
+        self._last_update = 0.0
+
+    def __call__(self, channel_name, statistics):
+        self.processed_channels += 1
+
+        now = time.monotonic()
+        is_last = self.processed_channels >= statistics.get('total_channels', 0)
+        if now - self._last_update < self.interval and not is_last:
+            return
+        self._last_update = now
+
+        ImportJob.objects.filter(pk=self.job.pk).update(
+            total_channels=statistics.get('total_channels', 0),
+            processed_channels=self.processed_channels,
+            current_channel=channel_name[:255],
+            samples_written=sum(statistics.get(key, 0) for key in SAMPLE_COUNTERS),
+        )
+
+
+def run_import_job(job):
+    """
+    Exécute une tâche d'importation réclamée
+
+    Args:
+        job: Instance d'ImportJob au statut RUNNING
+
+    Returns:
+        True si l'importation a réussi
+    """
+    mdf_file = job.mdf_file
+    parser = MDFParser(mdf_file.file.path, mdf_file)
+    logger.info(f"Démarrage de la tâche d'importation {job.id} ({mdf_file.name})")
+
+    try:
+        statistics = parser.process_file(
+            dbc_file=job.dbc_file,
+            log_group=job.log_group,
+            progress_callback=JobProgress(job),
+            **job.get_options_as_dict()
+        )
+        if 'error' in statistics:
+            raise ValueError(statistics['error'])
+
+        job.refresh_from_db()
+        job.status = 'SUCCESS'
+        job.total_channels = statistics.get('total_channels', 0)
+        job.processed_channels = job.total_channels
+        job.current_channel = None
+        job.samples_written = sum(statistics.get(key, 0) for key in SAMPLE_COUNTERS)
+        job.set_statistics_from_dict(statistics)
+        job.finished_at = timezone.now()
+        job.save()
+
+        logger.info(f"Tâche d'importation {job.id} terminée: {statistics}")
+
+        # Ajouter les nouveaux scans laser à la carte d'occupation du groupe
+        if statistics.get('laser_logs'):
+            refresh_group_occupancy(job.log_group)
+        return True
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la tâche d'importation {job.id}: {e}", exc_info=True)
+
+        job.refresh_from_db()
+        job.status = 'FAILED'
+        job.error = f"{e}\n\n{traceback.format_exc()}"
+        job.finished_at = timezone.now()
+        job.save()
+        return False
+
+    finally:
+        parser.close()
+
+
+def fail_stale_jobs():
+    """
+    Marque en échec les tâches restées RUNNING après l'arrêt d'un processus de travail
+
+    Ces tâches ne sont pas relancées : les canaux déjà écrits seraient importés une
+    seconde fois. À n'appeler qu'au démarrage d'un processus de travail unique.
+
+    Returns:
+        Nombre de tâches marquées en échec
+    """
+    return ImportJob.objects.filter(status='RUNNING').update(
+        status='FAILED',
+        error="Tâche interrompue : le processus d'importation s'est arrêté avant la fin.",
+        finished_at=timezone.now(),
+    )
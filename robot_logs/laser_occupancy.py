@@ -0,0 +1,314 @@
+"""
+Module contenant la carte d'occupation laser cumulée d'un groupe de logs.
+
+Tous les points mesurés par les scans laser d'un groupe (Laser2DScan et
+LaserScanSeries) sont comptés dans une grille carrée centrée sur le capteur, par
+lots et en une seule opération NumPy (np.bincount) par lot. Le nombre d'impacts
+par cellule est enregistré dans un .npy, accompagné de son rendu PNG affiché
+directement par les pages. La carte est mise à jour de façon incrémentale : seuls
+les scans arrivés depuis le dernier calcul sont ajoutés, sauf si le contenu déjà
+cumulé du groupe a changé (logs retirés ou déplacés), auquel cas elle est recalculée.
+Après une modification des logs d'un groupe depuis les pages, la carte est seulement
+signalée à recalculer ; le processus d'importation s'en charge entre deux tâches.
+"""
+import io
+import math
+import logging
+
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Sum
+
+from .models import LogGroup, Laser2DScan, LaserScanSeries, LaserOccupancyGrid
+from .laser_render import compute_scan_points
+
+logger = logging.getLogger(__name__)
+
+# Taille des cellules (mètres) et demi-côté de la grille si LASER_OCCUPANCY_CELL_SIZE
+# et LASER_OCCUPANCY_RANGE ne sont pas définis ; les points plus lointains sont ignorés
+DEFAULT_OCCUPANCY_CELL_SIZE = 0.05
+DEFAULT_OCCUPANCY_RANGE = 20.0
+
+# Scans Laser2DScan lus par requête et scans d'un LaserScanSeries comptés ensemble
+OCCUPANCY_SCANS_BATCH = 500
+OCCUPANCY_SERIES_CHUNK = 1024
+
+# Palette du rendu PNG : position (fraction du logarithme du maximum) -> RGBA ;
+# les cellules sans impact sont transparentes
+OCCUPANCY_PALETTE = (
+    (0.0, (255, 255, 178, 90)),
+    (0.35, (254, 204, 92, 170)),
+    (0.6, (253, 141, 60, 220)),
+    (0.8, (240, 59, 32, 255)),
+    (1.0, (128, 0, 38, 255)),
+)
+
+
+def get_occupancy_settings():
+    """Retourne la taille des cellules et le demi-côté de la grille (mètres)"""
+    cell_size = float(getattr(settings, 'LASER_OCCUPANCY_CELL_SIZE', DEFAULT_OCCUPANCY_CELL_SIZE))
+    half_size = float(getattr(settings, 'LASER_OCCUPANCY_RANGE', DEFAULT_OCCUPANCY_RANGE))
+    return cell_size, half_size
+
+
+def bin_points(counts, x, y, half_size, cell_size):
+    """
+    Ajoute des points à la grille
+
+    Args:
+        counts: Grille carrée (ligne 0 en haut, y maximal), modifiée sur place
+        x, y: Coordonnées des points (mètres, NaN ignorés)
+        half_size: Demi-côté de la grille (mètres)
+        cell_size: Taille d'une cellule (mètres)
+
+    Returns:
+        Nombre de points comptés (situés dans la grille)
+    """
+    cells_count = counts.shape[0]
+    valid = np.isfinite(x) & np.isfinite(y)
+    columns = np.floor((x[valid] + half_size) / cell_size).astype(np.int64)
+    rows = np.floor((half_size - y[valid]) / cell_size).astype(np.int64)
+    inside = (columns >= 0) & (columns < cells_count) & (rows >= 0) & (rows < cells_count)
+    if not inside.any():
+        return 0
+
+    flat = rows[inside] * cells_count + columns[inside]
+    counts += np.bincount(flat, minlength=cells_count * cells_count).reshape(counts.shape).astype(counts.dtype)
+    return int(inside.sum())
+
+
+def _accumulate_scans(counts, scans, half_size, cell_size):
+    """
+    Ajoute à la grille les points de scans Laser2DScan
+
+    Returns:
+        Tuple (points comptés, scans lus, identifiant du dernier scan)
+    """
+    points_count = 0
+    scans_count = 0
+    last_scan_id = 0
+    x_batch, y_batch = [], []
+
+    def flush():
+        if x_batch:
+            count = bin_points(counts, np.concatenate(x_batch), np.concatenate(y_batch), half_size, cell_size)
+            x_batch.clear()
+            y_batch.clear()
+            return count
+        return 0
+
+    scans = scans.only('id', 'angle_min', 'angle_increment', 'range_blob', 'range_encoding', 'range_data')
+    for scan in scans.order_by('id').iterator(chunk_size=OCCUPANCY_SCANS_BATCH):
+        points = compute_scan_points(scan.get_range_array(), scan.angle_min, scan.angle_increment)
+        valid = points['ranges'] > 0
+        x_batch.append(points['x'][valid])
+        y_batch.append(points['y'][valid])
+        scans_count += 1
+        last_scan_id = scan.id
+        if len(x_batch) >= OCCUPANCY_SCANS_BATCH:
+            points_count += flush()
+    points_count += flush()
+    return points_count, scans_count, last_scan_id
+
+
+def _accumulate_series(counts, series, half_size, cell_size):
+    """
+    Ajoute à la grille les points de tous les scans d'un LaserScanSeries, par blocs de scans
+
+    Returns:
+        Nombre de points comptés
+    """
+    _, ranges = series.get_arrays()
+    angles = series.angle_min + np.arange(series.beams_count) * series.angle_increment
+    cosines = np.cos(angles).astype(np.float32)
+    sines = np.sin(angles).astype(np.float32)
+
+    points_count = 0
+    for start in range(0, len(ranges), OCCUPANCY_SERIES_CHUNK):
+        chunk = np.asarray(ranges[start:start + OCCUPANCY_SERIES_CHUNK], dtype=np.float32)
+        chunk = np.where(chunk > 0, chunk, np.nan)
+        points_count += bin_points(counts, (chunk * cosines).ravel(), (chunk * sines).ravel(), half_size, cell_size)
+    return points_count
+
+
+def render_occupancy_png(counts):
+    """
+    Convertit la grille en image PNG (RGBA)
+
+    L'intensité suit le logarithme du nombre d'impacts, pour que les obstacles vus
+    rarement restent visibles à côté de ceux vus à chaque scan.
+
+    Returns:
+        Contenu PNG (bytes)
+    """
+    max_count = int(counts.max()) if counts.size else 0
+    levels = np.log1p(counts, dtype=np.float32) / np.float32(np.log1p(max(max_count, 1)))
+
+    positions = [position for position, _ in OCCUPANCY_PALETTE]
+    pixels = np.empty((*counts.shape, 4), dtype=np.uint8)
+    for channel in range(4):
+        pixels[..., channel] = np.interp(levels, positions, [color[channel] for _, color in OCCUPANCY_PALETTE])
+    pixels[counts == 0] = 0
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, 'RGBA').save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def update_group_occupancy(group, rebuild=False):
+    """
+    Calcule ou met à jour la carte d'occupation laser d'un groupe
+
+    Args:
+        group: Instance de LogGroup
+        rebuild: Recalculer toute la carte au lieu d'ajouter les seuls nouveaux scans
+
+    Returns:
+        Instance de LaserOccupancyGrid, ou None si le groupe ne contient aucun scan laser
+    """
+    # La carte est recalculée à partir du contenu actuel du groupe
+    LogGroup.objects.filter(pk=group.pk, laser_occupancy_stale=True).update(laser_occupancy_stale=False)
+
+    cell_size, half_size = get_occupancy_settings()
+    scans = Laser2DScan.objects.filter(log__group=group)
+    series_ids = set(LaserScanSeries.objects.filter(log__group=group).values_list('id', flat=True))
+    grid = LaserOccupancyGrid.objects.filter(group=group).first()
+
+    if not series_ids and not scans.exists():
+        # Plus aucun scan laser dans le groupe (logs retirés ou déplacés)
+        if grid is not None:
+            grid.counts_file.delete(save=False)
+            grid.image_file.delete(save=False)
+            grid.delete()
+        return None
+
+    if grid is not None and not rebuild:
+        # Les scans déjà cumulés doivent toujours appartenir au groupe, avec la même grille
+        cumulated_scans = scans.filter(id__lte=grid.last_scan_id).count()
+        cumulated_scans += LaserScanSeries.objects.filter(
+            id__in=grid.get_series_ids()
+        ).aggregate(total=Sum('scans_count'))['total'] or 0
+        rebuild = (
+            grid.cell_size != cell_size
+            or grid.half_size != half_size
+            or cumulated_scans != grid.scans_count
+            or not grid.get_series_ids() <= series_ids
+        )
+
+    if grid is not None and not rebuild:
+        new_scans = scans.filter(id__gt=grid.last_scan_id)
+        new_series_ids = series_ids - grid.get_series_ids()
+        if not new_series_ids and not new_scans.exists():
+            return grid
+        counts = grid.get_counts()
+    else:
+        grid = grid or LaserOccupancyGrid(group=group)
+        grid.cell_size = cell_size
+        grid.half_size = half_size
+        grid.cells_count = math.ceil(2 * half_size / cell_size)
+        grid.points_count = 0
+        grid.scans_count = 0
+        grid.last_scan_id = 0
+        grid.set_series_ids(())
+        new_scans = scans
+        new_series_ids = series_ids
+        counts = np.zeros((grid.cells_count, grid.cells_count), dtype=np.uint32)
+
+    points_count, scans_count, last_scan_id = _accumulate_scans(counts, new_scans, half_size, cell_size)
+    for series in LaserScanSeries.objects.filter(id__in=new_series_ids):
+        points_count += _accumulate_series(counts, series, half_size, cell_size)
+        scans_count += series.scans_count
+
+    grid.points_count += points_count
+    grid.scans_count += scans_count
+    grid.last_scan_id = max(last_scan_id, grid.last_scan_id)
+    grid.set_series_ids(grid.get_series_ids() | new_series_ids)
+    grid.max_count = int(counts.max())
+
+    # Les anciens fichiers sont remplacés
+    if grid.counts_file:
+        grid.counts_file.delete(save=False)
+    if grid.image_file:
+        grid.image_file.delete(save=False)
+    npy_buffer = io.BytesIO()
+    np.save(npy_buffer, counts)
+    grid.counts_file.save(f"{group.id}_counts.npy", ContentFile(npy_buffer.getvalue()), save=False)
+    grid.image_file.save(f"{group.id}_occupancy.png", ContentFile(render_occupancy_png(counts)), save=False)
+    grid.save()
+
+    logger.info(
+        f"Carte d'occupation laser du groupe {group.id} mise à jour : "
+        f"{points_count} points ajoutés ({scans_count} scans)"
+    )
+    return grid
+
+
+def refresh_group_occupancy(group):
+    """
+    Met à jour la carte d'occupation d'un groupe sans propager les erreurs
+
+    Appelé après une importation : un échec n'invalide pas les données importées.
+    """
+    if group is None:
+        return None
+    try:
+        return update_group_occupancy(group)
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour de la carte d'occupation du groupe {group.id}: {e}", exc_info=True)
+        return None
+
+
+def mark_occupancy_stale(groups):
+    """
+    Signale que la carte d'occupation de groupes doit être recalculée
+
+    Appelé après une modification des logs d'un groupe : le calcul, qui peut reprendre
+    tous les scans du groupe, est laissé au processus d'arrière-plan (voir
+    refresh_stale_occupancy).
+    """
+    group_ids = [group.id for group in groups if group is not None]
+    LogGroup.objects.filter(id__in=group_ids).update(laser_occupancy_stale=True)
+
+
+def claim_stale_group():
+    """
+    Réclame un groupe dont la carte d'occupation est à recalculer
+
+    Le signal n'est retiré que s'il est toujours présent, si bien que deux processus
+    de travail ne peuvent pas traiter le même groupe.
+
+    Returns:
+        Instance de LogGroup réclamée ou None si aucune carte n'est à recalculer
+    """
+    while True:
+        group = LogGroup.objects.filter(laser_occupancy_stale=True).order_by('id').first()
+        if group is None:
+            return None
+
+        claimed = LogGroup.objects.filter(pk=group.pk, laser_occupancy_stale=True).update(
+            laser_occupancy_stale=False
+        )
+        if claimed:
+            return group
+
+
+def refresh_stale_occupancy(limit=None):
+    """
+    Recalcule les cartes d'occupation signalées par mark_occupancy_stale
+
+    Args:
+        limit: Nombre maximal de groupes traités (tous par défaut)
+
+    Returns:
+        Nombre de groupes traités
+    """
+    count = 0
+    while limit is None or count < limit:
+        group = claim_stale_group()
+        if group is None:
+            break
+        refresh_group_occupancy(group)
+        count += 1
+    return count
@@ -0,0 +1,125 @@
+"""
+Module contenant la préparation des scans laser 2D pour l'affichage.
+
+Les distances d'un scan sont converties en coordonnées cartésiennes en une seule
+passe NumPy. Le résultat (float32) est mis en cache par scan : un scan n'est jamais
+modifié après l'importation, seul le premier affichage paie la lecture et la
+conversion. Les scans très denses peuvent être réduits en conservant, pour chaque
+secteur angulaire, le point le plus proche du capteur (les obstacles restent visibles).
+"""
+import logging
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Durée de conservation des points convertis d'un scan (secondes)
+LASER_CACHE_TIMEOUT = 24 * 3600
+
+
+def compute_scan_points(ranges, angle_min, angle_increment):
+    """
+    Convertit les distances d'un scan en coordonnées cartésiennes
+
+    Args:
+        ranges: Distances mesurées (une par angle)
+        angle_min: Angle de la première mesure (radians)
+        angle_increment: Écart angulaire entre deux mesures (radians)
+
+    Returns:
+        Dictionnaire avec les tableaux float32 'ranges', 'x' et 'y'
+    """
+    ranges = np.asarray(ranges, dtype=np.float32)
+    angles = angle_min + np.arange(len(ranges), dtype=np.float64) * angle_increment
+    return {
+        'ranges': ranges,
+        'x': (ranges * np.cos(angles)).astype(np.float32),
+        'y': (ranges * np.sin(angles)).astype(np.float32),
+    }
+
+
+def get_scan_points(scan):
+    """
+    Retourne les coordonnées cartésiennes d'un scan, depuis le cache si possible
+
+    Args:
+        scan: Instance de Laser2DScan
+
+    Returns:
+        Dictionnaire de compute_scan_points
+    """
+    cache_key = f"laser_points:{scan.id}"
+    points = cache.get(cache_key)
+    if points is not None:
+        return points
+
+    points = compute_scan_points(scan.get_range_array(), scan.angle_min, scan.angle_increment)
+    cache.set(cache_key, points, LASER_CACHE_TIMEOUT)
+    return points
+
+
+def decimate_scan_points(points, max_points):
+    """
+    Réduit un scan à au plus max_points points
+
+    Le scan est découpé en secteurs angulaires consécutifs ; chaque secteur est
+    représenté par sa mesure valide la plus proche.
+
+    Args:
+        points: Dictionnaire de compute_scan_points
+        max_points: Nombre maximal de points conservés (None ou 0 pour tout conserver)
+
+    Returns:
+        Dictionnaire de même forme que points
+    """
+    points_count = len(points['ranges'])
+    if not max_points or points_count <= max_points:
+        return points
+
+    sector_size = -(-points_count // max_points)
+    sectors_count = -(-points_count // sector_size)
+
+    padded = np.full(sectors_count * sector_size, np.inf, dtype=np.float32)
+    padded[:points_count] = points['ranges']
+    padded[~np.isfinite(padded) | (padded <= 0)] = np.inf
+    sectors = padded.reshape(sectors_count, sector_size)
+
+    # Premier point de chaque secteur si aucune mesure n'y est valide
+    selected = np.arange(sectors_count) * sector_size + sectors.argmin(axis=1)
+    return {name: values[selected] for name, values in points.items()}
+
+
+def decimate_scan_ranges(ranges, angles, max_points):
+    """
+    Réduit une suite de scans à au plus max_points points par scan
+
+    Variante de decimate_scan_points pour plusieurs scans de même géométrie : chaque
+    secteur angulaire est représenté par sa mesure valide la plus proche, placée à
+    l'angle du centre du secteur (commun à tous les scans). Un secteur sans mesure
+    valide donne NaN.
+
+    Args:
+        ranges: Distances de forme (scans, points)
+        angles: Angle de chaque point (radians)
+        max_points: Nombre maximal de points conservés par scan (None ou 0 pour tout conserver)
+
+    Returns:
+        Tuple (distances de forme (scans, secteurs), angles des secteurs)
+    """
+    scans_count, points_count = ranges.shape
+    if not max_points or points_count <= max_points:
+        return ranges, angles
+
+    sector_size = -(-points_count // max_points)
+    sectors_count = -(-points_count // sector_size)
+
+    padded = np.full((scans_count, sectors_count * sector_size), np.inf, dtype=np.float32)
+    padded[:, :points_count] = ranges
+    padded[~np.isfinite(padded) | (padded <= 0)] = np.inf
+    nearest = padded.reshape(scans_count, sectors_count, sector_size).min(axis=2)
+    nearest[np.isinf(nearest)] = np.nan
+
+    first_angles = angles[::sector_size]
+    last_angles = angles[np.minimum(np.arange(sectors_count) * sector_size + sector_size - 1, points_count - 1)]
+    return nearest, ((first_angles + last_angles) / 2).astype(np.float32)
@@ -0,0 +1,126 @@
+"""
+Module contenant le stockage des canaux laser multi-scans.
+
+Un canal laser MDF à deux dimensions contient un scan complet par timestamp. Tous
+les scans d'un canal sont enregistrés dans un seul tableau .npy float32 de forme
+(scans, points), accompagné de l'index des scans (timestamps int64 en nanosecondes
+epoch UTC), et rattachés au RobotLog par un LaserScanSeries. La lecture d'une
+suite de scans consécutifs, utilisée par la relecture animée, n'est alors qu'une
+tranche du tableau projeté en mémoire.
+"""
+import logging
+
+import numpy as np
+from django.core.files import File
+
+from .models import LaserScanSeries
+from .curve_storage import SeriesBuffer
+from .laser_render import decimate_scan_ranges
+
+logger = logging.getLogger(__name__)
+
+# Nombre de scans renvoyés par défaut et au plus par get_laser_frames
+DEFAULT_LASER_FRAMES = 50
+MAX_LASER_FRAMES = 500
+
+
+class LaserSeriesBuffer(SeriesBuffer):
+    """
+    Accumule les scans d'un canal laser avant leur enregistrement en LaserScanSeries
+
+    Comme pour SeriesBuffer, les fenêtres successives (import en flux) sont écrites
+    dans des fichiers temporaires.
+    """
+
+    def __init__(self, sensor_name, beams_count, angle_min, angle_max, angle_increment):
+        super().__init__(sensor_name, np.float32)
+        self.beams_count = int(beams_count)
+        self.angle_min = angle_min
+        self.angle_max = angle_max
+        self.angle_increment = angle_increment
+
+    def append(self, timestamps_ns, ranges):
+        """
+        Ajoute une fenêtre de scans
+
+        Args:
+            timestamps_ns: Tableau int64 de nanosecondes epoch, un par scan
+            ranges: Distances de forme (scans, beams_count)
+
+        Raises:
+            ValueError: Si le nombre de points des scans ne correspond pas au canal
+        """
+        ranges = np.asarray(ranges)
+        if ranges.ndim != 2 or ranges.shape[1] != self.beams_count:
+            raise ValueError(
+                f"Scans de forme {ranges.shape} incompatibles avec {self.beams_count} points par scan"
+            )
+        super().append(timestamps_ns, ranges)
+
+    def save(self, log):
+        """
+        Enregistre les scans et les rattache à un log principal déjà sauvegardé
+
+        Returns:
+            Instance de LaserScanSeries créée
+        """
+        series = LaserScanSeries(
+            log=log,
+            sensor_name=self.sensor_name,
+            scans_count=self.samples_count,
+            beams_count=self.beams_count,
+            angle_min=self.angle_min,
+            angle_max=self.angle_max,
+            angle_increment=self.angle_increment,
+            start_ns=self.start_ns,
+            end_ns=self.end_ns,
+            max_range=self.max_value,
+        )
+        try:
+            with self._to_npy(self._timestamps_file, np.dtype(np.int64)) as npy_file:
+                series.timestamps_file.save(f"{log.id}_timestamps.npy", File(npy_file), save=False)
+            shape = (self.samples_count, self.beams_count)
+            with self._to_npy(self._values_file, self.value_dtype, shape) as npy_file:
+                series.ranges_file.save(f"{log.id}_ranges.npy", File(npy_file), save=False)
+            series.save()
+        finally:
+            self.close()
+        return series
+
+
+def get_laser_frames(series, start=0, count=DEFAULT_LASER_FRAMES, step=1, max_points=None):
+    """
+    Lit une suite de scans consécutifs d'un LaserScanSeries, dans l'ordre chronologique
+
+    Args:
+        series: Instance de LaserScanSeries
+        start: Position du premier scan
+        count: Nombre de scans (borné par MAX_LASER_FRAMES)
+        step: Écart entre deux scans lus (1 pour tous les scans)
+        max_points: Nombre maximal de points par scan (None pour tout conserver)
+
+    Returns:
+        Dictionnaire avec 'timestamps_ns' (int64, un par scan), 'angles' (float32, un par
+        point, communs à tous les scans), 'ranges' (float32 de forme (scans, points)),
+        'start', 'step' et 'next' (position du scan suivant, None en fin d'enregistrement)
+    """
+    timestamps, ranges = series.get_arrays()
+    scans_count = len(timestamps)
+    start = min(max(int(start), 0), scans_count)
+    step = max(int(step), 1)
+    count = min(max(int(count), 1), MAX_LASER_FRAMES)
+    stop = min(start + count * step, scans_count)
+
+    frame_ranges = np.asarray(ranges[start:stop:step], dtype=np.float32)
+    angles = (series.angle_min + np.arange(series.beams_count) * series.angle_increment).astype(np.float32)
+    frame_ranges, angles = decimate_scan_ranges(frame_ranges, angles, max_points)
+
+    next_index = start + len(frame_ranges) * step
+    return {
+        'timestamps_ns': np.asarray(timestamps[start:stop:step]),
+        'angles': angles,
+        'ranges': frame_ranges,
+        'start': start,
+        'step': step,
+        'next': next_index if next_index < scans_count else None,
+    }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from robot_logs.models import CurveSeries
+from robot_logs.curve_storage import save_curve_lod
+import os
+
+
+class Command(BaseCommand):
+    help = "Construit la pyramide de niveaux de détail des courbes enregistrées en colonnes binaires"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Reconstruire aussi les pyramides existantes')
+
+    def handle(self, *args, **options):
+        series_list = CurveSeries.objects.all()
+        if not options.get('all'):
+            series_list = series_list.filter(Q(lod_file='') | Q(lod_file__isnull=True))
+
+        built = 0
+        for series in series_list.iterator():
+            if not series.values_file or not os.path.exists(series.values_file.path):
+                self.stdout.write(self.style.WARNING(f"Fichier de valeurs introuvable pour la série {series.id}"))
+                continue
+
+            save_curve_lod(series)
+            built += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{built} série(s) mise(s) à jour'))
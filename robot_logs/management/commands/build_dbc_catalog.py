@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from robot_logs.models import DBCFile
+from robot_logs.dbc_catalog import build_dbc_catalog
+
+
+class Command(BaseCommand):
+    help = "Établit le catalogue des messages et signaux des fichiers DBC"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dbc', type=int, action='append',
+                            help='Identifiant du fichier DBC à traiter (répétable, tous par défaut)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recréer les catalogues déjà établis')
+
+    def handle(self, *args, **options):
+        dbc_files = DBCFile.objects.all()
+        if options.get('dbc'):
+            dbc_files = dbc_files.filter(id__in=options['dbc'])
+
+        built = 0
+        for dbc_file in dbc_files.iterator():
+            try:
+                messages_count = build_dbc_catalog(dbc_file, rebuild=options.get('rebuild', False))
+                self.stdout.write(f'{dbc_file.name}: {messages_count} message(s)')
+                built += 1
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'{dbc_file.name}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'{built} catalogue(s) à jour'))
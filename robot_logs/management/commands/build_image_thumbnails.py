@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from robot_logs.models import ImageData
+from robot_logs.image_variants import IMAGE_THUMBNAIL_SIZES, generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures manquantes des images importées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Nombre d'images traitées ensemble")
+        parser.add_argument('--size', choices=list(IMAGE_THUMBNAIL_SIZES), action='append',
+                            help='Taille à générer (répétable, toutes par défaut)')
+
+    def handle(self, *args, **options):
+        batch_size = options.get('batch_size', 200)
+        sizes = options.get('size') or list(IMAGE_THUMBNAIL_SIZES)
+
+        created = 0
+        last_id = 0
+        while True:
+            # Parcours par clé primaire croissante, un lot d'images à la fois
+            images = list(ImageData.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not images:
+                break
+            last_id = images[-1].id
+            created += generate_thumbnails(images, sizes=sizes)
+            self.stdout.write(f'{created} miniature(s) créée(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'{created} miniature(s) créée(s)'))
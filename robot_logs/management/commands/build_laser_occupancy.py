@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from robot_logs.models import LogGroup
+from robot_logs.laser_occupancy import update_group_occupancy
+
+
+class Command(BaseCommand):
+    help = "Calcule ou met à jour la carte d'occupation laser des groupes de logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append',
+                            help='Identifiant du groupe à traiter (répétable, tous les groupes par défaut)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recalculer entièrement les cartes existantes')
+
+    def handle(self, *args, **options):
+        # Les groupes signalés sont traités même s'ils n'ont plus de scan (leur carte est supprimée)
+        groups = LogGroup.objects.filter(
+            Q(logs__laser_scans__isnull=False) | Q(logs__laser_series__isnull=False)
+            | Q(laser_occupancy_stale=True)
+        ).distinct()
+        if options.get('group'):
+            groups = groups.filter(id__in=options['group'])
+
+        updated = 0
+        for group in groups.iterator():
+            grid = update_group_occupancy(group, rebuild=options.get('rebuild', False))
+            if grid is not None:
+                self.stdout.write(f'{group.name}: {grid.scans_count} scan(s), {grid.points_count} point(s)')
+                updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} carte(s) à jour'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from robot_logs.models import Laser2DScan
+
+
+class Command(BaseCommand):
+    help = "Convertit les distances des scans laser du JSON vers le stockage binaire float32, par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Nombre de scans convertis par transaction')
+        parser.add_argument('--compression', choices=['none', 'zlib', 'lzma'], default='zlib',
+                            help='Compression des distances converties')
+
+    def handle(self, *args, **options):
+        batch_size = options.get('batch_size', 500)
+        compression = options.get('compression', 'zlib')
+        compression = None if compression == 'none' else compression
+
+        pending = Laser2DScan.objects.filter(range_blob__isnull=True).exclude(range_data='')
+        total = pending.count()
+        self.stdout.write(f'{total} scan(s) à convertir')
+
+        converted = 0
+        json_bytes = 0
+        binary_bytes = 0
+        last_id = 0
+        while True:
+            # Parcours par clé primaire croissante : chaque lot ne lit que ses propres lignes
+            scans = list(pending.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not scans:
+                break
+            last_id = scans[-1].id
+
+            for scan in scans:
+                json_bytes += len(scan.range_data)
+                scan.set_range_array(scan.get_range_array(), compression=compression)
+                binary_bytes += len(scan.range_blob)
+
+            with transaction.atomic():
+                Laser2DScan.objects.bulk_update(
+                    scans, ['range_blob', 'range_encoding', 'range_count', 'range_data']
+                )
+
+            converted += len(scans)
+            self.stdout.write(f'{converted}/{total} scan(s) convertis')
+
+        if converted:
+            self.stdout.write(self.style.SUCCESS(
+                f'{converted} scan(s) convertis : {json_bytes / 1e6:.1f} Mo de JSON '
+                f'remplacés par {binary_bytes / 1e6:.1f} Mo'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Aucun scan à convertir'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from robot_logs.models import MDFFile
+from robot_logs.mdf_dedup import file_sha256
+import os
+
+
+class Command(BaseCommand):
+    help = "Calcule l'empreinte SHA-256 des fichiers MDF importés avant la détection des doublons"
+
+    def handle(self, *args, **options):
+        hashed = 0
+        for mdf_file in MDFFile.objects.filter(sha256__isnull=True).iterator():
+            if not mdf_file.file or not os.path.exists(mdf_file.file.path):
+                self.stdout.write(self.style.WARNING(f"Fichier introuvable pour '{mdf_file.name}' (ID: {mdf_file.id})"))
+                continue
+
+            mdf_file.sha256 = file_sha256(mdf_file.file.path)
+            mdf_file.file_size = os.path.getsize(mdf_file.file.path)
+            mdf_file.save(update_fields=['sha256', 'file_size'])
+            hashed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{hashed} fichier(s) MDF mis à jour'))
@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files import File
+from robot_logs.models import MDFFile, LogGroup, DBCFile, RobotLog
+from robot_logs.mdf_parser import MDFParser
+from robot_logs.mdf_dedup import file_sha256, find_duplicate, relink_duplicate
+from robot_logs.laser_occupancy import refresh_group_occupancy
+import os
+
+
+class Command(BaseCommand):
+    help = 'Importe un fichier MDF depuis la ligne de commande'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Chemin vers le fichier MDF à importer')
+        parser.add_argument('--name', help='Nom du fichier MDF (nom du fichier par défaut)')
+        parser.add_argument('--dbc', type=int, help='ID du fichier DBC à utiliser pour décoder les messages CAN')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Nombre de processus de lecture des canaux (0 = un par cœur)')
+        parser.add_argument('--read-mode', choices=['group', 'channel'], default=None,
+                            help='Lecture par groupe de données ou canal par canal')
+        parser.add_argument('--stream', action='store_true', default=None,
+                            help='Importer les canaux volumineux fenêtre par fenêtre')
+        parser.add_argument('--stream-window', type=int, default=None,
+                            help="Nombre d'échantillons par fenêtre d'import en flux")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Nombre d'objets par requête INSERT")
+        parser.add_argument('--channel', action='append', dest='channels', default=None,
+                            help='Canal à importer (nom ou motif, option répétable) ; tous par défaut')
+        parser.add_argument('--kind', action='append', default=[], metavar='CANAL=TYPE',
+                            help='Type de traitement imposé à un canal (TEXT, CURVE, LASER2D, IMAGE, CAN)')
+        parser.add_argument('--force', action='store_true',
+                            help='Importer le fichier même si un fichier identique a déjà été importé')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"Le fichier {path} n'existe pas.")
+
+        dbc_file = None
+        if options.get('dbc'):
+            try:
+                dbc_file = DBCFile.objects.get(pk=options['dbc'])
+            except DBCFile.DoesNotExist:
+                raise CommandError(f"Fichier DBC {options['dbc']} introuvable.")
+
+        kind_overrides = {}
+        kinds = [kind for kind, label in RobotLog.LOG_TYPES]
+        for override in options.get('kind') or []:
+            channel_name, _, kind = override.rpartition('=')
+            if not channel_name or kind not in kinds:
+                raise CommandError(f"Type imposé invalide: {override} (attendu CANAL=TYPE, TYPE parmi {', '.join(kinds)})")
+            kind_overrides[channel_name] = kind
+
+        name = options.get('name') or os.path.basename(path)
+
+        sha256 = file_sha256(path)
+        duplicate = find_duplicate(sha256)
+        if duplicate and not options.get('force'):
+            mdf_file = relink_duplicate(duplicate, name)
+            self.stdout.write(self.style.WARNING(
+                f"Fichier identique à '{duplicate.name}' (ID: {duplicate.id}) : "
+                f"rattaché aux données existantes sans réimportation (--force pour réimporter)"
+            ))
+            if mdf_file.log_group:
+                self.stdout.write(f"Groupe '{mdf_file.log_group.name}' (ID: {mdf_file.log_group.id})")
+            return
+
+        mdf_file = MDFFile(name=name, sha256=sha256, file_size=os.path.getsize(path))
+        with open(path, 'rb') as f:
+            mdf_file.file.save(os.path.basename(path), File(f), save=True)
+
+        log_group = LogGroup.objects.create(
+            name=f"Import MDF: {name}",
+            description=f"Logs générés depuis le fichier MDF {name}",
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Importation de {path}...'))
+
+        parser = MDFParser(mdf_file.file.path, mdf_file)
+        try:
+            stats = parser.process_file(
+                dbc_file=dbc_file,
+                log_group=log_group,
+                batch_size=options.get('batch_size'),
+                workers=options.get('workers'),
+                read_mode=options.get('read_mode'),
+                streaming=options.get('stream'),
+                stream_window=options.get('stream_window'),
+                channels=options.get('channels'),
+                kind_overrides=kind_overrides,
+            )
+        finally:
+            parser.close()
+
+        if 'error' in stats:
+            raise CommandError(stats['error'])
+
+        # Ajouter les nouveaux scans laser à la carte d'occupation du groupe
+        if stats.get('laser_logs'):
+            refresh_group_occupancy(log_group)
+
+        for key, value in stats.items():
+            self.stdout.write(f'  - {key}: {value}')
+        self.stdout.write(self.style.SUCCESS(f"Groupe '{log_group.name}' créé (ID: {log_group.id})"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from robot_logs.import_jobs import claim_next_job, run_import_job, fail_stale_jobs
+from robot_logs.laser_occupancy import refresh_stale_occupancy
+import time
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches d'importation MDF en attente (file d'attente en base de données)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Traiter les tâches en attente puis s'arrêter")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Délai en secondes entre deux consultations de la file')
+        parser.add_argument('--fail-stale', action='store_true',
+                            help='Marquer en échec les tâches restées en cours (un seul processus de travail)')
+
+    def handle(self, *args, **options):
+        once = options.get('once', False)
+        interval = options.get('interval', 2.0)
+
+        if options.get('fail_stale'):
+            count = fail_stale_jobs()
+            if count:
+                self.stdout.write(self.style.WARNING(f'{count} tâche(s) interrompue(s) marquée(s) en échec'))
+
+        self.stdout.write(self.style.SUCCESS("Processus d'importation démarré"))
+
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    # Entre deux tâches : recalculer une carte d'occupation laser signalée
+                    if refresh_stale_occupancy(limit=1):
+                        continue
+                    if once:
+                        break
+                    time.sleep(interval)
+                    continue
+
+                self.stdout.write(f'Tâche {job.id}: importation de {job.mdf_file.name}...')
+                if run_import_job(job):
+                    self.stdout.write(self.style.SUCCESS(f'Tâche {job.id} terminée'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Tâche {job.id} en échec'))
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du processus d'importation")
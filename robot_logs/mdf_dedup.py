@@ -0,0 +1,121 @@
+"""
+Module contenant la détection des fichiers MDF déjà importés.
+
+L'empreinte SHA-256 d'un fichier est calculée pendant que le téléversement est
+reçu (Sha256UploadHandler), puis comparée aux empreintes enregistrées sur MDFFile
+avant toute lecture du fichier MDF. Un doublon peut être rattaché au groupe
+existant sans réimporter ses échantillons.
+"""
+import hashlib
+import logging
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .models import MDFFile
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier déjà sur disque
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class Sha256UploadHandler(FileUploadHandler):
+    """
+    Gestionnaire de téléversement calculant l'empreinte SHA-256 des fichiers reçus
+
+    Doit être placé en tête de FILE_UPLOAD_HANDLERS : il transmet chaque bloc aux
+    gestionnaires suivants, qui se chargent de stocker le fichier. Les empreintes sont
+    disponibles dans request.upload_sha256, indexées par nom de champ.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_sha256'):
+            self.request.upload_sha256 = {}
+        self.request.upload_sha256[self.field_name] = self.hasher.hexdigest()
+        return None
+
+
+def get_upload_sha256(request, field_name, uploaded_file):
+    """
+    Retourne l'empreinte SHA-256 d'un fichier téléversé
+
+    Utilise l'empreinte calculée pendant la réception si Sha256UploadHandler est
+    configuré, sinon relit le fichier reçu.
+    """
+    sha256 = getattr(request, 'upload_sha256', {}).get(field_name)
+    if sha256:
+        return sha256
+
+    hasher = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+    return hasher.hexdigest()
+
+
+def file_sha256(path):
+    """Calcule l'empreinte SHA-256 d'un fichier sur disque"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def find_duplicate(sha256):
+    """
+    Recherche un fichier MDF déjà importé ayant le même contenu
+
+    Seuls les fichiers traités comptent : un fichier dont l'aperçu a été abandonné
+    ou dont l'import a échoué peut être téléversé de nouveau.
+
+    Args:
+        sha256: Empreinte du fichier téléversé
+
+    Returns:
+        Le plus ancien MDFFile traité de même empreinte, ou None
+    """
+    if not sha256:
+        return None
+    return (
+        MDFFile.objects.filter(sha256=sha256, processed=True)
+        .select_related('log_group')
+        .order_by('uploaded_at')
+        .first()
+    )
+
+
+def relink_duplicate(existing, name):
+    """
+    Enregistre un doublon sans réimporter ses données
+
+    Le nouvel MDFFile partage le fichier stocké et le groupe de logs du fichier
+    existant : seules ses métadonnées sont créées.
+
+    Args:
+        existing: MDFFile déjà importé ayant le même contenu
+        name: Nom donné au nouveau fichier
+
+    Returns:
+        Instance de MDFFile créée
+    """
+    mdf_file = MDFFile.objects.create(
+        name=name,
+        file=existing.file.name,
+        mdf_version=existing.mdf_version,
+        processed=existing.processed,
+        dbc_file=existing.dbc_file,
+        log_group=existing.log_group,
+        sha256=existing.sha256,
+        file_size=existing.file_size,
+    )
+    logger.info(f"Fichier MDF {name} rattaché au fichier existant {existing.name} (ID: {existing.id})")
+    return mdf_file
@@ -3,6 +3,8 @@ Module contenant les fonctions de détection du type de canal MDF.
 """
 import logging
 
+from .can_parser import is_can_frame_samples
+
 logger = logging.getLogger(__name__)
 
 def _is_text_event(self, channel_name, signal):
@@ -23,6 +25,7 @@ def _is_curve_data(self, channel_name, signal):
     # Vérifie si c'est une série de valeurs numériques
     if (hasattr(signal, 'samples') and 
         signal.samples.dtype.kind in ['i', 'u', 'f'] and 
+        signal.samples.ndim == 1 and
         len(signal.samples) > 1):
         return True
         
@@ -64,3 +67,15 @@ def _is_can_data(self, channel_name, signal):
         return True
         
     return False
+
+def _is_can_frames(self, channel_name, signal):
+    """
+    Détermine si un canal contient des trames CAN dans un format reconnu
+
+    Une structure CAN_DataFrame est reconnue quel que soit le nom du canal ; des
+    enregistrements bruts de taille fixe ne le sont que si le nom du canal désigne
+    un bus CAN (ils ressemblent sinon à une image).
+    """
+    if not hasattr(signal, 'samples') or not is_can_frame_samples(signal.samples):
+        return False
+    return bool(signal.samples.dtype.names) or self._is_can_data(channel_name, signal)
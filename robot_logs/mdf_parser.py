@@ -16,8 +16,14 @@ import io
 from django.conf import settings
 from django.core.files.base import ContentFile
 
-from .models import RobotLog, CurveMeasurement, Laser2DScan, ImageData, MDFFile, CANMessage, CANSignal, LogGroup
-from .can_parser import DBCParser, extract_can_messages_from_mdf
+from .models import RobotLog, CurveMeasurement, Laser2DScan, ImageData, MDFFile, CANMessage, LogGroup
+from .can_parser import is_can_frame_field
+from .dbc_registry import get_dbc_parser
+from .mdf_persistence import ChannelWriter
+from .laser_storage import LaserSeriesBuffer
+from .mdf_plan import filter_channels, get_array_channels, is_array_element, unpack_array_samples
+from .mdf_timestamps import TimestampConverter
+from .mdf_workers import DecodedChannel, get_worker_count, iter_decoded_channels
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +42,16 @@ class MDFParser:
         self.mdf_file = mdf_file_obj
         self._mdf = None
         self._dbc_parser = None
+        self._dbc_file = None
         self._log_group = None
+        self._timestamps = None
+        self._kind_overrides = {}
         
     def open(self):
         """Ouvre le fichier MDF"""
         try:
             self._mdf = MDF(self.file_path)
+            self._timestamps = TimestampConverter.from_mdf(self._mdf)
             if self.mdf_file:
                 self.mdf_file.mdf_version = f"MDF {self._mdf.version}"
                 self.mdf_file.save()
@@ -60,7 +70,8 @@ class MDFParser:
         """Initialise le parseur DBC si un fichier est fourni"""
         try:
             if dbc_file and dbc_file.file:
-                self._dbc_parser = DBCParser(dbc_file.file.path)
+                self._dbc_parser = get_dbc_parser(dbc_file)
+                self._dbc_file = dbc_file
                 logger.info(f"Parseur DBC initialisé avec le fichier {dbc_file.name}")
                 return True
             return False
@@ -77,12 +88,20 @@ class MDFParser:
         # Filtrer les canaux dupliqués pour n'avoir que les noms uniques
         unique_channels = []
         seen_channels = set()
+        array_channels = get_array_channels(self._mdf)
         
         for channel_name in self._mdf.channels_db.keys():
             # Ignorer les canaux de temps pour éviter les erreurs
             if channel_name.lower() in ('time', 'timestamp'):
                 continue
             
+            # Les éléments d'un canal tableau sont importés avec le canal lui-même
+            if is_array_element(channel_name, array_channels):
+                continue
+            # De même, les champs d'un canal CAN_DataFrame sont importés avec les trames
+            if is_can_frame_field(channel_name):
+                continue
+            
             if channel_name not in seen_channels:
                 unique_channels.append(channel_name)
                 seen_channels.add(channel_name)
@@ -111,17 +130,16 @@ class MDFParser:
                 return None
                 
         try:
-            # Trouver la localisation correcte du canal
-            location = self._find_channel_location(channel_name)
-            if location:
-                group, index = location
-                signal = self._mdf.get(channel_name, group=group, index=index)
+            # Les informations proviennent des métadonnées du canal, sans lecture des échantillons
+            plan = self.plan_channel(channel_name)
+            if plan:
                 return {
                     'name': channel_name,
-                    'unit': signal.unit if hasattr(signal, 'unit') else '',
-                    'comment': signal.comment if hasattr(signal, 'comment') else '',
-                    'samples_count': len(signal.samples) if hasattr(signal, 'samples') else 0,
-                    'data_type': str(signal.samples.dtype) if hasattr(signal, 'samples') else '',
+                    'unit': plan.unit,
+                    'comment': plan.comment,
+                    'samples_count': plan.samples_count,
+                    'data_type': str(plan.dtype) if plan.resolved else '',
+                    'kind': plan.kind,
                 }
             else:
                 logger.error(f"Canal {channel_name} non trouvé dans le fichier MDF")
@@ -133,15 +151,225 @@ class MDFParser:
     # Fonctions de détection du type de canal
     from .mdf_detector import (
         _is_text_event, _is_curve_data, _is_laser_data, 
-        _is_image_data, _is_can_data
+        _is_image_data, _is_can_data, _is_can_frames
+    )
+    
+    # Fonctions de planification des canaux d'après leurs métadonnées
+    from .mdf_plan import (
+        _channel_sample_dtype, plan_channel, plan_channels, _load_first_timestamp
     )
     
     # Fonctions de traitement des différents types de canaux
     from .mdf_processors import (
         _process_text_event, _process_curve_data, _process_laser_data,
-        _process_image_data, _process_can_data
+        _process_image_data, _process_can_data, _build_curve_measurements,
+        _build_curve_series, _build_laser_series
     )
     
+    # Fonctions d'import en flux des canaux volumineux
+    from .mdf_streaming import (
+        _get_stream_window, _get_channel_stream_window, _should_stream, _iter_signal_windows,
+        _stream_channel
+    )
+    
+    def _error_log(self, message):
+        """Crée un log d'erreur d'import rattaché au groupe courant"""
+        return RobotLog(
+            timestamp=datetime.now(),
+            robot_id="MDF_Import",
+            level="ERROR",
+            message=message,
+            source=f"MDF Import: {self.mdf_file.name if self.mdf_file else 'Unknown'}",
+            log_type="TEXT",
+            group=self._log_group  # Assignation au groupe
+        )
+    
+    def load_signal(self, channel_name):
+        """
+        Lit les données d'un canal du fichier MDF
+        
+        Args:
+            channel_name: Nom du canal à lire
+            
+        Returns:
+            Signal asammdf ou None si le canal n'existe pas
+        """
+        location = self._find_channel_location(channel_name)
+        if not location:
+            return None
+        
+        group, index = location
+        return unpack_array_samples(self._mdf.get(channel_name, group=group, index=index))
+    
+    def classify_channel(self, channel_name, signal):
+        """
+        Détermine le type de données d'un canal
+        
+        Returns:
+            Type de log ('TEXT', 'CURVE', 'LASER2D', 'IMAGE', 'CAN') ou None si non reconnu
+        """
+        if self._is_text_event(channel_name, signal):
+            return 'TEXT'
+        elif self._is_curve_data(channel_name, signal):
+            return 'CURVE'
+        elif self._is_laser_data(channel_name, signal):
+            return 'LASER2D'
+        elif self._is_can_frames(channel_name, signal):
+            return 'CAN'
+        elif self._is_image_data(channel_name, signal):
+            return 'IMAGE'
+        elif self._is_can_data(channel_name, signal):
+            return 'CAN'
+        return None
+    
+    def group_channels(self, channels):
+        """
+        Regroupe les canaux par groupe de données MDF
+        
+        Les groupes sont retournés dans l'ordre de leur première apparition et les
+        canaux gardent leur ordre relatif. Les canaux introuvables forment un lot à part.
+        
+        Args:
+            channels: Liste des noms de canaux
+            
+        Returns:
+            Liste de listes de noms de canaux, une par groupe de données
+        """
+        batches = {}
+        for channel_name in channels:
+            location = self._find_channel_location(channel_name)
+            key = location[0] if location else None
+            batches.setdefault(key, []).append(channel_name)
+        return list(batches.values())
+    
+    def decode_channels(self, channel_names):
+        """
+        Lit et classifie un lot de canaux
+        
+        Le type de chaque canal est d'abord déterminé d'après ses métadonnées (voir
+        plan_channel) : les canaux non reconnus ne sont pas lus. Les autres canaux d'un
+        même groupe de données sont lus ensemble avec MDF.select, ce qui ne décode les
+        enregistrements du groupe qu'une seule fois. En cas d'échec de la lecture
+        groupée, chaque canal est relu séparément pour isoler l'erreur.
+        
+        Args:
+            channel_names: Noms des canaux à lire (idéalement d'un même groupe)
+            
+        Returns:
+            Liste de DecodedChannel dans l'ordre de channel_names
+        """
+        plans = {name: self.plan_channel(name) for name in channel_names}
+        locations = {name: (plan.group, plan.index) if plan else None for name, plan in plans.items()}
+        
+        # Canaux non reconnus d'après leurs métadonnées : aucun échantillon n'est lu
+        skipped = {
+            name for name, plan in plans.items()
+            if plan and plan.resolved and plan.kind is None
+        }
+        found = [name for name in channel_names if locations[name] and name not in skipped]
+        
+        signals = {}
+        if len(found) > 1:
+            try:
+                selected = self._mdf.select([(name, *locations[name]) for name in found])
+                signals = dict(zip(found, map(unpack_array_samples, selected)))
+            except Exception as e:
+                logger.warning(f"Lecture groupée impossible, lecture canal par canal: {e}")
+        
+        decoded_channels = []
+        for channel_name in channel_names:
+            if not locations[channel_name]:
+                decoded_channels.append(DecodedChannel(channel_name))
+                continue
+            
+            plan = plans[channel_name]
+            try:
+                if channel_name in skipped:
+                    decoded_channels.append(DecodedChannel(channel_name, None, self._load_first_timestamp(plan)))
+                    continue
+                
+                signal = signals.get(channel_name)
+                if signal is None:
+                    signal = self.load_signal(channel_name)
+                
+                # Le type imposé l'emporte ; le type prévu par le plan est confirmé par le
+                # signal lu, sinon il est recalculé
+                if channel_name in self._kind_overrides:
+                    kind = self._kind_overrides[channel_name]
+                elif plan.matches(signal):
+                    kind = plan.kind
+                else:
+                    kind = self.classify_channel(channel_name, signal)
+                decoded_channels.append(DecodedChannel(channel_name, kind, signal))
+            except Exception as e:
+                decoded_channels.append(DecodedChannel(channel_name, error=str(e)))
+        
+        return decoded_channels
+    
+    def build_channel(self, channel_name, kind, signal):
+        """
+        Construit les objets d'un canal déjà lu et classifié
+        
+        Args:
+            channel_name: Nom du canal
+            kind: Type retourné par classify_channel
+            signal: Signal (ou SignalData) du canal
+            
+        Returns:
+            Tuple contenant (logs, curve_measurements, laser_scans, images, can_messages)
+        """
+        if kind == 'TEXT':
+            logs = self._process_text_event(channel_name, signal)
+            # Associer les logs au groupe
+            for log in logs:
+                log.group = self._log_group
+            return logs, [], [], [], []
+            
+        elif kind == 'CURVE':
+            main_log, curve_measurements = self._process_curve_data(channel_name, signal)
+            main_log.group = self._log_group  # Assignation au groupe
+            return [main_log], curve_measurements, [], [], []
+            
+        elif kind == 'LASER2D':
+            main_log, laser_data = self._process_laser_data(channel_name, signal)
+            main_log.group = self._log_group  # Assignation au groupe
+            # Un canal multi-scans est transmis tel quel (LaserSeriesBuffer)
+            laser_scans = laser_data if isinstance(laser_data, LaserSeriesBuffer) else [laser_data]
+            return [main_log], [], laser_scans, [], []
+            
+        elif kind == 'IMAGE':
+            main_log, images = self._process_image_data(channel_name, signal)
+            main_log.group = self._log_group  # Assignation au groupe
+            return [main_log], [], [], images, []
+            
+        elif kind == 'CAN':
+            main_log, can_messages = self._process_can_data(channel_name, signal)
+            main_log.group = self._log_group  # Assignation au groupe
+            return [main_log], [], [], [], can_messages
+            
+        # Canal non reconnu, créer un log simple
+        log = RobotLog(
+            timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
+            robot_id="MDF_Import",
+            level="INFO",
+            message=f"Données non classifiées pour {channel_name}",
+            source=f"MDF Import: {self.mdf_file.name if self.mdf_file else 'Unknown'}",
+            log_type="TEXT",
+            group=self._log_group  # Assignation au groupe
+        )
+        
+        # Ajouter des métadonnées
+        metadata = {
+            'channel_name': channel_name,
+            'samples_count': len(signal.samples),
+            'data_type': str(signal.samples.dtype),
+            'unit': signal.unit if hasattr(signal, 'unit') else None,
+            'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
+        }
+        log.set_metadata_from_dict(metadata)
+        
+        return [log], [], [], [], []
+    
     def process_channel(self, channel_name):
         """
         Traite un canal spécifique du fichier MDF
@@ -156,99 +384,58 @@ class MDFParser:
             if not self.open():
                 return [], [], [], [], []
         
-        try:
-            # Trouver la localisation correcte du canal
-            location = self._find_channel_location(channel_name)
-            if not location:
-                logger.error(f"Canal {channel_name} non trouvé dans le fichier MDF")
-                # Créer un log d'erreur
-                error_log = RobotLog(
-                    timestamp=datetime.now(),
-                    robot_id="MDF_Import",
-                    level="ERROR",
-                    message=f"Canal {channel_name} non trouvé dans le fichier MDF",
-                    source=f"MDF Import: {self.mdf_file.name if self.mdf_file else 'Unknown'}",
-                    log_type="TEXT",
-                    group=self._log_group  # Assignation au groupe
-                )
-                return [error_log], [], [], [], []
-            
-            group, index = location
-            signal = self._mdf.get(channel_name, group=group, index=index)
+        return self._process_decoded_channel(self.decode_channels([channel_name])[0])
+    
+    def _process_decoded_channel(self, decoded):
+        """
+        Construit les objets d'un canal déjà lu et classifié
+        
+        Args:
+            decoded: DecodedChannel retourné par decode_channels
             
-            # Déterminer le type de données
-            if self._is_text_event(channel_name, signal):
-                logs = self._process_text_event(channel_name, signal)
-                # Associer les logs au groupe
-                for log in logs:
-                    log.group = self._log_group
-                return logs, [], [], [], []
-                
-            elif self._is_curve_data(channel_name, signal):
-                main_log, curve_measurements = self._process_curve_data(channel_name, signal)
-                main_log.group = self._log_group  # Assignation au groupe
-                return [main_log], curve_measurements, [], [], []
-                
-            elif self._is_laser_data(channel_name, signal):
-                main_log, laser_scan = self._process_laser_data(channel_name, signal)
-                main_log.group = self._log_group  # Assignation au groupe
-                return [main_log], [], [laser_scan], [], []
-                
-            elif self._is_image_data(channel_name, signal):
-                main_log, image = self._process_image_data(channel_name, signal)
-                main_log.group = self._log_group  # Assignation au groupe
-                return [main_log], [], [], [image] if image else [], []
-                
-            elif self._is_can_data(channel_name, signal):
-                main_log, can_messages = self._process_can_data(channel_name, signal)
-                main_log.group = self._log_group  # Assignation au groupe
-                return [main_log], [], [], [], can_messages
-                
-            else:
-                # Canal non reconnu, créer un log simple
-                log = RobotLog(
-                    timestamp=datetime.fromtimestamp(signal.timestamps[0]),
-                    robot_id="MDF_Import",
-                    level="INFO",
-                    message=f"Données non classifiées pour {channel_name}",
-                    source=f"MDF Import: {self.mdf_file.name if self.mdf_file else 'Unknown'}",
-                    log_type="TEXT",
-                    group=self._log_group  # Assignation au groupe
-                )
-                
-                # Ajouter des métadonnées
-                metadata = {
-                    'channel_name': channel_name,
-                    'samples_count': len(signal.samples),
-                    'data_type': str(signal.samples.dtype),
-                    'unit': signal.unit if hasattr(signal, 'unit') else None,
-                    'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
-                }
-                log.set_metadata_from_dict(metadata)
-                
-                return [log], [], [], [], []
-                
+        Returns:
+            Tuple contenant (logs, curve_measurements, laser_scans, images, can_messages)
+        """
+        channel_name = decoded.channel_name
+        
+        if decoded.error:
+            logger.error(f"Erreur lors du traitement du canal {channel_name}: {decoded.error}")
+            return [self._error_log(f"Erreur lors du traitement du canal {channel_name}: {decoded.error}")], [], [], [], []
+        
+        if decoded.signal is None:
+            logger.error(f"Canal {channel_name} non trouvé dans le fichier MDF")
+            return [self._error_log(f"Canal {channel_name} non trouvé dans le fichier MDF")], [], [], [], []
+        
+        try:
+            return self.build_channel(channel_name, decoded.kind, decoded.signal)
         except Exception as e:
             logger.error(f"Erreur lors du traitement du canal {channel_name}: {e}")
-            # Créer un log d'erreur
-            error_log = RobotLog(
-                timestamp=datetime.now(),
-                robot_id="MDF_Import",
-                level="ERROR",
-                message=f"Erreur lors du traitement du canal {channel_name}: {e}",
-                source=f"MDF Import: {self.mdf_file.name if self.mdf_file else 'Unknown'}",
-                log_type="TEXT",
-                group=self._log_group  # Assignation au groupe
-            )
-            return [error_log], [], [], [], []
+            return [self._error_log(f"Erreur lors du traitement du canal {channel_name}: {e}")], [], [], [], []
     
-    def process_file(self, dbc_file=None, log_group=None):
+    def process_file(self, dbc_file=None, log_group=None, batch_size=None, workers=None, read_mode=None,
+                     streaming=None, stream_window=None, progress_callback=None, channels=None,
+                     kind_overrides=None):
         """
         Traite l'ensemble du fichier MDF et importe tous les canaux
         
         Args:
             dbc_file: Fichier DBC optionnel pour décoder les messages CAN
             log_group: Groupe de logs auquel associer les logs générés
+            batch_size: Taille des lots d'insertion (MDF_IMPORT_BATCH_SIZE par défaut)
+            workers: Nombre de processus pour lire et classifier les canaux
+                (MDF_IMPORT_WORKERS par défaut, 1 pour un traitement séquentiel)
+            read_mode: 'group' pour lire un groupe de données à la fois, 'channel' pour
+                lire canal par canal (MDF_IMPORT_READ_MODE par défaut)
+            streaming: Importer en flux les canaux plus longs que stream_window
+                (MDF_IMPORT_STREAMING par défaut)
+            stream_window: Nombre d'échantillons par fenêtre d'import en flux
+                (MDF_IMPORT_STREAM_WINDOW par défaut)
+            progress_callback: Fonction appelée après chaque canal avec
+                (nom du canal, statistiques courantes)
+            channels: Liste d'autorisation des canaux à importer (noms ou motifs, voir
+                filter_channels) ; les autres canaux ne sont ni lus ni enregistrés
+            kind_overrides: Dictionnaire {nom du canal: type} imposant le type de traitement
+                ('TEXT', 'CURVE', 'LASER2D', 'IMAGE', 'CAN') au lieu du type détecté
             
         Returns:
             Dictionnaire contenant des statistiques sur les données importées
@@ -259,6 +446,7 @@ class MDFParser:
         
         # Stocker le groupe de logs pour l'utiliser lors du traitement
         self._log_group = log_group
+        self._kind_overrides = dict(kind_overrides or {})
         
         # Initialiser le parseur DBC si un fichier est fourni
         if dbc_file:
@@ -278,73 +466,82 @@ class MDFParser:
             'curve_measurements': 0,
             'can_messages': 0,
             'can_signals': 0,
-            'errors': 0
+            'errors': 0,
+            'skipped_channels': 0
         }
         
-        # Récupérer tous les canaux (version améliorée qui filtre les canaux de temps)
-        channels = self.get_channels()
+        # Récupérer les canaux (version améliorée qui filtre les canaux de temps) et ne
+        # garder que ceux de la liste d'autorisation
+        all_channels = self.get_channels()
+        channels = filter_channels(all_channels, channels)
         statistics['total_channels'] = len(channels)
+        statistics['skipped_channels'] = len(all_channels) - len(channels)
         
-        # Traiter chaque canal
-        for channel_name in channels:
-            logs, curve_measurements, laser_scans, images, can_messages = self.process_channel(channel_name)
+        # Plan de tous les canaux d'après les seules métadonnées, avant toute lecture
+        plans = {plan.name: plan for plan in self.plan_channels(channels)}
+        
+        # Les canaux volumineux sont importés en flux après les autres, fenêtre par fenêtre
+        if streaming is None:
+            streaming = getattr(settings, 'MDF_IMPORT_STREAMING', False)
+        streamed_channels = []
+        if streaming:
+            stream_window = self._get_stream_window(stream_window)
+            streamed_channels = [c for c in channels if self._should_stream(plans.get(c), stream_window)]
+            if streamed_channels:
+                streamed_set = set(streamed_channels)
+                channels = [c for c in channels if c not in streamed_set]
+        
+        # Lire les canaux par lots (un groupe de données ou un canal par lot), puis écrire
+        # les objets de chaque canal par lots dans une transaction. En mode parallèle, les
+        # lots sont lus et classifiés par un pool de processus et leurs résultats sont
+        # écrits dans l'ordre par ce seul processus.
+        read_mode = read_mode or getattr(settings, 'MDF_IMPORT_READ_MODE', 'group')
+        if read_mode == 'group':
+            batches = self.group_channels(channels)
+        else:
+            batches = [[channel_name] for channel_name in channels]
+        
+        workers = get_worker_count(workers)
+        if workers > 1:
+            decoded_channels = iter_decoded_channels(self.file_path, batches, workers, self._kind_overrides)
+        else:
+            decoded_channels = (decoded for batch in batches for decoded in self.decode_channels(batch))
+        
+        results = (
+            (decoded.channel_name, self._process_decoded_channel(decoded))
+            for decoded in decoded_channels
+        )
+        
+        writer = ChannelWriter(batch_size)
+        for channel_name, channel_objects in results:
+            logs, curve_measurements, laser_scans, images, can_messages = channel_objects
             
-            # Sauvegarder les logs
-            for log in logs:
-                try:
-                    # Le log est déjà associé au groupe dans process_channel
-                    log.save()
-                    
-                    # Associer les mesures de courbe au log principal
-                    if log.log_type == 'CURVE' and curve_measurements:
-                        for measurement in curve_measurements:
-                            measurement.log = log
-                            measurement.save()
-                        statistics['curve_measurements'] += len(curve_measurements)
-                        statistics['curve_logs'] += 1
-                    
-                    # Associer le scan laser au log principal
-                    elif log.log_type == 'LASER2D' and laser_scans:
-                        for scan in laser_scans:
-                            scan.log = log
-                            scan.save()
-                        statistics['laser_logs'] += 1
-                    
-                    # Associer l'image au log principal
-                    elif log.log_type == 'IMAGE' and images:
-                        for image in images:
-                            image.log = log
-                            image.save()
-                        statistics['image_logs'] += 1
-                    
-                    # Associer les messages CAN au log principal
-                    elif log.log_type == 'CAN' and can_messages:
-                        for can_message in can_messages:
-                            can_message.log = log
-                            can_message.save()
-                            
-                            # Si le message a des signaux décodés, les enregistrer
-                            if hasattr(can_message, 'signals_data') and can_message.signals_data:
-                                for name, signal_info in can_message.signals_data.items():
-                                    signal = CANSignal(
-                                        can_message=can_message,
-                                        name=name,
-                                        value=signal_info['value'] if isinstance(signal_info, dict) else signal_info,
-                                        unit=signal_info.get('unit', '') if isinstance(signal_info, dict) else ''
-                                    )
-                                    signal.save()
-                                    statistics['can_signals'] += 1
-                        
-                        statistics['can_messages'] += len(can_messages)
-                        statistics['can_logs'] += 1
-                    
-                    # Comptabiliser les logs textuels
-                    elif log.log_type == 'TEXT':
-                        statistics['text_logs'] += 1
-                        
-                except Exception as e:
-                    logger.error(f"Erreur lors de la sauvegarde des données pour {channel_name}: {e}")
-                    statistics['errors'] += 1
+            try:
+                # Les logs sont déjà associés au groupe dans process_channel
+                counts = writer.save_channel(logs, curve_measurements, laser_scans, images, can_messages)
+                for key, value in counts.items():
+                    statistics[key] += value
+            except Exception as e:
+                logger.error(f"Erreur lors de la sauvegarde des données pour {channel_name}: {e}")
+                statistics['errors'] += 1
+            
+            if progress_callback:
+                progress_callback(channel_name, statistics)
+        
+        for channel_name in streamed_channels:
+            try:
+                counts = self._stream_channel(channel_name, writer, stream_window)
+                if counts is None:
+                    # Type non adapté à l'import en flux : lecture complète du canal
+                    counts = writer.save_channel(*self.process_channel(channel_name))
+                for key, value in counts.items():
+                    statistics[key] += value
+            except Exception as e:
+                logger.error(f"Erreur lors de l'import en flux du canal {channel_name}: {e}")
+                statistics['errors'] += 1
+            
+            if progress_callback:
+                progress_callback(channel_name, statistics)
         
         # Après avoir traité tous les canaux, vérifier si des données n'ont pas été associées au groupe
         if log_group and self.mdf_file:
@@ -0,0 +1,203 @@
+"""
+Module contenant l'étape de persistance des objets produits lors de l'import MDF.
+
+Les objets d'un canal sont écrits avec bulk_create, par lots, dans une seule
+transaction par canal, au lieu d'un save() (et donc d'un commit) par objet.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import RobotLog, CurveMeasurement, Laser2DScan, ImageData, CANMessage, CANSignal
+from .curve_storage import SeriesBuffer
+from .laser_storage import LaserSeriesBuffer
+from .can_storage import CANFrameBuffer
+from .image_variants import generate_thumbnails
+
+logger = logging.getLogger(__name__)
+
+# Taille de lot par défaut si MDF_IMPORT_BATCH_SIZE n'est pas défini dans les settings
+DEFAULT_BATCH_SIZE = 1000
+
+# Compteur de statistiques incrémenté pour chaque log principal ayant des données liées
+LOG_COUNTERS = {
+    'CURVE': 'curve_logs',
+    'LASER2D': 'laser_logs',
+    'IMAGE': 'image_logs',
+    'CAN': 'can_logs',
+}
+
+
+def get_batch_size(batch_size=None):
+    """Retourne la taille de lot à utiliser pour les insertions en masse"""
+    if batch_size:
+        return int(batch_size)
+    return int(getattr(settings, 'MDF_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+class ChannelWriter:
+    """Écrit en base les objets produits par le traitement d'un canal MDF"""
+
+    def __init__(self, batch_size=None):
+        """
+        Initialise l'écrivain
+
+        Args:
+            batch_size: Nombre d'objets par requête INSERT (MDF_IMPORT_BATCH_SIZE par défaut)
+        """
+        self.batch_size = get_batch_size(batch_size)
+
+    def save_channel(self, logs, curve_measurements, laser_scans, images, can_messages):
+        """
+        Enregistre les objets d'un canal dans une transaction unique
+
+        Args:
+            logs, curve_measurements, laser_scans, images, can_messages:
+                Listes retournées par MDFParser.process_channel (curve_measurements
+                peut être un SeriesBuffer pour les courbes stockées en colonnes binaires,
+                laser_scans un LaserSeriesBuffer pour les canaux laser multi-scans,
+                can_messages un CANFrameBuffer pour les trames CAN brutes)
+
+        Returns:
+            Dictionnaire des compteurs à ajouter aux statistiques d'import
+        """
+        counts = {
+            'text_logs': 0,
+            'curve_logs': 0,
+            'laser_logs': 0,
+            'image_logs': 0,
+            'can_logs': 0,
+            'curve_measurements': 0,
+            'can_messages': 0,
+            'can_signals': 0,
+        }
+
+        with transaction.atomic():
+            # Les logs textuels n'ont pas d'objets liés : une insertion en masse suffit.
+            # Les logs principaux (un par canal) sont sauvegardés un par un pour obtenir leur clé.
+            text_logs = [log for log in logs if log.log_type == 'TEXT']
+            main_logs = [log for log in logs if log.log_type != 'TEXT']
+
+            if text_logs:
+                RobotLog.objects.bulk_create(text_logs, batch_size=self.batch_size)
+                counts['text_logs'] += len(text_logs)
+
+            for log in main_logs:
+                log.save()
+
+                related_counts = self.save_related(
+                    log, curve_measurements, laser_scans, images, can_messages
+                )
+                stored = related_counts.pop('stored')
+                for key, value in related_counts.items():
+                    counts[key] += value
+
+                # Un log principal n'est comptabilisé que si des données lui ont été associées
+                if stored and log.log_type in LOG_COUNTERS:
+                    counts[LOG_COUNTERS[log.log_type]] += 1
+
+        return counts
+
+    def save_related(self, log, curve_measurements=(), laser_scans=(), images=(), can_messages=()):
+        """
+        Enregistre les objets liés à un log principal déjà sauvegardé
+
+        Utilisé par save_channel et par l'import en flux, qui ajoute les fenêtres
+        successives d'un canal au même log principal.
+
+        Returns:
+            Dictionnaire des compteurs d'échantillons, plus 'stored' (nombre d'objets liés)
+        """
+        counts = {'stored': 0, 'curve_measurements': 0, 'can_messages': 0, 'can_signals': 0}
+
+        if log.log_type == 'CURVE' and curve_measurements:
+            if isinstance(curve_measurements, SeriesBuffer):
+                # Courbe stockée en colonnes binaires : un seul CurveSeries par log
+                curve_measurements.save(log)
+            else:
+                self._bulk_create_for_log(CurveMeasurement, curve_measurements, log)
+            counts['curve_measurements'] += len(curve_measurements)
+            counts['stored'] += len(curve_measurements)
+
+        elif log.log_type == 'LASER2D' and laser_scans:
+            if isinstance(laser_scans, LaserSeriesBuffer):
+                # Canal multi-scans : tous les scans dans un seul LaserScanSeries
+                laser_scans.save(log)
+            else:
+                self._bulk_create_for_log(Laser2DScan, laser_scans, log)
+            counts['stored'] += len(laser_scans)
+
+        elif log.log_type == 'IMAGE' and images:
+            self._bulk_create_for_log(ImageData, images, log)
+            # Miniatures générées en parallèle, les pages n'affichant pas l'original
+            generate_thumbnails(images)
+            counts['stored'] += len(images)
+
+        elif log.log_type == 'CAN' and can_messages:
+            if isinstance(can_messages, CANFrameBuffer):
+                # Trames brutes en colonnes binaires : un seul CANFrameSeries par log
+                can_messages.save(log)
+            else:
+                self._bulk_create_for_log(CANMessage, can_messages, log)
+                counts['can_signals'] += self._save_can_signals(can_messages, log)
+            counts['can_messages'] += len(can_messages)
+            counts['stored'] += len(can_messages)
+
+        return counts
+
+    def _bulk_create_for_log(self, model, objects, log):
+        """Rattache les objets au log principal puis les insère par lots"""
+        for obj in objects:
+            obj.log = log
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def _resolve_can_message_ids(self, can_messages, log):
+        """
+        Renseigne les clés primaires des messages CAN insérés en masse.
+
+        Certains backends ne renvoient pas les clés après bulk_create. Les messages
+        venant d'être insérés dans cette transaction sont les derniers du log : on
+        relit leurs clés dans l'ordre d'insertion en une seule requête.
+        """
+        if all(message.pk is not None for message in can_messages):
+            return
+
+        ids = list(
+            CANMessage.objects.filter(log=log).order_by('-id').values_list('id', flat=True)[:len(can_messages)]
+        )
+        for message, pk in zip(can_messages, reversed(ids)):
+            message.pk = pk
+
+    def _save_can_signals(self, can_messages, log):
+        """Crée les signaux décodés des messages CAN par lots et retourne leur nombre"""
+        if not any(getattr(message, 'signals_data', None) for message in can_messages):
+            return 0
+
+        self._resolve_can_message_ids(can_messages, log)
+
+        total = 0
+        batch = []
+        for can_message in can_messages:
+            signals_data = getattr(can_message, 'signals_data', None)
+            if not signals_data:
+                continue
+
+            for name, signal_info in signals_data.items():
+                batch.append(CANSignal(
+                    can_message_id=can_message.pk,
+                    name=name,
+                    value=signal_info['value'] if isinstance(signal_info, dict) else signal_info,
+                    unit=signal_info.get('unit', '') if isinstance(signal_info, dict) else ''
+                ))
+
+            if len(batch) >= self.batch_size:
+                CANSignal.objects.bulk_create(batch, batch_size=self.batch_size)
+                total += len(batch)
+                batch = []
+
+        if batch:
+            CANSignal.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+
+        return total
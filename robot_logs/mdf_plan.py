@@ -0,0 +1,315 @@
+"""
+Module contenant la planification des canaux MDF à partir des seules métadonnées.
+
+Le type de chaque canal est déterminé d'après les blocs de canal (type de données,
+nombre de bits, conversion, nombre de cycles du groupe, nom, unité, source), sans
+lire d'échantillon. Le plan obtenu pour tout le fichier permet de décider quels
+canaux lire, ignorer ou différer avant toute lecture de données.
+"""
+import time
+import logging
+from fnmatch import fnmatchcase
+
+import numpy as np
+from asammdf.blocks import v4_constants as v4c
+from asammdf.blocks import v2_v3_constants as v3c
+
+logger = logging.getLogger(__name__)
+
+# Types de données MDF dont les échantillons sont des chaînes de caractères
+V4_STRING_DATA_TYPES = (
+    v4c.DATA_TYPE_STRING_LATIN_1,
+    v4c.DATA_TYPE_STRING_UTF_8,
+    v4c.DATA_TYPE_STRING_UTF_16_LE,
+    v4c.DATA_TYPE_STRING_UTF_16_BE,
+)
+V3_STRING_DATA_TYPES = (v3c.DATA_TYPE_STRING,)
+
+# Types de données MDF dont les échantillons sont des tableaux d'octets
+V4_BYTES_DATA_TYPES = (
+    v4c.DATA_TYPE_BYTEARRAY,
+    v4c.DATA_TYPE_MIME_SAMPLE,
+    v4c.DATA_TYPE_MIME_STREAM,
+)
+V3_BYTES_DATA_TYPES = (v3c.DATA_TYPE_BYTEARRAY,)
+
+# Conversions produisant du texte (tables valeur -> texte)
+V4_TEXT_CONVERSIONS = (
+    v4c.CONVERSION_TYPE_TABX,
+    v4c.CONVERSION_TYPE_RTABX,
+    v4c.CONVERSION_TYPE_TRANS,
+    v4c.CONVERSION_TYPE_BITFIELD,
+)
+V3_TEXT_CONVERSIONS = (v3c.CONVERSION_TYPE_TABX, v3c.CONVERSION_TYPE_RTABX)
+
+# Absence de conversion (les échantillons gardent leur type brut)
+V4_NO_CONVERSION = v4c.CONVERSION_TYPE_NON
+V3_NO_CONVERSION = v3c.CONVERSION_TYPE_NONE
+
+
+class ChannelPlan:
+    """
+    Description d'un canal MDF établie sans lire ses échantillons
+
+    L'attribut samples est un tableau virtuel (sans mémoire allouée) ayant le type,
+    la forme et la longueur des échantillons réels : les fonctions de détection de
+    mdf_detector s'appliquent donc telles quelles au plan.
+    """
+
+    __slots__ = (
+        'name', 'group', 'index', 'kind', 'samples_count', 'dtype', 'shape',
+        'data_type', 'bit_count', 'unit', 'comment', 'source', 'timestamps',
+    )
+
+    def __init__(self, name, group, index, samples_count=0, dtype=None, shape=(),
+                 data_type=None, bit_count=0, unit='', comment='', source=''):
+        self.name = name
+        self.group = group
+        self.index = index
+        self.kind = None
+        self.samples_count = samples_count
+        self.dtype = dtype
+        self.shape = shape
+        self.data_type = data_type
+        self.bit_count = bit_count
+        self.unit = unit
+        self.comment = comment
+        self.source = source
+        # Renseigné uniquement pour les canaux construits sans lecture (voir _load_first_timestamp)
+        self.timestamps = None
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    @property
+    def resolved(self):
+        """Indique si le type des échantillons a pu être déterminé d'après les métadonnées"""
+        return self.dtype is not None
+
+    @property
+    def samples(self):
+        """Tableau virtuel ayant le type et la forme des échantillons du canal"""
+        return np.broadcast_to(np.zeros((), dtype=self.dtype), (self.samples_count, *self.shape))
+
+    def matches(self, signal, check_length=True):
+        """
+        Vérifie qu'un signal lu correspond au type et à la forme prévus par le plan
+
+        Args:
+            signal: Signal lu (ou fenêtre d'un signal si check_length est faux)
+            check_length: Vérifier aussi le nombre d'échantillons
+        """
+        samples = signal.samples
+        return (
+            self.resolved
+            and samples.dtype.kind == self.dtype.kind
+            and samples.shape[1:] == tuple(self.shape)
+            and (not check_length or len(samples) == self.samples_count)
+        )
+
+    def to_dict(self):
+        """Retourne le plan sous forme de dictionnaire (prévisualisation, JSON)"""
+        return {
+            'name': self.name,
+            'group': self.group,
+            'index': self.index,
+            'kind': self.kind,
+            'samples_count': self.samples_count,
+            'data_type': str(self.dtype) if self.resolved else '',
+            'shape': list(self.shape),
+            'bit_count': self.bit_count,
+            'unit': self.unit,
+            'comment': self.comment,
+            'source': self.source,
+        }
+
+
+def filter_channels(channels, allowed):
+    """
+    Restreint une liste de canaux à une liste d'autorisation
+
+    Args:
+        channels: Noms des canaux disponibles
+        allowed: Noms exacts ou motifs (*, ?, [...], sans distinction de casse) des
+            canaux à conserver ; None pour tout conserver
+
+    Returns:
+        Liste des canaux autorisés, dans l'ordre de channels
+    """
+    if allowed is None:
+        return list(channels)
+
+    names = {name for name in allowed if not any(char in name for char in '*?[')}
+    patterns = [name.lower() for name in allowed if name not in names]
+    return [
+        channel_name for channel_name in channels
+        if channel_name in names
+        or any(fnmatchcase(channel_name.lower(), pattern) for pattern in patterns)
+    ]
+
+
+def _channel_sample_dtype(self, channel):
+    """
+    Déduit le type NumPy des échantillons physiques d'un canal depuis son bloc
+
+    Returns:
+        Tuple (dtype, shape) ; shape est la forme d'un échantillon (vide pour un scalaire)
+    """
+    if self._mdf.version >= '4.00':
+        string_types, bytes_types = V4_STRING_DATA_TYPES, V4_BYTES_DATA_TYPES
+        text_conversions, no_conversion = V4_TEXT_CONVERSIONS, V4_NO_CONVERSION
+    else:
+        string_types, bytes_types = V3_STRING_DATA_TYPES, V3_BYTES_DATA_TYPES
+        text_conversions, no_conversion = V3_TEXT_CONVERSIONS, V3_NO_CONVERSION
+
+    conversion_type = channel.conversion.conversion_type if channel.conversion else no_conversion
+
+    if channel.data_type in string_types or conversion_type in text_conversions:
+        return np.dtype('S1'), ()
+
+    if channel.data_type in bytes_types:
+        return np.dtype('u1'), (max(channel.bit_count // 8, 1),)
+
+    # Les autres conversions (linéaire, rationnelle, tables...) produisent des flottants
+    if conversion_type != no_conversion:
+        return np.dtype('f8'), ()
+
+    dtype = np.dtype(channel.dtype_fmt)
+    if dtype.subdtype is not None:
+        return dtype.subdtype
+    return dtype, ()
+
+
+def _channel_array_shape(mdf_group, index):
+    """
+    Retourne la forme d'un échantillon de canal tableau (bloc CA des fichiers MDF 4)
+
+    Un canal tableau (par exemple un scan laser complet par timestamp) est décrit par
+    un bloc de canal scalaire accompagné d'un bloc CA donnant ses dimensions.
+
+    Returns:
+        Tuple des dimensions, ou None si le canal n'est pas un canal tableau
+    """
+    dependencies = getattr(mdf_group, 'channel_dependencies', None)
+    if not dependencies or index >= len(dependencies) or not dependencies[index]:
+        return None
+    for dependency in dependencies[index]:
+        dims = getattr(dependency, 'dims', None)
+        if dims:
+            return tuple(int(getattr(dependency, f'dim_size_{dim}')) for dim in range(dims))
+    return None
+
+
+def get_array_channels(mdf):
+    """Retourne les noms des canaux tableaux d'un fichier MDF (voir _channel_array_shape)"""
+    names = set()
+    for mdf_group in mdf.groups:
+        for index, channel in enumerate(mdf_group.channels):
+            if _channel_array_shape(mdf_group, index):
+                names.add(channel.name)
+    return names
+
+
+def is_array_element(channel_name, array_channels):
+    """Indique si un canal est un élément (nom[i]) d'un canal tableau, exposé séparément par asammdf"""
+    return channel_name.endswith(']') and channel_name.split('[', 1)[0] in array_channels
+
+
+def unpack_array_samples(signal):
+    """
+    Remplace les échantillons d'un canal tableau par un tableau NumPy à plusieurs dimensions
+
+    asammdf lit un canal tableau sous forme d'enregistrements à un seul champ
+    (lui-même un tableau) : les échantillons deviennent le contenu de ce champ, de
+    forme (échantillons, *dimensions), comme prévu par ChannelPlan.samples.
+
+    Returns:
+        Le signal (modifié sur place)
+    """
+    samples = signal.samples
+    names = samples.dtype.names
+    if names and len(names) == 1 and samples.dtype[names[0]].subdtype is not None:
+        signal.samples = np.asarray(samples[names[0]])
+    return signal
+
+
+def _channel_source(channel):
+    """Retourne le nom de la source d'acquisition d'un canal (chaîne vide si absente)"""
+    source = getattr(channel, 'source', None)
+    if not source:
+        return ''
+    return getattr(source, 'name', '') or getattr(source, 'path', '') or ''
+
+
+def plan_channel(self, channel_name):
+    """
+    Établit le plan d'un canal à partir de ses métadonnées
+
+    Args:
+        channel_name: Nom du canal
+
+    Returns:
+        ChannelPlan, ou None si le canal n'existe pas
+    """
+    location = self._find_channel_location(channel_name)
+    if not location:
+        return None
+
+    group, index = location
+    mdf_group = self._mdf.groups[group]
+    channel = mdf_group.channels[index]
+
+    plan = ChannelPlan(
+        channel_name, group, index,
+        samples_count=mdf_group.channel_group.cycles_nr,
+        data_type=channel.data_type,
+        bit_count=channel.bit_count,
+        unit=channel.unit or '',
+        comment=channel.comment or '',
+        source=_channel_source(channel),
+    )
+
+    try:
+        plan.dtype, plan.shape = self._channel_sample_dtype(channel)
+        array_shape = _channel_array_shape(mdf_group, index)
+        if array_shape:
+            plan.shape = array_shape
+        plan.kind = self.classify_channel(channel_name, plan)
+    except Exception as e:
+        logger.warning(f"Type des échantillons du canal {channel_name} indéterminé d'après les métadonnées: {e}")
+        plan.dtype, plan.shape = None, ()
+
+    # Type de traitement imposé par l'utilisateur (voir process_file)
+    if channel_name in self._kind_overrides:
+        plan.kind = self._kind_overrides[channel_name]
+    return plan
+
+
+def plan_channels(self, channels=None):
+    """
+    Établit le plan de tous les canaux du fichier sans lire de données
+
+    Args:
+        channels: Noms des canaux à planifier (tous les canaux par défaut)
+
+    Returns:
+        Liste de ChannelPlan dans l'ordre des canaux (les canaux introuvables sont omis)
+    """
+    if channels is None:
+        channels = self.get_channels()
+
+    start = time.perf_counter()
+    plans = [plan for plan in (self.plan_channel(name) for name in channels) if plan is not None]
+    logger.info(f"Plan de {len(plans)} canaux établi en {(time.perf_counter() - start) * 1000:.1f} ms")
+    return plans
+
+
+def _load_first_timestamp(self, plan):
+    """Lit uniquement le premier timestamp du groupe d'un canal qui ne sera pas lu"""
+    master = self._mdf.get_master(plan.group, record_offset=0, record_count=1)
+    plan.timestamps = master[:1] if len(master) else np.zeros(1)
+    return plan
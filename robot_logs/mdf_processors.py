@@ -2,27 +2,42 @@
 Module contenant les fonctions de traitement des différents types de canaux MDF.
 """
 import logging
-import io
-import binascii
+import math
 import numpy as np
-from datetime import datetime
 
+from django.conf import settings
 from django.core.files.base import ContentFile
 
 from .models import RobotLog, CurveMeasurement, Laser2DScan, ImageData, CANMessage
-from .can_parser import extract_can_messages_from_mdf
+from .can_parser import extract_can_frames
+from .can_storage import CANFrameBuffer, get_can_storage
+from .curve_storage import SeriesBuffer, get_curve_storage, get_value_dtype
+from .laser_storage import LaserSeriesBuffer
+from .image_variants import read_image_header, get_image_extension
 
 logger = logging.getLogger(__name__)
 
-def _process_text_event(self, channel_name, signal):
-    """Traite un canal comme un événement textuel et crée des logs"""
+# Compression des distances laser si MDF_IMPORT_LASER_COMPRESSION n'est pas défini
+DEFAULT_LASER_COMPRESSION = 'zlib'
+
+def get_laser_compression():
+    """Retourne la compression des distances laser importées (None, 'zlib' ou 'lzma')"""
+    return getattr(settings, 'MDF_IMPORT_LASER_COMPRESSION', DEFAULT_LASER_COMPRESSION)
+
+def _process_text_event(self, channel_name, signal, start_index=0):
+    """
+    Traite un canal comme un événement textuel et crée des logs
+    
+    Args:
+        start_index: Index du premier échantillon dans le canal (import en flux)
+    """
     logs = []
     
-    # Convertir les timestamps en datetime
-    timestamps = [datetime.fromtimestamp(ts) for ts in signal.timestamps]
+    # Convertir tous les timestamps en datetime en une seule opération
+    timestamps = self._timestamps.to_datetimes(signal.timestamps)
     
     # Traiter chaque échantillon
-    for i, (ts, value) in enumerate(zip(timestamps, signal.samples)):
+    for i, (ts, value) in enumerate(zip(timestamps, signal.samples), start_index):
         # Convertir la valeur en chaîne si nécessaire
         if isinstance(value, (bytes, bytearray)):
             try:
@@ -60,7 +75,7 @@ def _process_curve_data(self, channel_name, signal):
     """Traite un canal comme des données de courbe"""
     # Créer un log principal pour cette courbe
     main_log = RobotLog(
-        timestamp=datetime.fromtimestamp(signal.timestamps[0]),
+        timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
         robot_id="MDF_Import",
         level="INFO",
         message=f"Données de courbe pour {channel_name}",
@@ -78,26 +93,56 @@ def _process_curve_data(self, channel_name, signal):
         'end_time': signal.timestamps[-1],
         'duration': signal.timestamps[-1] - signal.timestamps[0],
         'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
+        'storage': get_curve_storage(),
     }
     main_log.set_metadata_from_dict(metadata)
     
-    # Créer les mesures de courbe associées
-    curve_measurements = []
-    for i, (ts, value) in enumerate(zip(signal.timestamps, signal.samples)):
-        measurement = CurveMeasurement(
-            timestamp=datetime.fromtimestamp(ts),
-            sensor_name=channel_name,
-            value=float(value)
-        )
-        curve_measurements.append(measurement)
+    # Créer les données de courbe associées : colonnes binaires ou une ligne par mesure
+    if metadata['storage'] == 'series':
+        curve_data = self._build_curve_series(channel_name, signal)
+    else:
+        curve_data = self._build_curve_measurements(channel_name, signal)
+    
+    return main_log, curve_data
+
+def _build_curve_measurements(self, channel_name, signal):
+    """Crée les mesures de courbe d'un signal (ou d'une fenêtre de signal)"""
+    timestamps = self._timestamps.to_datetimes(signal.timestamps)
+    values = signal.samples.astype(np.float64).tolist()
+    return [
+        CurveMeasurement(timestamp=ts, sensor_name=channel_name, value=value)
+        for ts, value in zip(timestamps, values)
+    ]
+
+def _build_curve_series(self, channel_name, signal, series=None):
+    """
+    Ajoute les échantillons d'un signal (ou d'une fenêtre de signal) à une série binaire
     
-    return main_log, curve_measurements
+    Args:
+        series: SeriesBuffer à compléter (créé si None)
+    """
+    if series is None:
+        series = SeriesBuffer(channel_name, get_value_dtype(signal.samples))
+    series.append(self._timestamps.to_epoch_ns(signal.timestamps), signal.samples)
+    return series
 
 def _process_laser_data(self, channel_name, signal):
-    """Traite un canal comme des données laser 2D"""
+    """
+    Traite un canal comme des données laser 2D
+    
+    Un canal à une dimension est un scan unique (Laser2DScan). Un canal à deux
+    dimensions contient un scan par timestamp : tous les scans sont accumulés dans
+    un LaserSeriesBuffer (voir _build_laser_series).
+    
+    Returns:
+        Tuple (log principal, Laser2DScan ou LaserSeriesBuffer)
+    """
+    multi_scan = signal.samples.ndim == 2
+    points_count = signal.samples.shape[-1]
+    
     # Créer un log principal pour ces données laser
     main_log = RobotLog(
-        timestamp=datetime.fromtimestamp(signal.timestamps[0]),
+        timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
         robot_id="MDF_Import",
         level="INFO",
         message=f"Données laser 2D pour {channel_name}",
@@ -110,41 +155,78 @@ def _process_laser_data(self, channel_name, signal):
     # Ceci est une estimation - les vrais paramètres devraient être dans les métadonnées du MDF
     angle_min = -np.pi / 2  # Par défaut, supposons un scan de 180 degrés
     angle_max = np.pi / 2
-    angle_increment = np.pi / len(signal.samples)
+    angle_increment = (angle_max - angle_min) / points_count
     
     # Ajouter des métadonnées
     metadata = {
         'channel_name': channel_name,
-        'points_count': len(signal.samples),
+        'points_count': points_count,
         'unit': signal.unit if hasattr(signal, 'unit') else 'm',
         'angle_min': angle_min,
         'angle_max': angle_max,
         'angle_increment': angle_increment,
         'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
     }
+    if multi_scan:
+        metadata.update({
+            'scans_count': len(signal.samples),
+            'start_time': signal.timestamps[0],
+            'end_time': signal.timestamps[-1],
+            'duration': signal.timestamps[-1] - signal.timestamps[0],
+        })
     main_log.set_metadata_from_dict(metadata)
     
+    if multi_scan:
+        laser_series = LaserSeriesBuffer(channel_name, points_count, angle_min, angle_max, angle_increment)
+        return main_log, self._build_laser_series(channel_name, signal, laser_series)
+    
     # Créer l'objet de scan laser
     laser_scan = Laser2DScan(
-        timestamp=datetime.fromtimestamp(signal.timestamps[0]),
+        timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
         angle_min=angle_min,
         angle_max=angle_max,
         angle_increment=angle_increment
     )
     
-    # Convertir les données de plage en liste et les stocker
-    range_data = signal.samples.tolist()
-    laser_scan.set_range_data_from_list(range_data)
+    # Stocker les distances en binaire (float32)
+    laser_scan.set_range_array(signal.samples, compression=get_laser_compression())
     
     return main_log, laser_scan
 
+def _build_laser_series(self, channel_name, signal, laser_series):
+    """
+    Ajoute les scans d'un signal laser à deux dimensions (ou d'une fenêtre de signal) à un LaserSeriesBuffer
+    """
+    laser_series.append(self._timestamps.to_epoch_ns(signal.timestamps), signal.samples)
+    return laser_series
+
+def _iter_image_frames(samples):
+    """
+    Retourne les octets de chaque image d'un canal
+    
+    Un canal de tableaux d'octets (deux dimensions) ou d'octets de longueur variable
+    contient une image par échantillon ; un canal d'octets à une dimension contient
+    une seule image.
+    """
+    if samples.dtype.kind == 'O':
+        return [bytes(sample) for sample in samples]
+    if samples.ndim == 2:
+        return [sample.tobytes() for sample in samples]
+    return [samples.tobytes()]
+
 def _process_image_data(self, channel_name, signal):
-    """Traite un canal comme des données d'image"""
-    from PIL import Image
+    """
+    Traite un canal comme des données d'image
+    
+    Les octets de chaque image sont enregistrés tels quels (sans réencodage) ; seul
+    l'en-tête est lu pour connaître le format et les dimensions.
     
+    Returns:
+        Tuple (log principal, liste d'ImageData)
+    """
     # Créer un log principal pour cette image
     main_log = RobotLog(
-        timestamp=datetime.fromtimestamp(signal.timestamps[0]),
+        timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
         robot_id="MDF_Import",
         level="INFO",
         message=f"Image pour {channel_name}",
@@ -153,66 +235,102 @@ def _process_image_data(self, channel_name, signal):
         group=self._log_group  # Assignation directe au groupe
     )
     
-    # Essayer de déterminer le type d'image et de la décoder
-    try:
-        # Convertir les données en tableau d'octets
-        image_data = signal.samples.tobytes()
-        
-        # Essayer de créer une image à partir des données
-        img = Image.open(io.BytesIO(image_data))
+    frames = _iter_image_frames(signal.samples)
+    timestamps = self._timestamps.to_datetimes(signal.timestamps[:len(frames)])
+    
+    images = []
+    errors = []
+    for index, (timestamp, image_data) in enumerate(zip(timestamps, frames)):
+        try:
+            width, height, image_format = read_image_header(image_data)
+        except Exception as e:
+            errors.append(str(e))
+            continue
         
-        # Créer l'objet ImageData
         image_obj = ImageData(
-            timestamp=datetime.fromtimestamp(signal.timestamps[0]),
-            width=img.width,
-            height=img.height,
-            format=img.format if img.format else 'JPEG',
+            timestamp=timestamp,
+            width=width,
+            height=height,
+            format=image_format,
             description=f"Image extraite du canal {channel_name}"
         )
         
-        # Enregistrer l'image
-        img_io = io.BytesIO()
-        img.save(img_io, format=img.format if img.format else 'JPEG')
-        img_io.seek(0)
-        
-        # Sauvegarder l'image dans le champ image_file
+        # Enregistrer les octets d'origine, avec l'extension de leur format
         image_obj.image_file.save(
-            f"{channel_name}_image.jpg",
-            ContentFile(img_io.getvalue()),
+            f"{channel_name}_{index}.{get_image_extension(image_format)}",
+            ContentFile(image_data),
             save=False
         )
-        
-        # Ajouter des métadonnées avec l'ID du groupe
-        metadata = {
-            'channel_name': channel_name,
-            'width': img.width,
-            'height': img.height,
-            'format': img.format if img.format else 'JPEG',
-            'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
-        }
-        main_log.set_metadata_from_dict(metadata)
-        
-        return main_log, image_obj
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du traitement de l'image pour {channel_name}: {e}")
+        images.append(image_obj)
+    
+    if not images:
+        logger.error(f"Erreur lors du traitement de l'image pour {channel_name}: {errors[0] if errors else 'aucune image'}")
         
         # En cas d'échec, créer une entrée de journal simple
         metadata = {
             'channel_name': channel_name,
             'data_size': len(signal.samples),
-            'error': str(e),
+            'error': errors[0] if errors else 'Aucune image',
             'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
         }
         main_log.set_metadata_from_dict(metadata)
-        
-        return main_log, None
+        return main_log, []
+    
+    if errors:
+        logger.warning(f"{len(errors)} image(s) illisible(s) ignorée(s) dans le canal {channel_name}")
+    
+    # Ajouter des métadonnées avec l'ID du groupe (dimensions de la première image)
+    metadata = {
+        'channel_name': channel_name,
+        'width': images[0].width,
+        'height': images[0].height,
+        'format': images[0].format,
+        'images_count': len(images),
+        'group_id': self._log_group.id if self._log_group else None,  # Ajouter l'ID du groupe
+    }
+    main_log.set_metadata_from_dict(metadata)
+    
+    return main_log, images
+
+def _decode_can_signals(dbc_parser, frames, unique_ids, id_indexes, can_messages):
+    """
+    Décode les signaux des messages CAN avec le DBC, en une passe vectorisée par identifiant
+
+    Args:
+        dbc_parser: Instance de DBCParser
+        frames: Trames extraites par extract_can_frames
+        unique_ids: Identifiants distincts des trames
+        id_indexes: Position de l'identifiant de chaque trame dans unique_ids
+        can_messages: CANMessage des trames, dans le même ordre (complétés sur place)
+    """
+    # Trames regroupées par identifiant, dans l'ordre chronologique au sein de chaque groupe
+    order = np.argsort(id_indexes, kind='stable')
+    bounds = np.searchsorted(id_indexes[order], np.arange(len(unique_ids) + 1))
+
+    for id_index, can_id in enumerate(unique_ids.tolist()):
+        rows = order[bounds[id_index]:bounds[id_index + 1]]
+        message_name, decoded = dbc_parser.decode_batch(can_id, frames['data'][rows], frames['lengths'][rows])
+        if not message_name:
+            continue
+
+        units = dbc_parser.get_decode_plan(can_id).units
+        columns = [(name, values.tolist(), units.get(name, '')) for name, values in decoded.items()]
+        for position, row in enumerate(rows.tolist()):
+            can_message = can_messages[row]
+            can_message.message_name = message_name
+            # On stockera les signaux dans la base de données plus tard ; NaN : signal
+            # absent de la trame (trame trop courte ou autre valeur du multiplexeur)
+            can_message.signals_data = {
+                name: {'value': values[position], 'unit': unit}
+                for name, values, unit in columns
+                if not math.isnan(values[position])
+            }
 
 def _process_can_data(self, channel_name, signal):
     """Traite un canal comme des données CAN"""
     # Créer un log principal pour ces données CAN
     main_log = RobotLog(
-        timestamp=datetime.fromtimestamp(signal.timestamps[0]),
+        timestamp=self._timestamps.to_datetime(signal.timestamps[0]),
         robot_id="MDF_Import",
         level="INFO",
         message=f"Données CAN pour {channel_name}",
@@ -239,40 +357,46 @@ def _process_can_data(self, channel_name, signal):
     
     # Extraire les messages CAN
     try:
-        # Extraire et traiter les messages CAN
+        # Les trames sont extraites du signal déjà lu, sous forme de tableaux par colonne
         can_messages = []
+        frames = extract_can_frames(signal)
+        frames_count = len(frames['ids'])
+        metadata['frames_count'] = frames_count
+        main_log.set_metadata_from_dict(metadata)
+        if not frames_count:
+            return main_log, can_messages
+
+        # Trames brutes enregistrées telles quelles, les signaux sont décodés à la demande
+        metadata['storage'] = get_can_storage()
+        main_log.set_metadata_from_dict(metadata)
+        if metadata['storage'] == 'frames':
+            timestamps_ns = self._timestamps.to_epoch_ns(frames['timestamps'])
+            return main_log, CANFrameBuffer(channel_name, timestamps_ns, frames, getattr(self, '_dbc_file', None))
+
+        timestamps = self._timestamps.to_datetimes(frames['timestamps'])
+
+        # Identifiants formatés une fois par identifiant distinct
+        unique_ids, id_indexes = np.unique(frames['ids'], return_inverse=True)
+        id_labels = [f"0x{can_id:X}" for can_id in unique_ids.tolist()]
+
+        # Données converties en une seule fois ; chaque trame n'en garde que ses octets utiles
+        data = frames['data']
+        row_size = data.shape[1]
+        data_hex = data.tobytes().hex()
+
+        for row, (timestamp, id_index, length) in enumerate(
+            zip(timestamps, id_indexes.tolist(), frames['lengths'].tolist())
+        ):
+            offset = row * row_size
+            can_messages.append(CANMessage(
+                timestamp=timestamp,
+                can_id=id_labels[id_index],
+                raw_data=data_hex[2 * offset:2 * (offset + length)]
+            ))
         
-        # Méthode 1: Utiliser notre fonction d'extraction
-        if hasattr(signal, 'samples') and len(signal.samples) > 0:
-            # Essayer d'extraire les messages CAN du signal
-            extracted_messages = extract_can_messages_from_mdf(self._mdf, channel_name)
-            
-            # Traiter chaque message extrait
-            for timestamp, can_id, can_data in extracted_messages:
-                # Convertir l'identifiant en hexadécimal
-                can_id_hex = f"0x{can_id:X}"
-                
-                # Convertir les données en hexadécimal
-                data_hex = binascii.hexlify(can_data).decode('utf-8')
-                
-                # Créer l'objet message CAN
-                can_message = CANMessage(
-                    timestamp=datetime.fromtimestamp(timestamp),
-                    can_id=can_id_hex,
-                    raw_data=data_hex
-                )
-                
-                # Si on a un parseur DBC, décoder le message
-                if hasattr(self, '_dbc_parser') and self._dbc_parser:
-                    message_name, signals = self._dbc_parser.decode_message(can_id, can_data)
-                    
-                    if message_name:
-                        can_message.message_name = message_name
-                        
-                        # On stockera les signaux dans la base de données plus tard
-                        can_message.signals_data = signals
-                
-                can_messages.append(can_message)
+        # Si on a un parseur DBC, décoder les messages
+        if getattr(self, '_dbc_parser', None):
+            _decode_can_signals(self._dbc_parser, frames, unique_ids, id_indexes, can_messages)
         
         return main_log, can_messages
         
@@ -0,0 +1,191 @@
+"""
+Module contenant l'import en flux des canaux MDF volumineux.
+
+Un canal dont le nombre d'échantillons dépasse la fenêtre configurée est lu avec
+MDF.iter_get par fenêtres de taille fixe. Chaque fenêtre est classifiée, convertie
+puis écrite avant la lecture de la suivante, ce qui borne la mémoire utilisée
+quelle que soit la durée de l'enregistrement.
+"""
+import logging
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .curve_storage import SeriesBuffer
+from .mdf_plan import unpack_array_samples
+
+logger = logging.getLogger(__name__)
+
+# Types de canaux pouvant être importés fenêtre par fenêtre. Les autres types
+# produisent un objet unique par canal et sont lus en entier ; parmi les canaux
+# laser, seuls les canaux multi-scans (deux dimensions) sont importés en flux.
+STREAMABLE_KINDS = ('TEXT', 'CURVE', 'LASER2D')
+
+# Nombre d'échantillons par fenêtre si MDF_IMPORT_STREAM_WINDOW n'est pas défini
+DEFAULT_STREAM_WINDOW = 100000
+
+# Taille de fragment de lecture par défaut d'asammdf (256 Mo), restaurée après chaque canal
+DEFAULT_READ_FRAGMENT_SIZE = 256 * 1024 * 1024
+
+
+def _get_stream_window(self, stream_window=None):
+    """Retourne le nombre d'échantillons par fenêtre pour l'import en flux"""
+    if stream_window:
+        return int(stream_window)
+    return int(getattr(settings, 'MDF_IMPORT_STREAM_WINDOW', DEFAULT_STREAM_WINDOW))
+
+
+def _get_channel_stream_window(self, plan, stream_window):
+    """
+    Retourne le nombre d'échantillons par fenêtre pour un canal
+
+    Un échantillon d'un canal laser multi-scans est un scan complet : la fenêtre est
+    alors exprimée en distances, pour que la mémoire d'une fenêtre reste comparable
+    à celle d'une fenêtre de courbe.
+    """
+    if plan is None or plan.kind != 'LASER2D' or not plan.shape:
+        return stream_window
+    return max(stream_window // int(np.prod(plan.shape)), 1)
+
+
+def _should_stream(self, plan, stream_window):
+    """Détermine, d'après le plan du canal (ChannelPlan), si un canal doit être importé en flux"""
+    if plan is None:
+        return False
+    return plan.samples_count > self._get_channel_stream_window(plan, stream_window)
+
+
+def _iter_signal_windows(self, channel_name, stream_window):
+    """
+    Lit un canal par fenêtres d'au plus stream_window échantillons
+
+    Yields:
+        Signal asammdf pour chaque fenêtre
+    """
+    group, index = self._find_channel_location(channel_name)
+    channel_group = self._mdf.groups[group].channel_group
+    record_size = channel_group.samples_byte_nr + getattr(channel_group, 'invalidation_bytes_nr', 0)
+
+    # asammdf découpe la lecture en fragments exprimés en octets d'enregistrements
+    self._mdf.configure(read_fragment_size=max(record_size, 1) * stream_window)
+    try:
+        for signal in self._mdf.iter_get(channel_name, group=group, index=index):
+            yield unpack_array_samples(signal)
+    finally:
+        self._mdf.configure(read_fragment_size=DEFAULT_READ_FRAGMENT_SIZE)
+
+
+def _stream_channel(self, channel_name, writer, stream_window):
+    """
+    Importe un canal volumineux fenêtre par fenêtre dans une transaction unique
+
+    Args:
+        channel_name: Nom du canal à importer
+        writer: ChannelWriter utilisé pour l'écriture
+        stream_window: Nombre d'échantillons par fenêtre
+
+    Returns:
+        Dictionnaire des compteurs à ajouter aux statistiques, ou None si le type du
+        canal ne se prête pas à l'import en flux (le canal doit alors être lu en entier)
+    """
+    plan = self.plan_channel(channel_name)
+    windows = self._iter_signal_windows(channel_name, self._get_channel_stream_window(plan, stream_window))
+    try:
+        first_window = next(windows, None)
+        if first_window is None:
+            return None
+
+        # Le type est celui du canal entier (métadonnées), pas seulement de la première fenêtre
+        if channel_name in self._kind_overrides:
+            kind = self._kind_overrides[channel_name]
+        elif plan and plan.matches(first_window, check_length=False):
+            kind = plan.kind
+        else:
+            kind = self.classify_channel(channel_name, first_window)
+        if kind not in STREAMABLE_KINDS:
+            return None
+        if kind == 'LASER2D' and first_window.samples.ndim != 2:
+            return None
+
+        counts = {}
+
+        def add_counts(new_counts):
+            for key, value in new_counts.items():
+                counts[key] = counts.get(key, 0) + value
+
+        with transaction.atomic():
+            if kind == 'TEXT':
+                sample_index = 0
+                for signal in chain([first_window], windows):
+                    logs = self._process_text_event(channel_name, signal, start_index=sample_index)
+                    for log in logs:
+                        log.group = self._log_group
+                    add_counts(writer.save_channel(logs, [], [], [], []))
+                    sample_index += len(signal.samples)
+
+            elif kind == 'LASER2D':
+                # Tous les scans du canal sont ajoutés au même LaserSeriesBuffer
+                main_log, laser_series = self._process_laser_data(channel_name, first_window)
+                main_log.group = self._log_group
+                end_time = first_window.timestamps[-1]
+                for signal in windows:
+                    self._build_laser_series(channel_name, signal, laser_series)
+                    end_time = signal.timestamps[-1]
+
+                metadata = main_log.get_metadata_as_dict()
+                metadata.update({
+                    'scans_count': len(laser_series),
+                    'end_time': end_time,
+                    'duration': end_time - first_window.timestamps[0],
+                    'streamed': True,
+                })
+                main_log.set_metadata_from_dict(metadata)
+                add_counts(writer.save_channel([main_log], [], laser_series, [], []))
+
+            else:
+                # Le log principal est créé à partir de la première fenêtre, les fenêtres
+                # suivantes ne font qu'ajouter des mesures
+                main_log, curve_data = self._process_curve_data(channel_name, first_window)
+                main_log.group = self._log_group
+                series = isinstance(curve_data, SeriesBuffer)
+                if not series:
+                    add_counts(writer.save_channel([main_log], curve_data, [], [], []))
+
+                samples_count = len(first_window.samples)
+                start_time = first_window.timestamps[0]
+                end_time = first_window.timestamps[-1]
+
+                for signal in windows:
+                    if series:
+                        # Les fenêtres sont ajoutées aux fichiers temporaires de la série
+                        self._build_curve_series(channel_name, signal, curve_data)
+                    else:
+                        curve_measurements = self._build_curve_measurements(channel_name, signal)
+                        related_counts = writer.save_related(main_log, curve_measurements=curve_measurements)
+                        related_counts.pop('stored')
+                        add_counts(related_counts)
+
+                    samples_count += len(signal.samples)
+                    end_time = signal.timestamps[-1]
+
+                # Compléter les métadonnées avec l'étendue complète du canal
+                metadata = main_log.get_metadata_as_dict()
+                metadata.update({
+                    'samples_count': samples_count,
+                    'end_time': end_time,
+                    'duration': end_time - start_time,
+                    'streamed': True,
+                })
+                main_log.set_metadata_from_dict(metadata)
+                if series:
+                    add_counts(writer.save_channel([main_log], curve_data, [], [], []))
+                else:
+                    main_log.save(update_fields=['metadata'])
+
+        logger.info(f"Canal {channel_name} importé en flux par fenêtres de {stream_window} échantillons")
+        return counts
+
+    finally:
+        windows.close()
@@ -0,0 +1,72 @@
+"""
+Module contenant le moteur de conversion des timestamps MDF.
+
+Les timestamps d'un canal MDF sont des secondes relatives au début de la mesure
+(header.start_time). Ce module les convertit en une seule opération NumPy, soit
+en nanosecondes epoch (int64), soit en datetimes conscientes du fuseau horaire.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class TimestampConverter:
+    """Convertit les timestamps relatifs d'un fichier MDF en temps absolu"""
+
+    def __init__(self, start_time=None):
+        """
+        Initialise le convertisseur
+
+        Args:
+            start_time: Début de la mesure (header.start_time). Une datetime naïve est
+                considérée comme UTC ; None ancre les timestamps sur l'epoch Unix.
+        """
+        if start_time is None:
+            start_time = EPOCH
+        elif start_time.tzinfo is None:
+            start_time = start_time.replace(tzinfo=timezone.utc)
+
+        self.start_time = start_time
+        self.start_ns = ((start_time - EPOCH) // timedelta(microseconds=1)) * 1000
+
+    @classmethod
+    def from_mdf(cls, mdf):
+        """Crée un convertisseur ancré sur le début de mesure d'un objet MDF (asammdf)"""
+        try:
+            return cls(mdf.header.start_time)
+        except Exception as e:
+            logger.warning(f"Début de mesure MDF illisible, utilisation de l'epoch Unix: {e}")
+            return cls()
+
+    def to_epoch_ns(self, timestamps):
+        """
+        Convertit un tableau de secondes relatives en nanosecondes epoch
+
+        Args:
+            timestamps: Tableau (ou scalaire) de secondes depuis le début de la mesure
+
+        Returns:
+            Tableau NumPy int64
+        """
+        relative_ns = np.rint(np.asarray(timestamps, dtype=np.float64) * 1e9).astype(np.int64)
+        return relative_ns + np.int64(self.start_ns)
+
+    def to_datetimes(self, timestamps):
+        """
+        Convertit un tableau de secondes relatives en datetimes UTC conscientes
+
+        Returns:
+            Tableau NumPy d'objets datetime
+        """
+        epoch_ns = np.atleast_1d(self.to_epoch_ns(timestamps))
+        return pd.to_datetime(epoch_ns, unit='ns', utc=True).to_pydatetime()
+
+    def to_datetime(self, timestamp):
+        """Convertit un timestamp relatif unique en datetime UTC consciente"""
+        return self.to_datetimes([timestamp])[0]
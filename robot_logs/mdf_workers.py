@@ -0,0 +1,159 @@
+"""
+Module contenant le traitement parallèle des canaux MDF.
+
+Des processus de travail ouvrent chacun le fichier MDF, lisent et classifient les
+canaux, puis renvoient des tableaux NumPy compacts au processus principal qui
+construit les objets et les écrit seul en base.
+"""
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+
+from .mdf_plan import ChannelPlan
+
+logger = logging.getLogger(__name__)
+
+# Parser MDF propre à chaque processus de travail, ouvert une seule fois
+_worker_parser = None
+
+
+def get_worker_count(workers=None):
+    """
+    Retourne le nombre de processus de travail à utiliser
+
+    Args:
+        workers: Nombre demandé (MDF_IMPORT_WORKERS par défaut, 0 pour un processus par cœur)
+    """
+    if workers is None:
+        workers = getattr(settings, 'MDF_IMPORT_WORKERS', 1)
+    workers = int(workers)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+class SignalData:
+    """Données d'un canal transmises entre processus (équivalent léger d'un Signal asammdf)"""
+
+    __slots__ = ('name', 'samples', 'timestamps', 'unit', 'comment')
+
+    def __init__(self, name, samples, timestamps, unit='', comment=''):
+        self.name = name
+        self.samples = samples
+        self.timestamps = timestamps
+        self.unit = unit
+        self.comment = comment
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    @classmethod
+    def from_signal(cls, signal):
+        """Crée un SignalData à partir d'un Signal asammdf"""
+        return cls(
+            name=signal.name,
+            samples=signal.samples,
+            timestamps=signal.timestamps,
+            unit=signal.unit if hasattr(signal, 'unit') else '',
+            comment=signal.comment if hasattr(signal, 'comment') else '',
+        )
+
+
+class DecodedChannel:
+    """Résultat de la lecture et de la classification d'un canal par un processus de travail"""
+
+    __slots__ = ('channel_name', 'kind', 'signal', 'error')
+
+    def __init__(self, channel_name, kind=None, signal=None, error=None):
+        self.channel_name = channel_name
+        self.kind = kind
+        self.signal = signal
+        self.error = error
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+def _init_worker(file_path, kind_overrides=None):
+    """Initialise un processus de travail : configure Django et ouvre le fichier MDF"""
+    global _worker_parser
+
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from .mdf_parser import MDFParser
+    _worker_parser = MDFParser(file_path)
+    if not _worker_parser.open():
+        _worker_parser = None
+    else:
+        _worker_parser._kind_overrides = dict(kind_overrides or {})
+
+
+def _decode_batch(channel_names):
+    """Lit et classifie un lot de canaux dans un processus de travail"""
+    if _worker_parser is None:
+        return [
+            DecodedChannel(channel_name, error="Impossible d'ouvrir le fichier MDF")
+            for channel_name in channel_names
+        ]
+
+    decoded_channels = _worker_parser.decode_channels(channel_names)
+    for decoded in decoded_channels:
+        # Un ChannelPlan (canal non lu) est déjà léger et sérialisable
+        if decoded.signal is not None and not isinstance(decoded.signal, ChannelPlan):
+            decoded.signal = SignalData.from_signal(decoded.signal)
+    return decoded_channels
+
+
+def iter_decoded_channels(file_path, batches, workers, kind_overrides=None):
+    """
+    Lit et classifie des lots de canaux dans un pool de processus
+
+    Les résultats sont produits dans l'ordre des lots. Le nombre de lots en vol
+    est limité pour borner la mémoire quand l'écriture est plus lente que la lecture.
+
+    Args:
+        file_path: Chemin vers le fichier MDF
+        batches: Liste de listes de noms de canaux (voir MDFParser.group_channels)
+        workers: Nombre de processus de travail
+        kind_overrides: Dictionnaire {nom du canal: type} imposant le type de traitement
+
+    Yields:
+        DecodedChannel pour chaque canal
+    """
+    # Ne pas partager les connexions à la base avec les processus fils
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
+
+    logger.info(f"Traitement parallèle de {len(batches)} lots de canaux avec {workers} processus")
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(file_path, kind_overrides)) as executor:
+        batch_iter = iter(batches)
+        pending = deque(
+            executor.submit(_decode_batch, batch)
+            for batch in islice(batch_iter, max_pending)
+        )
+
+        while pending:
+            decoded_channels = pending.popleft().result()
+            for batch in islice(batch_iter, 1):
+                pending.append(executor.submit(_decode_batch, batch))
+            yield from decoded_channels
@@ -1,5 +1,8 @@
 from django.db import models
 import json
+import lzma
+import zlib
+import numpy as np
 from django.urls import reverse
 
 class LogGroup(models.Model):
@@ -13,6 +16,10 @@ class LogGroup(models.Model):
     tags = models.CharField(max_length=255, blank=True, null=True, 
                            help_text="Tags séparés par des virgules pour faciliter la recherche")
     
+    # Carte d'occupation laser à recalculer par le processus d'arrière-plan (logs ajoutés,
+    # retirés ou déplacés, voir laser_occupancy)
+    laser_occupancy_stale = models.BooleanField(default=False)
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Groupe de logs"
@@ -101,30 +108,213 @@ class CurveMeasurement(models.Model):
     class Meta:
         ordering = ['timestamp']
 
+class CurveSeries(models.Model):
+    """Modèle pour stocker une courbe en colonnes binaires (fichiers .npy) au lieu d'une ligne par mesure"""
+    log = models.OneToOneField(RobotLog, on_delete=models.CASCADE, related_name='curve_series')
+    sensor_name = models.CharField(max_length=100)
+    samples_count = models.BigIntegerField(default=0)
+    value_dtype = models.CharField(max_length=10, default='float64')
+    
+    # Étendue de la courbe (nanosecondes epoch UTC) et bornes des valeurs
+    start_ns = models.BigIntegerField(null=True, blank=True)
+    end_ns = models.BigIntegerField(null=True, blank=True)
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    
+    # Timestamps int64 (ns epoch) et valeurs float64/float32, contigus
+    timestamps_file = models.FileField(upload_to='curve_series/')
+    values_file = models.FileField(upload_to='curve_series/')
+    
+    # Pyramide de niveaux de détail (voir curve_lod), absente pour les courbes courtes
+    lod_file = models.FileField(upload_to='curve_series/', null=True, blank=True)
+    lod_min_level = models.PositiveSmallIntegerField(default=0)
+    
+    def get_arrays(self, mmap_mode='r'):
+        """
+        Retourne les tableaux NumPy de la courbe
+        
+        Args:
+            mmap_mode: Mode de projection mémoire passé à numpy.load ('r' par défaut, None
+                pour charger les tableaux en mémoire)
+            
+        Returns:
+            Tuple (timestamps en ns epoch int64, valeurs)
+        """
+        timestamps = np.load(self.timestamps_file.path, mmap_mode=mmap_mode)
+        values = np.load(self.values_file.path, mmap_mode=mmap_mode)
+        return timestamps, values
+    
+    def get_lod(self, mmap_mode='r'):
+        """Retourne la pyramide de niveaux de détail projetée en mémoire, ou None si elle n'existe pas"""
+        if not self.lod_file:
+            return None
+        return np.load(self.lod_file.path, mmap_mode=mmap_mode)
+    
+    def __str__(self):
+        return f"Série {self.sensor_name} ({self.samples_count} échantillons)"
+
+# Encodages possibles de Laser2DScan.range_blob
+LASER_RANGE_ENCODINGS = ('f4', 'f4+zlib', 'f4+lzma')
+
 class Laser2DScan(models.Model):
     log = models.ForeignKey(RobotLog, on_delete=models.CASCADE, related_name='laser_scans')
     timestamp = models.DateTimeField()
     angle_min = models.FloatField()
     angle_max = models.FloatField()
     angle_increment = models.FloatField()
-    range_data = models.TextField()  # Stockage des mesures de distance en JSON
+    range_data = models.TextField(blank=True, default='')  # Ancien stockage JSON (scans non convertis)
     
-    def get_range_data_as_list(self):
-        """Convertit les données de plage JSON en liste Python"""
+    # Distances en float32 little-endian, éventuellement compressées (voir LASER_RANGE_ENCODINGS)
+    range_blob = models.BinaryField(null=True, blank=True)
+    range_encoding = models.CharField(max_length=10, blank=True, default='')
+    range_count = models.PositiveIntegerField(default=0)
+    
+    def get_range_array(self):
+        """
+        Retourne les distances du scan sous forme de tableau NumPy float32
+        
+        Les scans enregistrés avant le stockage binaire sont relus depuis le JSON.
+        """
+        if self.range_blob is not None:
+            data = bytes(self.range_blob)
+            if self.range_encoding == 'f4+zlib':
+                data = zlib.decompress(data)
+            elif self.range_encoding == 'f4+lzma':
+                data = lzma.decompress(data)
+            return np.frombuffer(data, dtype='<f4')
+        
         if self.range_data:
             try:
-                return json.loads(self.range_data)
-            except json.JSONDecodeError:
-                return []
-        return []
+                return np.asarray(json.loads(self.range_data), dtype=np.float32)
+            except (json.JSONDecodeError, TypeError, ValueError):
+                return np.empty(0, dtype=np.float32)
+        return np.empty(0, dtype=np.float32)
+    
+    def set_range_array(self, ranges, compression=None):
+        """
+        Enregistre les distances du scan en binaire
+        
+        Args:
+            ranges: Distances (tableau ou liste, converties en float32)
+            compression: None, 'zlib' ou 'lzma'
+        """
+        ranges = np.ascontiguousarray(ranges, dtype='<f4')
+        data = ranges.tobytes()
+        if compression == 'zlib':
+            data = zlib.compress(data)
+        elif compression == 'lzma':
+            data = lzma.compress(data)
+        elif compression is not None:
+            raise ValueError(f"Compression inconnue: {compression}")
+        
+        self.range_blob = data
+        self.range_encoding = f"f4+{compression}" if compression else 'f4'
+        self.range_count = len(ranges)
+        self.range_data = ''
+    
+    def get_points_count(self):
+        """Retourne le nombre de mesures du scan"""
+        if self.range_blob is not None:
+            return self.range_count
+        return len(self.get_range_array())
+    
+    def get_range_data_as_list(self):
+        """Convertit les données de plage en liste Python"""
+        return self.get_range_array().tolist()
     
     def set_range_data_from_list(self, range_list):
-        """Enregistre une liste Python comme données de plage JSON"""
-        self.range_data = json.dumps(range_list)
+        """Enregistre une liste Python comme données de plage (stockage binaire non compressé)"""
+        self.set_range_array(range_list)
     
     class Meta:
         ordering = ['timestamp']
 
+class LaserScanSeries(models.Model):
+    """Modèle pour stocker tous les scans d'un canal laser multi-scans dans un tableau contigu (fichiers .npy)"""
+    log = models.OneToOneField(RobotLog, on_delete=models.CASCADE, related_name='laser_series')
+    sensor_name = models.CharField(max_length=100)
+    scans_count = models.BigIntegerField(default=0)
+    beams_count = models.PositiveIntegerField(default=0)
+    
+    # Géométrie commune à tous les scans (radians)
+    angle_min = models.FloatField()
+    angle_max = models.FloatField()
+    angle_increment = models.FloatField()
+    
+    # Étendue de l'enregistrement (nanosecondes epoch UTC) et plus grande distance mesurée
+    start_ns = models.BigIntegerField(null=True, blank=True)
+    end_ns = models.BigIntegerField(null=True, blank=True)
+    max_range = models.FloatField(null=True, blank=True)
+    
+    # Index des scans : timestamps int64 (ns epoch), un par scan, croissants
+    timestamps_file = models.FileField(upload_to='laser_series/')
+    # Distances float32 de forme (scans_count, beams_count)
+    ranges_file = models.FileField(upload_to='laser_series/')
+    
+    def get_arrays(self, mmap_mode='r'):
+        """
+        Retourne les tableaux NumPy des scans
+        
+        Args:
+            mmap_mode: Mode de projection mémoire passé à numpy.load ('r' par défaut, None
+                pour charger les tableaux en mémoire)
+            
+        Returns:
+            Tuple (timestamps en ns epoch int64, distances float32 à deux dimensions)
+        """
+        timestamps = np.load(self.timestamps_file.path, mmap_mode=mmap_mode)
+        ranges = np.load(self.ranges_file.path, mmap_mode=mmap_mode)
+        return timestamps, ranges
+    
+    def get_scan_index(self, timestamp_ns):
+        """Retourne la position du premier scan enregistré à partir de timestamp_ns"""
+        timestamps, _ = self.get_arrays()
+        return min(int(np.searchsorted(timestamps, timestamp_ns, side='left')), max(self.scans_count - 1, 0))
+    
+    def __str__(self):
+        return f"Scans {self.sensor_name} ({self.scans_count} scans de {self.beams_count} points)"
+
+class LaserOccupancyGrid(models.Model):
+    """Modèle pour stocker la carte d'occupation cumulée de tous les scans laser d'un groupe"""
+    group = models.OneToOneField(LogGroup, on_delete=models.CASCADE, related_name='laser_occupancy')
+    
+    # Grille carrée centrée sur le capteur : côté de 2 * half_size mètres, cellules de cell_size mètres
+    cell_size = models.FloatField()
+    half_size = models.FloatField()
+    cells_count = models.PositiveIntegerField(default=0)
+    
+    # Nombre d'impacts par cellule (uint32, .npy) et rendu PNG de la carte
+    counts_file = models.FileField(upload_to='laser_occupancy/')
+    image_file = models.FileField(upload_to='laser_occupancy/')
+    max_count = models.BigIntegerField(default=0)
+    points_count = models.BigIntegerField(default=0)
+    
+    # Données déjà cumulées (scans Laser2DScan et scans des LaserScanSeries), pour la
+    # mise à jour incrémentale (voir laser_occupancy)
+    scans_count = models.BigIntegerField(default=0)
+    last_scan_id = models.BigIntegerField(default=0)
+    series_ids = models.TextField(blank=True, default='[]')  # JSON des LaserScanSeries cumulés
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def get_series_ids(self):
+        """Retourne les identifiants des LaserScanSeries déjà cumulés"""
+        try:
+            return set(json.loads(self.series_ids or '[]'))
+        except (json.JSONDecodeError, TypeError):
+            return set()
+    
+    def set_series_ids(self, series_ids):
+        """Enregistre les identifiants des LaserScanSeries cumulés"""
+        self.series_ids = json.dumps(sorted(series_ids))
+    
+    def get_counts(self):
+        """Retourne le nombre d'impacts par cellule (tableau uint32, ligne 0 en haut : y maximal)"""
+        return np.load(self.counts_file.path)
+    
+    def __str__(self):
+        return f"Carte d'occupation laser de {self.group} ({self.points_count} points)"
+
 class ImageData(models.Model):
     log = models.ForeignKey(RobotLog, on_delete=models.CASCADE, related_name='images')
     timestamp = models.DateTimeField()
@@ -140,6 +330,21 @@ class ImageData(models.Model):
     def __str__(self):
         return f"Image for {self.log} at {self.timestamp}"
 
+class ImageThumbnail(models.Model):
+    """Modèle pour stocker une version réduite d'une image (voir image_variants)"""
+    image = models.ForeignKey(ImageData, on_delete=models.CASCADE, related_name='thumbnails')
+    size = models.CharField(max_length=10)  # Nom de la taille ('small', 'medium', 'large')
+    format = models.CharField(max_length=10, default='WEBP')
+    file = models.FileField(upload_to='log_images/thumbnails/')
+    width = models.IntegerField(default=0)
+    height = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('image', 'size')
+    
+    def __str__(self):
+        return f"Miniature {self.size} de {self.image}"
+
 class DBCFile(models.Model):
     """Modèle pour stocker les fichiers DBC (Database CAN)"""
     file = models.FileField(upload_to='dbc_files/')
@@ -147,8 +352,99 @@ class DBCFile(models.Model):
     description = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    # Empreinte SHA-256 du contenu, clé du cache des DBC analysés (voir dbc_registry)
+    sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    
+    # Catalogue des messages et signaux (DBCMessageDef, DBCSignalDef, voir dbc_catalog)
+    catalog_built_at = models.DateTimeField(null=True, blank=True)
+    parser_type = models.CharField(max_length=20, blank=True, default='')  # 'cantools' ou 'basic'
+    
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        # Un nouveau fichier remplace l'ancien contenu : son entrée de cache et son
+        # catalogue sont retirés, l'empreinte sera recalculée à la prochaine analyse
+        replaced = False
+        if self.pk:
+            previous_file = DBCFile.objects.filter(pk=self.pk).values_list('file', flat=True).first()
+            replaced = previous_file != self.file.name or not self.file._committed
+        if replaced:
+            from .dbc_registry import invalidate_dbc_cache
+            invalidate_dbc_cache(self.sha256)
+            self.sha256 = None
+            self.catalog_built_at = None
+        super().save(*args, **kwargs)
+        if replaced:
+            self.message_defs.all().delete()
+    
+    def delete(self, *args, **kwargs):
+        from .dbc_registry import invalidate_dbc_cache
+        sha256 = self.sha256
+        result = super().delete(*args, **kwargs)
+        invalidate_dbc_cache(sha256)
+        return result
+
+class DBCMessageDef(models.Model):
+    """Message CAN défini par un fichier DBC (catalogue établi au téléversement, voir dbc_catalog)"""
+    dbc_file = models.ForeignKey(DBCFile, on_delete=models.CASCADE, related_name='message_defs')
+    frame_id = models.BigIntegerField(db_index=True)  # Identifiant CAN, sans le bit d'identifiant étendu
+    name = models.CharField(max_length=255, db_index=True)
+    length = models.PositiveSmallIntegerField(default=8)  # Longueur des données (octets)
+    is_extended = models.BooleanField(default=False)  # Identifiant sur 29 bits
+    sender = models.CharField(max_length=255, blank=True, default='')
+    comment = models.TextField(blank=True, null=True)
+    signals_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['frame_id']
+        unique_together = ('dbc_file', 'frame_id')
+    
+    @property
+    def frame_id_hex(self):
+        """Identifiant au format des CANMessage (0x...)"""
+        return f"0x{self.frame_id:X}"
+    
+    def __str__(self):
+        return f"{self.frame_id_hex} {self.name}"
+
+class DBCSignalDef(models.Model):
+    """Signal d'un message CAN défini par un fichier DBC (catalogue, voir dbc_catalog)"""
+    message = models.ForeignKey(DBCMessageDef, on_delete=models.CASCADE, related_name='signal_defs')
+    # Redondant avec message.dbc_file : recherche d'un signal dans tous les DBC sans jointure
+    dbc_file = models.ForeignKey(DBCFile, on_delete=models.CASCADE, related_name='signal_defs')
+    name = models.CharField(max_length=255, db_index=True)
+    start_bit = models.PositiveSmallIntegerField()  # Bit de départ DBC
+    length = models.PositiveSmallIntegerField()  # Nombre de bits
+    little_endian = models.BooleanField(default=True)  # Intel (@1) ou Motorola (@0)
+    is_signed = models.BooleanField(default=False)
+    is_float = models.BooleanField(default=False)
+    factor = models.FloatField(default=1.0)
+    offset = models.FloatField(default=0.0)
+    minimum = models.FloatField(null=True, blank=True)
+    maximum = models.FloatField(null=True, blank=True)
+    unit = models.CharField(max_length=50, blank=True, default='')
+    # Signal multiplexé : nom du multiplexeur et valeurs (JSON) pour lesquelles il est présent
+    multiplexer = models.CharField(max_length=255, blank=True, default='')
+    multiplexer_ids = models.TextField(blank=True, default='')
+    comment = models.TextField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['message', 'start_bit']
+    
+    def get_multiplexer_ids(self):
+        """Retourne les valeurs du multiplexeur pour lesquelles le signal est présent"""
+        try:
+            return json.loads(self.multiplexer_ids or '[]')
+        except (json.JSONDecodeError, TypeError):
+            return []
+    
+    def set_multiplexer_ids(self, multiplexer_ids):
+        """Enregistre les valeurs du multiplexeur pour lesquelles le signal est présent"""
+        self.multiplexer_ids = json.dumps(list(multiplexer_ids or ()))
+    
+    def __str__(self):
+        return f"{self.name} ({self.message.name})"
 
 class CANMessage(models.Model):
     """Modèle pour stocker les messages CAN décodés"""
@@ -160,6 +456,9 @@ class CANMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+    
+    def get_absolute_url(self):
+        return reverse('robot_logs:can_message_detail', args=[self.id])
         
     def __str__(self):
         return f"CAN {self.can_id} at {self.timestamp}"
@@ -174,6 +473,62 @@ class CANSignal(models.Model):
     def __str__(self):
         return f"{self.name}: {self.value} {self.unit or ''}"
 
+class CANFrameSeries(models.Model):
+    """Modèle pour stocker les trames brutes d'un canal CAN en colonnes binaires (fichiers .npy), décodées à la demande"""
+    log = models.OneToOneField(RobotLog, on_delete=models.CASCADE, related_name='can_frames')
+    channel_name = models.CharField(max_length=255)
+    frames_count = models.BigIntegerField(default=0)
+    payload_width = models.PositiveSmallIntegerField(default=8)  # Colonnes du tableau de données (8 en CAN, 64 en CAN FD)
+    
+    # Étendue de l'enregistrement (nanosecondes epoch UTC)
+    start_ns = models.BigIntegerField(null=True, blank=True)
+    end_ns = models.BigIntegerField(null=True, blank=True)
+    
+    # DBC utilisé pour décoder les signaux (voir can_storage)
+    dbc_file = models.ForeignKey(DBCFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='can_frame_series')
+    
+    # Nombre de trames par identifiant (JSON {"0x100": 1234}), pour les statistiques sans lire les fichiers
+    id_counts = models.TextField(blank=True, default='{}')
+    
+    # Timestamps int64 (ns epoch), identifiants uint32, longueurs uint8 et données uint8
+    # de forme (frames_count, payload_width), une ligne par trame dans l'ordre chronologique
+    timestamps_file = models.FileField(upload_to='can_frames/')
+    ids_file = models.FileField(upload_to='can_frames/')
+    lengths_file = models.FileField(upload_to='can_frames/')
+    data_file = models.FileField(upload_to='can_frames/')
+    
+    def get_arrays(self, mmap_mode='r'):
+        """
+        Retourne les tableaux NumPy des trames
+        
+        Args:
+            mmap_mode: Mode de projection mémoire passé à numpy.load ('r' par défaut, None
+                pour charger les tableaux en mémoire)
+            
+        Returns:
+            Dictionnaire avec 'timestamps_ns', 'ids', 'lengths' et 'data'
+        """
+        return {
+            'timestamps_ns': np.load(self.timestamps_file.path, mmap_mode=mmap_mode),
+            'ids': np.load(self.ids_file.path, mmap_mode=mmap_mode),
+            'lengths': np.load(self.lengths_file.path, mmap_mode=mmap_mode),
+            'data': np.load(self.data_file.path, mmap_mode=mmap_mode),
+        }
+    
+    def get_id_counts(self):
+        """Retourne le nombre de trames par identifiant (hexadécimal)"""
+        try:
+            return json.loads(self.id_counts or '{}')
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    
+    def set_id_counts(self, id_counts):
+        """Enregistre le nombre de trames par identifiant (hexadécimal)"""
+        self.id_counts = json.dumps(id_counts)
+    
+    def __str__(self):
+        return f"Trames CAN {self.channel_name} ({self.frames_count} trames)"
+
 class MDFFile(models.Model):
     """Modèle pour stocker les fichiers MDF importés"""
     file = models.FileField(upload_to='mdf_files/')
@@ -183,9 +538,109 @@ class MDFFile(models.Model):
     processed = models.BooleanField(default=False)
     dbc_file = models.ForeignKey(DBCFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='mdf_files')
     
+    # Empreinte SHA-256 du contenu, calculée pendant le téléversement, pour détecter les doublons
+    sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    
     # Associer automatiquement un groupe pour les logs générés par ce fichier MDF
     log_group = models.ForeignKey(LogGroup, on_delete=models.SET_NULL, 
                                  null=True, blank=True, related_name='mdf_files')
     
     def __str__(self):
         return self.name
+
+class ImportJob(models.Model):
+    """Modèle pour suivre l'importation en arrière-plan d'un fichier MDF"""
+    STATUSES = (
+        ('PENDING', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('SUCCESS', 'Terminé'),
+        ('FAILED', 'Échec'),
+    )
+    
+    mdf_file = models.ForeignKey(MDFFile, on_delete=models.CASCADE, related_name='import_jobs')
+    log_group = models.ForeignKey(LogGroup, on_delete=models.SET_NULL,
+                                  null=True, blank=True, related_name='import_jobs')
+    dbc_file = models.ForeignKey(DBCFile, on_delete=models.SET_NULL,
+                                 null=True, blank=True, related_name='import_jobs')
+    status = models.CharField(max_length=10, choices=STATUSES, default='PENDING', db_index=True)
+    
+    # Options passées à MDFParser.process_file (JSON)
+    options = models.TextField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    # Progression canal par canal
+    total_channels = models.IntegerField(default=0)
+    processed_channels = models.IntegerField(default=0)
+    current_channel = models.CharField(max_length=255, blank=True, null=True)
+    samples_written = models.BigIntegerField(default=0)
+    
+    # Statistiques finales (JSON) et erreur éventuelle
+    statistics = models.TextField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Tâche d'importation"
+        verbose_name_plural = "Tâches d'importation"
+    
+    def __str__(self):
+        return f"Import {self.mdf_file} ({self.status})"
+    
+    def get_absolute_url(self):
+        return reverse('robot_logs:import_job_detail', args=[self.id])
+    
+    def get_options_as_dict(self):
+        """Convertit les options JSON en dictionnaire Python"""
+        if self.options:
+            try:
+                return json.loads(self.options)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+    
+    def get_statistics_as_dict(self):
+        """Convertit les statistiques JSON en dictionnaire Python"""
+        if self.statistics:
+            try:
+                return json.loads(self.statistics)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+    
+    def set_statistics_from_dict(self, statistics_dict):
+        """Enregistre un dictionnaire Python comme statistiques JSON"""
+        self.statistics = json.dumps(statistics_dict)
+    
+    def is_finished(self):
+        """Indique si la tâche est terminée (succès ou échec)"""
+        return self.status in ('SUCCESS', 'FAILED')
+    
+    def get_progress_percent(self):
+        """Retourne l'avancement en pourcentage des canaux traités"""
+        if self.status == 'SUCCESS':
+            return 100
+        if not self.total_channels:
+            return 0
+        return int(100 * self.processed_channels / self.total_channels)
+    
+    def get_elapsed_seconds(self):
+        """Retourne la durée d'exécution de la tâche en secondes"""
+        if not self.started_at:
+            return 0
+        from django.utils import timezone
+        end = self.finished_at or timezone.now()
+        return max((end - self.started_at).total_seconds(), 0)
+    
+    def get_throughput(self):
+        """Retourne le débit de la tâche (canaux et échantillons par seconde)"""
+        elapsed = self.get_elapsed_seconds()
+        if not elapsed:
+            return {'channels_per_second': 0, 'samples_per_second': 0}
+        return {
+            'channels_per_second': round(self.processed_channels / elapsed, 2),
+            'samples_per_second': round(self.samples_written / elapsed, 1),
+        }
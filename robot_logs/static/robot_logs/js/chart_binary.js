@@ -0,0 +1,66 @@
+/*
+ * Décodage du format binaire des données de graphique (voir robot_logs/chart_binary.py).
+ *
+ * ChartBinary.fetch(url) renvoie une promesse de { meta, arrays } où arrays associe
+ * à chaque nom un Float64Array ou un Float32Array construit directement sur le
+ * tampon reçu (little-endian, comme tous les navigateurs courants).
+ */
+(function(window) {
+    'use strict';
+
+    const MAGIC = 'RLVB';
+    const VERSION = 1;
+    const ALIGNMENT = 8;
+    const TYPED_ARRAYS = {
+        float32: Float32Array,
+        float64: Float64Array
+    };
+
+    function decode(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(
+            view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+        );
+        if (magic !== MAGIC || view.getUint8(4) !== VERSION) {
+            throw new Error('Format binaire inconnu');
+        }
+
+        const headerLength = view.getUint32(8, true);
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+
+        const arrays = {};
+        let offset = 12 + headerLength;
+        header.arrays.forEach(function(description) {
+            const TypedArray = TYPED_ARRAYS[description.dtype];
+            arrays[description.name] = new TypedArray(buffer, offset, description.length);
+            const byteLength = description.length * TypedArray.BYTES_PER_ELEMENT;
+            offset += byteLength + (ALIGNMENT - byteLength % ALIGNMENT) % ALIGNMENT;
+        });
+
+        return { meta: header.meta, arrays: arrays };
+    }
+
+    function fetchBinary(url, options) {
+        options = Object.assign({}, options);
+        options.headers = Object.assign({ 'Accept': 'application/octet-stream' }, options.headers);
+        return fetch(url, options).then(function(response) {
+            if (!response.ok) {
+                return response.json().then(function(data) {
+                    throw new Error(data.error || response.statusText);
+                });
+            }
+            return response.arrayBuffer().then(decode);
+        });
+    }
+
+    // Les axes de type date de Plotly affichent les objets Date en heure locale
+    function toDates(milliseconds) {
+        return Array.from(milliseconds, function(ms) { return new Date(ms); });
+    }
+
+    window.ChartBinary = {
+        decode: decode,
+        fetch: fetchBinary,
+        toDates: toDates
+    };
+})(window);
@@ -1,8 +1,15 @@
 from django import template
 
+from ..image_variants import image_variant_url
+
 register = template.Library()
 
 @register.filter
 def get_item(dictionary, key):
     """Renvoie la valeur correspondant à une clé donnée dans un dictionnaire"""
     return dictionary.get(key, '')
+
+@register.simple_tag
+def image_variant(image, size):
+    """Renvoie l'URL d'une image à la taille demandée ('small', 'medium', 'large' ou 'original')"""
+    return image_variant_url(image, size)
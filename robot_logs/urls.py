@@ -4,6 +4,8 @@ from . import views_dbc
 from . import views_can
 from . import views_curve
 from . import views_group
+from . import views_laser
+from . import views_import
 
 app_name = 'robot_logs'
 
@@ -18,14 +20,22 @@ urlpatterns = [
     path('import-mdf/', views.ImportMDFView.as_view(), name='import_mdf'),
     path('preview-mdf/', views.PreviewMDFView.as_view(), name='preview_mdf'),
     path('mdf-files/', views.MDFFileListView.as_view(), name='mdf_file_list'),
+    path('mdf-files/<int:pk>/relink/', views.RelinkMDFFileView.as_view(), name='mdf_file_relink'),
+    path('import-jobs/', views_import.ImportJobListView.as_view(), name='import_job_list'),
+    path('import-jobs/<int:pk>/', views_import.ImportJobDetailView.as_view(), name='import_job_detail'),
     
     # Vues pour les types de données spécifiques
     path('log/<int:log_id>/curve/', views.CurveDataView.as_view(), name='curve_view'),
+    path('log/<int:log_id>/curve/data/', views_curve.CurveWindowDataView.as_view(), name='curve_data'),
     path('log/<int:log_id>/laser/', views.Laser2DView.as_view(), name='laser_view'),
+    path('log/<int:log_id>/laser/scans/', views_laser.LaserScansView.as_view(), name='laser_scans'),
     path('log/<int:log_id>/image/', views.ImageDataView.as_view(), name='image_view'),
+    path('image/<int:image_id>/<str:size>/', views.ImageVariantView.as_view(), name='image_variant'),
     
     # Vues pour les courbes avancées
     path('curves/compare/', views_curve.MultiCurveView.as_view(), name='multi_curve_view'),
+    path('curves/data/', views_curve.MultiCurveDataView.as_view(), name='multi_curve_data'),
+    path('curves/search/', views_curve.CurveSearchView.as_view(), name='curve_search'),
     
     # Vues pour les fichiers DBC
     path('dbc-files/', views_dbc.DBCFileListView.as_view(), name='dbc_file_list'),
@@ -37,6 +47,7 @@ urlpatterns = [
     path('log/<int:log_id>/can/', views_can.CANDataView.as_view(), name='can_view'),
     path('log/<int:log_id>/can/export/', views_can.CANExportView.as_view(), name='can_export'),
     path('can-message/<int:message_id>/', views_can.CANMessageDetailView.as_view(), name='can_message_detail'),
+    path('log/<int:log_id>/can/frame/<int:index>/', views_can.CANFrameDetailView.as_view(), name='can_frame_detail'),
     path('log/<int:log_id>/can/filter/<str:can_id>/', views_can.CANIDFilterView.as_view(), name='can_id_filter'),
     
     # Vues pour les groupes de logs
@@ -1,17 +1,32 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, View
 from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, Http404
 from django.urls import reverse
+from urllib.parse import urlencode
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.paginator import Paginator
 import csv
 import json
 import os
 import tempfile
 import logging
+import numpy as np
 
-from .models import RobotLog, CurveMeasurement, Laser2DScan, ImageData, MDFFile, LogGroup
+from .models import (
+    RobotLog, CurveMeasurement, Laser2DScan, LaserScanSeries, LaserOccupancyGrid, ImageData, MDFFile, LogGroup,
+)
 from .mdf_parser import MDFParser
+from .import_jobs import enqueue_import
+from .mdf_dedup import get_upload_sha256, find_duplicate, relink_duplicate
+from .mdf_plan import filter_channels
+from .curve_storage import get_curve_summary
+from .views_curve import CurveWindowDataView
+from .chart_binary import BinaryArraysResponse, wants_binary
+from .laser_render import get_scan_points, decimate_scan_points
+from .laser_storage import DEFAULT_LASER_FRAMES
+from .image_variants import IMAGE_THUMBNAIL_SIZES, get_thumbnail
 from .forms import MDFImportForm, LogFilterForm, AssignLogsToGroupForm
 
 # Configurer le logger
@@ -114,12 +129,13 @@ class LogDetailView(DetailView):
         
         # Ajouter les données associées en fonction du type de log
         if log.log_type == 'CURVE':
-            context['curve_measurements'] = log.curve_measurements.all()
-            context['has_curve_data'] = context['curve_measurements'].exists()
+            context['curve_samples_count'], context['curve_sensor_name'] = get_curve_summary(log)
+            context['has_curve_data'] = context['curve_samples_count'] > 0
         elif log.log_type == 'LASER2D':
-            context['laser_scan'] = log.laser_scans.first()
+            context['laser_series'] = LaserScanSeries.objects.filter(log=log).first()
+            context['laser_scan'] = None if context['laser_series'] else log.laser_scans.first()
         elif log.log_type == 'IMAGE':
-            context['image'] = log.images.first()
+            context['image'] = log.images.prefetch_related('thumbnails').first()
         
         # Ajouter les métadonnées
         context['metadata'] = log.get_metadata_as_dict()
@@ -216,6 +232,20 @@ class ImportMDFView(View):
                     messages.error(request, "Erreur: Le fichier est vide.")
                     return render(request, 'robot_logs/import_mdf.html', {'form': form})
                 
+                # Détecter un fichier déjà importé avant de stocker ou de lire le fichier
+                sha256 = get_upload_sha256(request, 'file', uploaded_file)
+                duplicate = find_duplicate(sha256)
+                if duplicate:
+                    logger.info(f"Fichier déjà importé (SHA-256 {sha256}): {duplicate.name} (ID: {duplicate.id})")
+                    return render(request, 'robot_logs/mdf_duplicate.html', {
+                        'duplicate': duplicate,
+                        'name': mdf_file.name,
+                        'uploaded_name': uploaded_file.name,
+                    })
+                
+                mdf_file.sha256 = sha256
+                mdf_file.file_size = uploaded_file.size
+                
                 # Sauvegarder l'objet MDFFile
                 mdf_file.save()
                 logger.info(f"Objet MDFFile créé: {mdf_file.id}")
@@ -241,11 +271,12 @@ class ImportMDFView(View):
                     )
                     log_group.save()
                     
-                    # Traiter le fichier MDF
-                    parser = MDFParser(tmp_path, mdf_file)
-                    
                     # Si l'option de prévisualisation est cochée, rediriger vers la page de prévisualisation
                     if form.cleaned_data.get('preview_first', False):
+                        # Oublier la sélection d'une prévisualisation précédente abandonnée
+                        for key in PREVIEW_SESSION_KEYS:
+                            request.session.pop(key, None)
+                        
                         # Stocker le chemin du fichier temporaire dans la session
                         request.session['tmp_mdf_path'] = tmp_path
                         request.session['mdf_file_id'] = mdf_file.id
@@ -253,46 +284,18 @@ class ImportMDFView(View):
                         logger.info("Redirection vers la prévisualisation")
                         return redirect('robot_logs:preview_mdf')
                     
-                    # Sinon, traiter directement le fichier
-                    logger.info("Traitement direct du fichier MDF")
-                    stats = parser.process_file(log_group=log_group)  # Passage du groupe au parser
-                    parser.close()
-                    
-                    # Supprimer le fichier temporaire
+                    # Sinon, confier l'importation au processus d'arrière-plan
+                    # (le fichier est lu depuis le stockage de MDFFile)
                     os.unlink(tmp_path)
+                    job = enqueue_import(mdf_file, log_group=log_group)
                     
-                    # Associer le groupe aux logs importés
-                    if stats.get('text_logs', 0) > 0 or stats.get('curve_logs', 0) > 0 or stats.get('laser_logs', 0) > 0 or stats.get('image_logs', 0) > 0:
-                        # Récupérer tous les logs générés par cet import
-                        imported_logs = RobotLog.objects.filter(source=f"MDF Import: {mdf_file.name}")
-                        imported_logs.update(group=log_group)
-                        
-                        # Associer le groupe au fichier MDF
-                        mdf_file.log_group = log_group
-                        mdf_file.save()
-                    
-                    # Récupérer les logs orphelins qui pourraient avoir été créés sans groupe
-                    orphan_logs = RobotLog.objects.filter(
-                        source__startswith=f"MDF Import: {mdf_file.name}",
-                        group__isnull=True
+                    messages.info(
+                        request,
+                        f"Importation de '{mdf_file.name}' mise en file d'attente. "
+                        f"Les logs seront ajoutés au groupe '{log_group.name}'."
                     )
-                    if orphan_logs.exists():
-                        # Associer ces logs au groupe
-                        orphan_logs.update(group=log_group)
-                        logger.info(f"Associé {orphan_logs.count()} logs orphelins au groupe {log_group.name}")
                     
-                    # Afficher un message de succès
-                    messages.success(
-                        request, 
-                        f"Importation réussie ! "
-                        f"{stats.get('text_logs', 0)} logs textuels, "
-                        f"{stats.get('curve_logs', 0)} courbes, "
-                        f"{stats.get('laser_logs', 0)} scans laser, "
-                        f"{stats.get('image_logs', 0)} images importés. "
-                        f"Groupe '{log_group.name}' créé."
-                    )
-                    
-                    return redirect('robot_logs:log_group_detail', pk=log_group.id)
+                    return redirect('robot_logs:import_job_detail', pk=job.id)
                     
                 except Exception as e:
                     # Journaliser l'erreur
@@ -323,6 +326,105 @@ class ImportMDFView(View):
         logger.warning(f"Formulaire non valide. Erreurs: {form.errors}")
         return render(request, 'robot_logs/import_mdf.html', {'form': form})
 
+# Nombre de canaux par page de prévisualisation
+PREVIEW_CHANNELS_PER_PAGE = 50
+
+# Durée de conservation en cache du plan des canaux d'un fichier en prévisualisation (secondes)
+PREVIEW_CACHE_TIMEOUT = 3600
+
+def get_preview_channels(tmp_path, mdf_file):
+    """
+    Retourne la description de tous les canaux d'un fichier MDF en attente d'importation
+    
+    La description provient des seules métadonnées (voir MDFParser.plan_channels) et est
+    conservée en cache, si bien que la pagination et la recherche ne rouvrent pas le fichier.
+    
+    Returns:
+        Liste de dictionnaires (ChannelPlan.to_dict) ou None si le fichier ne peut être ouvert
+    """
+    cache_key = f"mdf_preview:{mdf_file.id}:{mdf_file.sha256 or os.path.getmtime(tmp_path)}"
+    channel_infos = cache.get(cache_key)
+    if channel_infos is not None:
+        return channel_infos
+    
+    parser = MDFParser(tmp_path, mdf_file)
+    if not parser.open():
+        return None
+    try:
+        channel_infos = [plan.to_dict() for plan in parser.plan_channels()]
+    finally:
+        parser.close()
+    
+    cache.set(cache_key, channel_infos, PREVIEW_CACHE_TIMEOUT)
+    return channel_infos
+
+# Types de traitement pouvant être imposés à un canal depuis la prévisualisation
+PREVIEW_KIND_CHOICES = [kind for kind, label in RobotLog.LOG_TYPES]
+
+# Entrées de session propres à la prévisualisation d'un fichier MDF
+PREVIEW_SESSION_KEYS = ('tmp_mdf_path', 'mdf_file_id', 'log_group_id', 'mdf_selected_channels', 'mdf_kind_overrides')
+
+def get_preview_selection(request, channel_names):
+    """
+    Retourne la sélection courante de la prévisualisation
+    
+    Returns:
+        Tuple (ensemble des canaux sélectionnés, dictionnaire des types imposés) ;
+        tous les canaux sont sélectionnés tant que l'utilisateur n'a rien modifié.
+        Seuls les canaux du fichier courant sont retenus.
+    """
+    names = set(channel_names)
+    selected = request.session.get('mdf_selected_channels')
+    selected = set(names) if selected is None else names.intersection(selected)
+    overrides = {
+        name: kind for name, kind in request.session.get('mdf_kind_overrides', {}).items()
+        if name in names
+    }
+    return selected, overrides
+
+def update_preview_selection(request, channel_names, action):
+    """
+    Met à jour la sélection de la prévisualisation à partir du formulaire envoyé
+    
+    Les cases et types des canaux de la page affichée sont toujours enregistrés, puis
+    l'action éventuelle (tout sélectionner, aucun, sélection par motif) est appliquée.
+    
+    Returns:
+        Tuple (ensemble des canaux sélectionnés, dictionnaire des types imposés)
+    """
+    selected, overrides = get_preview_selection(request, channel_names)
+    
+    # Canaux affichés sur la page : cases cochées et type imposé (une liste par ligne)
+    page_channels = request.POST.getlist('page_channels')
+    checked = set(request.POST.getlist('selected'))
+    kinds = request.POST.getlist('kind')
+    for channel_name, kind in zip(page_channels, kinds):
+        if channel_name in checked:
+            selected.add(channel_name)
+        else:
+            selected.discard(channel_name)
+        
+        if kind in PREVIEW_KIND_CHOICES:
+            overrides[channel_name] = kind
+        else:
+            overrides.pop(channel_name, None)
+    
+    if action == 'select_all':
+        selected = set(channel_names)
+    elif action == 'select_none':
+        selected = set()
+    elif action in ('select_pattern', 'deselect_pattern'):
+        patterns = request.POST.get('pattern', '').replace(',', ' ').split()
+        matched = filter_channels(channel_names, patterns) if patterns else []
+        if action == 'select_pattern':
+            selected.update(matched)
+        else:
+            selected.difference_update(matched)
+    
+    request.session['mdf_selected_channels'] = [name for name in channel_names if name in selected]
+    request.session['mdf_kind_overrides'] = overrides
+    return selected, overrides
+
 class PreviewMDFView(View):
     """Vue pour prévisualiser le contenu d'un fichier MDF avant importation"""
     
@@ -346,59 +448,71 @@ class PreviewMDFView(View):
             if log_group_id:
                 log_group = get_object_or_404(LogGroup, id=log_group_id)
             
-            # Créer le parser MDF
-            parser = MDFParser(tmp_path, mdf_file)
-            
-            # Ouvrir le fichier MDF
-            if not parser.open():
+            # Plan des canaux (métadonnées uniquement), conservé en cache entre les pages
+            channel_infos = get_preview_channels(tmp_path, mdf_file)
+            if channel_infos is None:
                 messages.error(request, "Impossible d'ouvrir le fichier MDF")
                 return redirect('robot_logs:import_mdf')
             
-            # Récupérer la liste des canaux
-            channels = parser.get_channels()
+            # Recherche sur le nom, l'unité, le commentaire et la source des canaux
+            query = request.GET.get('q', '').strip()
+            filtered_channels = channel_infos
+            if query:
+                needle = query.lower()
+                filtered_channels = [
+                    info for info in channel_infos
+                    if any(needle in (info.get(key) or '').lower() for key in ('name', 'unit', 'comment', 'source'))
+                ]
+            
+            # Répartition des canaux par type détecté
+            kind_counts = {}
+            for info in channel_infos:
+                kind = info['kind'] or 'UNKNOWN'
+                kind_counts[kind] = kind_counts.get(kind, 0) + 1
             
-            # Récupérer les informations sur chaque canal
-            channel_infos = []
-            for channel in channels[:100]:  # Limiter à 100 canaux pour la prévisualisation
-                info = parser.get_channel_info(channel)
-                if info:
-                    channel_infos.append(info)
+            paginator = Paginator(filtered_channels, PREVIEW_CHANNELS_PER_PAGE)
+            page_obj = paginator.get_page(request.GET.get('page'))
             
-            # Fermer le parser
-            parser.close()
+            # Sélection des canaux à importer et types imposés
+            selected, overrides = get_preview_selection(request, [info['name'] for info in channel_infos])
+            page_channels = [
+                dict(info, selected=info['name'] in selected, override=overrides.get(info['name'], ''))
+                for info in page_obj.object_list
+            ]
             
             # Afficher la prévisualisation
             return render(request, 'robot_logs/preview_mdf.html', {
                 'mdf_file': mdf_file,
-                'channel_count': len(channels),
-                'channels': channel_infos,
-                'limited_preview': len(channels) > 100,
+                'channel_count': len(channel_infos),
+                'channels': page_channels,
+                'page_obj': page_obj,
+                'selected_count': len(selected),
+                'kind_choices': RobotLog.LOG_TYPES,
+                'is_paginated': page_obj.has_other_pages(),
+                'query': query,
+                'filtered_count': len(filtered_channels),
+                'kind_counts': sorted(kind_counts.items()),
                 'log_group': log_group  # Ajouter le groupe au contexte
             })
             
         except Exception as e:
             # En cas d'erreur, nettoyer
-            if 'parser' in locals() and parser:
-                parser.close()
+            logger.error(f"Erreur lors de la prévisualisation: {str(e)}", exc_info=True)
             
             # Supprimer le fichier temporaire
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
             
             # Supprimer les entrées de session
-            if 'tmp_mdf_path' in request.session:
-                del request.session['tmp_mdf_path']
-            if 'mdf_file_id' in request.session:
-                del request.session['mdf_file_id']
-            if 'log_group_id' in request.session:
-                del request.session['log_group_id']
+            for key in PREVIEW_SESSION_KEYS:
+                request.session.pop(key, None)
             
             # Afficher un message d'erreur
             messages.error(request, f"Erreur lors de la prévisualisation : {str(e)}")
             return redirect('robot_logs:import_mdf')
     
     def post(self, request):
-        """Traite l'importation après prévisualisation"""
+        """Met à jour la sélection des canaux ou lance l'importation après prévisualisation"""
         # Récupérer le chemin du fichier temporaire et l'ID du fichier MDF depuis la session
         tmp_path = request.session.get('tmp_mdf_path')
         mdf_file_id = request.session.get('mdf_file_id')
@@ -412,6 +526,32 @@ class PreviewMDFView(View):
             # Récupérer l'objet MDFFile
             mdf_file = get_object_or_404(MDFFile, id=mdf_file_id)
             
+            # Enregistrer la sélection de canaux envoyée avec le formulaire
+            channel_infos = get_preview_channels(tmp_path, mdf_file) or []
+            channel_names = [info['name'] for info in channel_infos]
+            action = request.POST.get('action', 'update')
+            selected, overrides = update_preview_selection(request, channel_names, action)
+            
+            if action != 'import':
+                # Rester sur la prévisualisation (page demandée et recherche conservées)
+                params = {'page': request.POST.get('goto_page') or request.POST.get('page') or 1}
+                if request.POST.get('q'):
+                    params['q'] = request.POST['q']
+                return redirect(f"{reverse('robot_logs:preview_mdf')}?{urlencode(params)}")
+            
+            # Seuls les canaux sélectionnés seront lus et enregistrés
+            channels = [name for name in channel_names if name in selected]
+            if not channels:
+                messages.error(request, "Aucun canal sélectionné pour l'importation")
+                return redirect('robot_logs:preview_mdf')
+            
+            import_options = {}
+            if len(channels) < len(channel_names):
+                import_options['channels'] = channels
+            kind_overrides = {name: kind for name, kind in overrides.items() if name in selected}
+            if kind_overrides:
+                import_options['kind_overrides'] = kind_overrides
+            
             # Récupérer le groupe
             log_group = None
             if log_group_id:
@@ -425,71 +565,35 @@ class PreviewMDFView(View):
                 )
                 log_group.save()
             
-            # Créer le parser MDF
-            parser = MDFParser(tmp_path, mdf_file)
-            
-            # Traiter le fichier
-            stats = parser.process_file(log_group=log_group)  # Passage du groupe au parser
-            parser.close()
+            # Confier l'importation au processus d'arrière-plan
+            job = enqueue_import(mdf_file, log_group=log_group, **import_options)
             
-            # Supprimer le fichier temporaire
+            # Supprimer le fichier temporaire (le fichier est lu depuis le stockage de MDFFile)
             os.unlink(tmp_path)
             
             # Supprimer les entrées de session
-            del request.session['tmp_mdf_path']
-            del request.session['mdf_file_id']
-            if 'log_group_id' in request.session:
-                del request.session['log_group_id']
-            
-            # Associer le groupe aux logs importés
-            if stats.get('text_logs', 0) > 0 or stats.get('curve_logs', 0) > 0 or stats.get('laser_logs', 0) > 0 or stats.get('image_logs', 0) > 0:
-                # Récupérer tous les logs générés par cet import
-                imported_logs = RobotLog.objects.filter(source=f"MDF Import: {mdf_file.name}")
-                imported_logs.update(group=log_group)
-                
-                # Associer le groupe au fichier MDF
-                mdf_file.log_group = log_group
-                mdf_file.save()
+            for key in PREVIEW_SESSION_KEYS:
+                request.session.pop(key, None)
             
-            # Récupérer les logs orphelins qui pourraient avoir été créés sans groupe
-            orphan_logs = RobotLog.objects.filter(
-                source__startswith=f"MDF Import: {mdf_file.name}",
-                group__isnull=True
-            )
-            if orphan_logs.exists():
-                # Associer ces logs au groupe
-                orphan_logs.update(group=log_group)
-                logger.info(f"Associé {orphan_logs.count()} logs orphelins au groupe {log_group.name}")
-            
-            # Afficher un message de succès
-            messages.success(
-                request, 
-                f"Importation réussie ! "
-                f"{stats.get('text_logs', 0)} logs textuels, "
-                f"{stats.get('curve_logs', 0)} courbes, "
-                f"{stats.get('laser_logs', 0)} scans laser, "
-                f"{stats.get('image_logs', 0)} images importés. "
-                f"Groupe '{log_group.name}' créé."
+            messages.info(
+                request,
+                f"Importation de {len(channels)} canal(aux) sur {len(channel_names)} de '{mdf_file.name}' "
+                f"mise en file d'attente. Les logs seront ajoutés au groupe '{log_group.name}'."
             )
             
-            return redirect('robot_logs:log_group_detail', pk=log_group.id)
+            return redirect('robot_logs:import_job_detail', pk=job.id)
             
         except Exception as e:
             # En cas d'erreur, nettoyer
-            if 'parser' in locals() and parser:
-                parser.close()
+            logger.error(f"Erreur lors de l'importation après prévisualisation: {str(e)}", exc_info=True)
             
             # Supprimer le fichier temporaire
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
             
             # Supprimer les entrées de session
-            if 'tmp_mdf_path' in request.session:
-                del request.session['tmp_mdf_path']
-            if 'mdf_file_id' in request.session:
-                del request.session['mdf_file_id']
-            if 'log_group_id' in request.session:
-                del request.session['log_group_id']
+            for key in PREVIEW_SESSION_KEYS:
+                request.session.pop(key, None)
             
             # Afficher un message d'erreur
             messages.error(request, f"Erreur lors de l'importation : {str(e)}")
@@ -499,94 +603,142 @@ class CurveDataView(View):
     """Vue pour afficher les données de courbe"""
     
     def get(self, request, log_id):
-        log = get_object_or_404(RobotLog, id=log_id, log_type='CURVE')
-        curve_data = log.curve_measurements.all()
-        
-        # Préparer les données pour Chart.js
-        timestamps = [data.timestamp.timestamp() * 1000 for data in curve_data]  # Convertir en millisecondes pour JS
-        values = [float(data.value) for data in curve_data]
-        
-        chart_data = {
-            'timestamps': timestamps,
-            'values': values,
-            'sensor_name': curve_data.first().sensor_name if curve_data.exists() else "",
-        }
-        
-        # Si demandé en JSON
+        # Si demandé en JSON : fenêtre réduite au budget de points (voir CurveWindowDataView)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return JsonResponse(chart_data)
+            return CurveWindowDataView.as_view()(request, log_id=log_id)
+        
+        log = get_object_or_404(RobotLog, id=log_id, log_type='CURVE')
         
-        # Sinon, afficher la page
+        # Sinon, afficher la page : les points sont chargés par la page au format binaire
         return render(request, 'robot_logs/curve_view.html', {
             'log': log,
-            'chart_data': json.dumps(chart_data),
             'metadata': log.get_metadata_as_dict()
         })
 
+# Nombre maximal de points d'un scan dessinés par la page laser
+LASER_VIEW_MAX_POINTS = 4000
+
 class Laser2DView(View):
     """Vue pour afficher les données laser 2D"""
     
     def get(self, request, log_id):
         log = get_object_or_404(RobotLog, id=log_id, log_type='LASER2D')
-        laser_scan = log.laser_scans.first()
+        
+        # Carte d'occupation précalculée du groupe, affichée sous les scans
+        laser_occupancy = LaserOccupancyGrid.objects.filter(group_id=log.group_id).first() if log.group_id else None
+        
+        # Canal multi-scans : la page relit les scans par blocs (voir LaserScansView)
+        laser_series = LaserScanSeries.objects.filter(log=log).first()
+        if laser_series:
+            visualization_data = {
+                'angle_min': laser_series.angle_min,
+                'angle_max': laser_series.angle_max,
+                'max_range': laser_series.max_range or 0,
+                'points_count': laser_series.beams_count,
+                'scans_count': laser_series.scans_count,
+            }
+            return render(request, 'robot_logs/laser_view.html', {
+                'log': log,
+                'laser_series': laser_series,
+                'laser_scan': None,
+                'laser_occupancy': laser_occupancy,
+                'visualization_data': json.dumps(visualization_data),
+                'max_points': LASER_VIEW_MAX_POINTS,
+                'playback_chunk': DEFAULT_LASER_FRAMES,
+                'metadata': log.get_metadata_as_dict()
+            })
+        
+        # Les distances ne sont lues que si les points du scan ne sont pas en cache
+        laser_scan = log.laser_scans.defer('range_data', 'range_blob').first()
         
         if not laser_scan:
             messages.error(request, 'Aucune donnée laser trouvée pour ce log')
             return redirect('robot_logs:log_detail', log_id)
         
-        # Préparer les données pour la visualisation
-        range_data = laser_scan.get_range_data_as_list()
-        angles = []
-        current_angle = laser_scan.angle_min
-        for _ in range(len(range_data)):
-            angles.append(current_angle)
-            current_angle += laser_scan.angle_increment
-        
-        # Créer des coordonnées cartésiennes pour la visualisation
-        points = []
-        for angle, distance in zip(angles, range_data):
-            # Convertir les coordonnées polaires en coordonnées cartésiennes
-            x = distance * np.cos(angle)
-            y = distance * np.sin(angle)
-            points.append([float(x), float(y)])
+        # Coordonnées cartésiennes du scan (mises en cache), réduites si demandé
+        points = get_scan_points(laser_scan)
+        finite_ranges = points['ranges'][np.isfinite(points['ranges'])]
+        
+        max_points = request.GET.get('max_points', '')
+        if max_points.isdigit():
+            points = decimate_scan_points(points, int(max_points))
+        x, y = points['x'], points['y']
         
         visualization_data = {
-            'points': points,
             'angle_min': laser_scan.angle_min,
             'angle_max': laser_scan.angle_max,
-            'max_range': max(range_data) if range_data else 0,
+            'max_range': float(finite_ranges.max()) if len(finite_ranges) else 0,
+            'points_count': len(x),
         }
         
+        # Si demandé au format binaire (chargement des points par la page)
+        if wants_binary(request):
+            return BinaryArraysResponse({'x': x, 'y': y}, meta=visualization_data)
+        
         # Si demandé en JSON
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            visualization_data['points'] = np.column_stack((x, y)).tolist()
             return JsonResponse(visualization_data)
         
-        # Sinon, afficher la page
+        # Sinon, afficher la page (sans les points, chargés au format binaire)
         return render(request, 'robot_logs/laser_view.html', {
             'log': log,
             'laser_scan': laser_scan,
+            'laser_occupancy': laser_occupancy,
             'visualization_data': json.dumps(visualization_data),
+            'max_points': LASER_VIEW_MAX_POINTS,
             'metadata': log.get_metadata_as_dict()
         })
 
+# Nombre de miniatures par page de la galerie d'un canal d'images
+IMAGE_GALLERY_PER_PAGE = 48
+
 class ImageDataView(View):
     """Vue pour afficher les données d'image"""
     
     def get(self, request, log_id):
         log = get_object_or_404(RobotLog, id=log_id, log_type='IMAGE')
-        image = log.images.first()
+        images = log.images.prefetch_related('thumbnails')
+        
+        # Image affichée : celle demandée (paramètre image) ou la première du canal
+        image_id = request.GET.get('image', '')
+        image = images.filter(id=image_id).first() if image_id.isdigit() else images.first()
         
         if not image:
             messages.error(request, 'Aucune image trouvée pour ce log')
             return redirect('robot_logs:log_detail', log_id)
         
+        # Galerie des images du canal (miniatures), paginée
+        paginator = Paginator(images, IMAGE_GALLERY_PER_PAGE)
+        gallery = paginator.get_page(request.GET.get('page'))
+        
         # Afficher la page
         return render(request, 'robot_logs/image_view.html', {
             'log': log,
             'image': image,
+            'gallery': gallery if paginator.count > 1 else None,
             'metadata': log.get_metadata_as_dict()
         })
 
+class ImageVariantView(View):
+    """
+    Vue redirigeant vers une image à la taille demandée
+    
+    Tailles : celles de IMAGE_THUMBNAIL_SIZES ou 'original'. Une miniature absente
+    (image importée avant leur génération) est créée lors de la première demande.
+    """
+    
+    def get(self, request, image_id, size):
+        image = get_object_or_404(ImageData, id=image_id)
+        if size == 'original':
+            return redirect(image.image_file.url)
+        if size not in IMAGE_THUMBNAIL_SIZES:
+            raise Http404(f"Taille d'image inconnue: {size}")
+        
+        thumbnail = get_thumbnail(image, size)
+        # Image non réductible (format non géré) : l'original est servi
+        return redirect(thumbnail.file.url if thumbnail else image.image_file.url)
+
 class MDFFileListView(ListView):
     """Vue pour afficher la liste des fichiers MDF importés"""
     
@@ -597,3 +749,22 @@ class MDFFileListView(ListView):
     
     def get_queryset(self):
         return super().get_queryset().order_by('-uploaded_at')
+
+class RelinkMDFFileView(View):
+    """Vue pour enregistrer un fichier MDF déjà importé sans réimporter ses données"""
+    
+    def post(self, request, pk):
+        """Crée un MDFFile partageant le fichier et le groupe de logs du fichier existant"""
+        existing = get_object_or_404(MDFFile, pk=pk)
+        name = request.POST.get('name', '').strip() or existing.name
+        
+        mdf_file = relink_duplicate(existing, name)
+        messages.success(
+            request,
+            f"Le fichier '{mdf_file.name}' est identique à '{existing.name}' : "
+            f"il a été rattaché aux données existantes sans nouvelle importation."
+        )
+        
+        if mdf_file.log_group:
+            return redirect('robot_logs:log_group_detail', pk=mdf_file.log_group.id)
+        return redirect('robot_logs:mdf_file_list')
@@ -10,11 +10,52 @@ import json
 import io
 import csv
 import logging
+import numpy as np
+import pandas as pd
 
-from .models import RobotLog, CANMessage, CANSignal
+from .models import RobotLog, CANMessage, CANSignal, CANFrameSeries
+from .chart_binary import BinaryArraysResponse, wants_binary
+from .dbc_registry import get_dbc_parser
+from .can_storage import decode_can_message, get_can_frames, get_signal_values, iter_can_frames
 
 logger = logging.getLogger(__name__)
 
+# Nombre maximal de valeurs d'un signal renvoyées pour le graphique d'un ID CAN
+SIGNAL_CHART_LIMIT = 100000
+
+def get_signal_series(log, can_id, signal_name, limit=SIGNAL_CHART_LIMIT):
+    """
+    Retourne l'évolution d'un signal décodé pour un ID CAN
+    
+    Returns:
+        Tuple (timestamps en millisecondes epoch float64, valeurs float64)
+    """
+    series = CANFrameSeries.objects.filter(log=log).first()
+    if series is not None:
+        timestamps_ns, values = get_signal_values(series, can_id, signal_name, limit)
+        return timestamps_ns / 1e6, values
+    
+    rows = list(
+        CANSignal.objects.filter(
+            can_message__log=log,
+            can_message__can_id=can_id,
+            name=signal_name,
+        ).order_by('can_message__timestamp').values_list('can_message__timestamp', 'value')[:limit]
+    )
+    if not rows:
+        return np.empty(0), np.empty(0)
+    
+    timestamps, values = zip(*rows)
+    timestamps_ms = pd.to_datetime(list(timestamps), utc=True).as_unit('ns').asi8 / 1e6
+    return timestamps_ms, np.asarray(values, dtype=np.float64)
+
+def get_raw_bytes(raw_data):
+    """Découpe les données hexadécimales d'un message en octets : liste de tuples (hexa, binaire)"""
+    return [
+        (raw_data[i:i + 2], format(int(raw_data[i:i + 2], 16), '08b'))
+        for i in range(0, len(raw_data) - 1, 2)
+    ]
+
 class CANDataView(View):
     """Vue pour afficher les données CAN"""
     
@@ -22,6 +63,11 @@ class CANDataView(View):
         """Affiche les données CAN pour un log spécifique"""
         log = get_object_or_404(RobotLog, id=log_id, log_type='CAN')
         
+        # Trames brutes (voir can_storage) : seules les trames affichées sont décodées
+        series = CANFrameSeries.objects.filter(log=log).first()
+        if series is not None:
+            return self._get_frames(request, log, series)
+        
         # Récupérer les messages CAN associés à ce log
         can_messages = log.can_messages.all().prefetch_related('signals')
         
@@ -70,7 +116,8 @@ class CANDataView(View):
                     })
         
         # Générer un aperçu des données CAN sous forme de graphique
-        chart_data = self._generate_chart_data(can_messages[:1000])  # Limiter pour la performance
+        from collections import Counter
+        chart_data = self._generate_chart_data(Counter(msg.can_id for msg in can_messages[:1000]))  # Limiter pour la performance
         
         # Rendu du template
         return render(request, 'robot_logs/can_view.html', {
@@ -86,17 +133,62 @@ class CANDataView(View):
             'chart_data': json.dumps(chart_data) if chart_data else None
         })
     
-    def _generate_chart_data(self, can_messages):
-        """Génère des données pour un graphique des messages CAN"""
+    def _get_frames(self, request, log, series):
+        """Affiche les données CAN d'un log dont les trames sont stockées en colonnes binaires"""
+        id_counts = series.get_id_counts()
+        total_messages = series.frames_count
+        if not total_messages:
+            messages.error(request, 'Aucun message CAN trouvé pour ce log')
+            return redirect('robot_logs:log_detail', pk=log.id)
+        
+        # Si demandé en JSON (pour des mises à jour AJAX)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({
+                'total_messages': total_messages,
+                'message_types': len(id_counts),
+                'can_ids': list(id_counts)[:100]
+            })
+        
+        display_limit = 100
+        can_messages = get_can_frames(series, 0, display_limit)
+        can_id_stats = [
+            {'can_id': can_id, 'count': count}
+            for can_id, count in sorted(id_counts.items(), key=lambda item: item[1], reverse=True)
+        ]
+        can_signal_stats = [
+            {
+                'message_id': message.can_id,
+                'message_name': message.message_name,
+                'signal_name': signal.name,
+                'value': signal.value,
+                'unit': signal.unit
+            }
+            for message in can_messages[:20]
+            for signal in message.signals
+        ]
+        chart_data = self._generate_chart_data(id_counts)
+        
+        return render(request, 'robot_logs/can_view.html', {
+            'log': log,
+            'can_messages': can_messages,
+            'grouped_messages': id_counts,
+            'total_messages': total_messages,
+            'limited_display': total_messages > display_limit,
+            'display_limit': display_limit,
+            'can_id_stats': can_id_stats[:20],  # Top 20 IDs
+            'can_signal_stats': can_signal_stats,
+            'metadata': log.get_metadata_as_dict(),
+            'chart_data': json.dumps(chart_data) if chart_data else None
+        })
+    
+    def _generate_chart_data(self, id_counter):
+        """
+        Génère des données pour un graphique des messages CAN
+        
+        Args:
+            id_counter: Nombre de messages par identifiant CAN
+        """
         try:
-            # Préparer les données pour le graphique
-            from collections import Counter
-            import matplotlib.pyplot as plt
-            
-            # Collecter les identifiants CAN et leurs occurrences
-            ids = [msg.can_id for msg in can_messages]
-            id_counter = Counter(ids)
-            
             if not id_counter:
                 return None
             
@@ -141,16 +233,14 @@ class CANMessageDetailView(View):
             metadata = message.log.get_metadata_as_dict()
             if 'dbc_file' in metadata:
                 try:
-                    from .can_parser import DBCParser
-                    
                     # Récupérer le fichier DBC
                     dbc_file = None
                     if hasattr(message.log, 'mdf_file') and message.log.mdf_file and message.log.mdf_file.dbc_file:
                         dbc_file = message.log.mdf_file.dbc_file
                     
                     if dbc_file:
-                        # Initialiser le parser DBC
-                        parser = DBCParser(dbc_file.file.path)
+                        # Parser DBC partagé (voir dbc_registry)
+                        parser = get_dbc_parser(dbc_file)
                         
                         # Convertir les données hexadécimales en bytes
                         import binascii
@@ -166,19 +256,49 @@ class CANMessageDetailView(View):
             'message': message,
             'signals': signals,
             'decoded_data': decoded_data,
+            'raw_bytes': get_raw_bytes(message.raw_data),
             'log': message.log
         })
 
+class CANFrameDetailView(View):
+    """Vue pour afficher les détails d'une trame d'un log CAN stocké en colonnes binaires"""
+    
+    def get(self, request, log_id, index):
+        """Affiche les détails d'une trame (index : position dans le log)"""
+        log = get_object_or_404(RobotLog, id=log_id, log_type='CAN')
+        series = get_object_or_404(CANFrameSeries, log=log)
+        frames = get_can_frames(series, index, 1)
+        if not frames:
+            messages.error(request, f'Trame CAN {index} introuvable')
+            return redirect('robot_logs:can_view', log_id=log_id)
+        
+        message = frames[0]
+        return render(request, 'robot_logs/can_message_detail.html', {
+            'message': message,
+            'signals': message.signals,
+            'decoded_data': None,
+            'raw_bytes': get_raw_bytes(message.raw_data),
+            'log': log
+        })
+
 class CANExportView(View):
     """Vue pour exporter les données CAN au format CSV"""
     
     def get(self, request, log_id):
         """Exporte les données CAN au format CSV"""
         log = get_object_or_404(RobotLog, id=log_id, log_type='CAN')
-        can_messages = log.can_messages.all().prefetch_related('signals')
+        
+        # Trames brutes (voir can_storage) : décodées par blocs pendant l'écriture
+        series = CANFrameSeries.objects.filter(log=log).first()
+        if series is not None:
+            can_messages = iter_can_frames(series)
+            has_messages = series.frames_count > 0
+        else:
+            can_messages = log.can_messages.all().prefetch_related('signals')
+            has_messages = can_messages.exists()
         
         # Si aucun message, afficher un message d'erreur
-        if not can_messages.exists():
+        if not has_messages:
             messages.error(request, 'Aucun message CAN trouvé pour ce log')
             return redirect('robot_logs:log_detail', pk=log_id)
         
@@ -195,8 +315,9 @@ class CANExportView(View):
         # Écrire les données
         for message in can_messages:
             # Si le message a des signaux, écrire une ligne pour chaque signal
-            if message.signals.exists():
-                for signal in message.signals.all():
+            signals = message.signals.all()
+            if signals:
+                for signal in signals:
                     writer.writerow([
                         message.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'),
                         message.can_id,
@@ -225,6 +346,11 @@ class CANIDFilterView(View):
         """Affiche les messages CAN filtrés par ID"""
         log = get_object_or_404(RobotLog, id=log_id, log_type='CAN')
         
+        # Trames brutes (voir can_storage) : toutes les trames de l'ID sont décodées en une passe
+        series = CANFrameSeries.objects.filter(log=log).first()
+        if series is not None:
+            return self._get_frames(request, log, series, can_id)
+        
         # Récupérer les messages CAN correspondant à l'ID
         can_messages = log.can_messages.filter(can_id=can_id).prefetch_related('signals')
         
@@ -238,6 +364,17 @@ class CANIDFilterView(View):
         total_messages = can_messages.count()
         limited_display = total_messages > display_limit
         
+        # Si demandé au format binaire : évolution d'un signal pour le graphique
+        if wants_binary(request):
+            signal_name = request.GET.get('signal')
+            if not signal_name:
+                return JsonResponse({'error': 'Paramètre signal manquant'}, status=400)
+            timestamps, values = get_signal_series(log, can_id, signal_name)
+            return BinaryArraysResponse(
+                {'timestamps': timestamps, 'values': values},
+                meta={'signal': signal_name, 'can_id': can_id, 'limit': SIGNAL_CHART_LIMIT},
+            )
+        
         # Si demandé en JSON (pour des mises à jour AJAX)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             # Format simplifié pour AJAX
@@ -277,28 +414,8 @@ class CANIDFilterView(View):
                         'values': values[:10]  # Limiter pour l'affichage
                     })
         
-        # Générer des données pour un graphique des valeurs des signaux
-        signal_chart_data = None
-        if signals_overview:
-            try:
-                # Format pour Chart.js
-                signal_chart_data = {
-                    'datasets': []
-                }
-                
-                # Créer un dataset pour chaque signal
-                for signal_info in signals_overview:
-                    timestamps = [item['timestamp'].timestamp() * 1000 for item in signal_info['values']]  # En millisecondes pour JS
-                    values = [item['value'] for item in signal_info['values']]
-                    
-                    if timestamps and values:
-                        signal_chart_data['datasets'].append({
-                            'label': signal_info['name'],
-                            'data': [{'x': ts, 'y': val} for ts, val in zip(timestamps, values)],
-                            'fill': False
-                        })
-            except Exception as e:
-                logger.error(f"Erreur lors de la génération des données du graphique des signaux: {e}")
+        # Signaux à tracer : les valeurs sont chargées par la page au format binaire
+        signal_chart_data = [signal_info['name'] for signal_info in signals_overview]
         
         # Rendu du template
         return render(request, 'robot_logs/can_id_filter.html', {
@@ -312,3 +429,61 @@ class CANIDFilterView(View):
             'signals_overview': signals_overview,
             'signal_chart_data': json.dumps(signal_chart_data) if signal_chart_data else None
         })
+    
+    def _get_frames(self, request, log, series, can_id):
+        """Affiche les trames d'un ID d'un log dont les trames sont stockées en colonnes binaires"""
+        try:
+            decoded = decode_can_message(series, can_id)
+        except ValueError:
+            decoded = None
+        if decoded is None or not len(decoded['rows']):
+            messages.error(request, f'Aucun message CAN trouvé pour l\'ID {can_id}')
+            return redirect('robot_logs:can_view', log_id=log.id)
+        
+        display_limit = 500
+        total_messages = len(decoded['rows'])
+        
+        # Si demandé au format binaire : évolution d'un signal pour le graphique
+        if wants_binary(request):
+            signal_name = request.GET.get('signal')
+            if not signal_name:
+                return JsonResponse({'error': 'Paramètre signal manquant'}, status=400)
+            timestamps, values = get_signal_series(log, can_id, signal_name)
+            return BinaryArraysResponse(
+                {'timestamps': timestamps, 'values': values},
+                meta={'signal': signal_name, 'can_id': can_id, 'limit': SIGNAL_CHART_LIMIT},
+            )
+        
+        # Si demandé en JSON (pour des mises à jour AJAX)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({
+                'total_messages': total_messages,
+                'can_id': can_id,
+                'message_name': decoded['message_name']
+            })
+        
+        # Statistiques calculées sur toutes les trames de l'ID (NaN : signal absent de la trame)
+        signals_overview = []
+        for name, values in decoded['signals'].items():
+            present = values[~np.isnan(values)]
+            if len(present):
+                signals_overview.append({
+                    'name': name,
+                    'count': len(present),
+                    'min': float(present.min()),
+                    'max': float(present.max()),
+                    'unit': decoded['units'].get(name, '')
+                })
+        signal_chart_data = [signal_info['name'] for signal_info in signals_overview]
+        
+        return render(request, 'robot_logs/can_id_filter.html', {
+            'log': log,
+            'can_id': can_id,
+            'can_messages': get_can_frames(series, 0, display_limit, can_id=can_id),
+            'total_messages': total_messages,
+            'limited_display': total_messages > display_limit,
+            'display_limit': display_limit,
+            'message_name': decoded['message_name'],
+            'signals_overview': signals_overview,
+            'signal_chart_data': json.dumps(signal_chart_data) if signal_chart_data else None
+        })
@@ -4,21 +4,251 @@ Module contenant les vues pour la visualisation avancée des courbes.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import View
 from django.http import JsonResponse
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import json
 import logging
+import numpy as np
 
-from .models import RobotLog, CurveMeasurement
+from .models import RobotLog, CurveMeasurement, CurveSeries
+from .curve_storage import (
+    get_curve_points, load_curve_logs, get_curves_stats, get_curves_points,
+    DOWNSAMPLING_METHODS, MAX_COMPARED_CURVES,
+)
+from .chart_binary import BinaryArraysResponse, wants_binary
 
 logger = logging.getLogger(__name__)
 
+# Budget de points par défaut et maximal de CurveWindowDataView
+DEFAULT_CURVE_MAX_POINTS = 2000
+MAX_CURVE_MAX_POINTS = 20000
+
+# Résultats par page de la recherche de courbes
+CURVE_SEARCH_PER_PAGE = 20
+
+def _parse_float_param(value):
+    """Convertit un paramètre de requête en nombre, None s'il est absent ou invalide"""
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def _parse_time_param(value):
+    """
+    Convertit une borne de fenêtre en nanosecondes epoch
+    
+    Accepte des millisecondes epoch (valeurs des graphiques Plotly) ou une date ISO 8601
+    (heure locale du projet si aucun fuseau n'est indiqué).
+    
+    Raises:
+        ValueError: Si la valeur n'est ni un nombre ni une date
+    """
+    if value in (None, ''):
+        return None
+    
+    milliseconds = _parse_float_param(value)
+    if milliseconds is not None:
+        return int(milliseconds * 1e6)
+    
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f"Borne de fenêtre invalide: {value}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return int(moment.timestamp() * 1e9)
+
+def _parse_window_params(request):
+    """
+    Lit les paramètres de fenêtre communs aux vues de données de courbe
+    
+    Returns:
+        Tuple (start_ns, end_ns, max_points, method)
+        
+    Raises:
+        ValueError: Si une borne ou la méthode est invalide
+    """
+    start_ns = _parse_time_param(request.GET.get('start'))
+    end_ns = _parse_time_param(request.GET.get('end'))
+    
+    max_points = _parse_float_param(request.GET.get('max_points')) or DEFAULT_CURVE_MAX_POINTS
+    max_points = min(int(max_points), MAX_CURVE_MAX_POINTS)
+    
+    method = request.GET.get('method', 'minmax')
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Méthode de réduction inconnue: {method}")
+    return start_ns, end_ns, max_points, method
+
+def curve_window_to_chart_data(window):
+    """Prépare une fenêtre de courbe (voir get_curve_window) pour Plotly"""
+    values = np.asarray(window['values'], dtype=np.float64)
+    chart_data = {
+        'timestamps': (window['timestamps_ns'] / 1e6).tolist(),  # Convertir en millisecondes pour JS
+        # Les NaN ne sont pas du JSON valide : ils deviennent des trous dans le tracé
+        'values': np.where(np.isnan(values), None, values).tolist(),
+        'sensor_name': window['sensor_name'],
+        'samples_count': window['samples_count'],
+        'level': window['level'],
+    }
+    if 'method' in window:
+        chart_data['method'] = window['method']
+    return chart_data
+
+def curve_window_to_binary(window):
+    """Prépare une fenêtre de courbe (voir get_curve_window) au format binaire"""
+    return BinaryArraysResponse(
+        {
+            'timestamps': window['timestamps_ns'] / 1e6,  # Millisecondes epoch pour JS
+            'values': window['values'],
+        },
+        meta={
+            'sensor_name': window['sensor_name'],
+            'samples_count': window['samples_count'],
+            'level': window['level'],
+            'method': window.get('method'),
+        },
+    )
+
+class CurveWindowDataView(View):
+    """
+    Vue renvoyant en JSON une fenêtre de courbe réduite à un budget de points
+    
+    Paramètres : start et end (millisecondes epoch ou dates ISO, toute la courbe par
+    défaut), max_points, method ('minmax' ou 'lttb') et format ('binary' pour le
+    format binaire de chart_binary, JSON sinon).
+    """
+    
+    def get(self, request, log_id):
+        log = get_object_or_404(RobotLog, id=log_id, log_type='CURVE')
+        
+        try:
+            start_ns, end_ns, max_points, method = _parse_window_params(request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        window = get_curve_points(log, start_ns, end_ns, max_points=max_points, method=method)
+        if wants_binary(request):
+            return curve_window_to_binary(window)
+        return JsonResponse(curve_window_to_chart_data(window))
+
+class MultiCurveDataView(View):
+    """
+    Vue renvoyant en une réponse les fenêtres de plusieurs courbes
+    
+    Paramètres : id (répété, un par courbe), les paramètres de CurveWindowDataView
+    et align=1 pour rééchantillonner les courbes sur une base de temps commune. Au
+    format binaire, les tableaux sont nommés timestamps_<id> et values_<id>, ou
+    timestamps et values_<id> si les courbes sont alignées.
+    """
+    
+    def get(self, request):
+        try:
+            log_ids = [int(log_id) for log_id in request.GET.getlist('id')]
+            start_ns, end_ns, max_points, method = _parse_window_params(request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        if len(log_ids) > MAX_COMPARED_CURVES:
+            return JsonResponse({'error': f"Au plus {MAX_COMPARED_CURVES} courbes peuvent être comparées"}, status=400)
+        
+        align = request.GET.get('align') in ('1', 'true', 'on')
+        logs = load_curve_logs(log_ids)
+        result = get_curves_points(logs, start_ns, end_ns, max_points=max_points, method=method, align=align)
+        
+        curves_meta = [
+            {
+                'id': window['log_id'],
+                'sensor_name': window['sensor_name'],
+                'samples_count': window['samples_count'],
+                'level': window['level'],
+            }
+            for window in result['curves']
+        ]
+        
+        if wants_binary(request):
+            arrays = {}
+            if align:
+                arrays['timestamps'] = result['timestamps_ns'] / 1e6
+            for window in result['curves']:
+                if not align:
+                    arrays[f"timestamps_{window['log_id']}"] = window['timestamps_ns'] / 1e6
+                arrays[f"values_{window['log_id']}"] = window['values']
+            return BinaryArraysResponse(arrays, meta={'curves': curves_meta, 'aligned': align, 'method': method})
+        
+        curves = []
+        for window, meta in zip(result['curves'], curves_meta):
+            chart_data = curve_window_to_chart_data(window)
+            chart_data['id'] = meta['id']
+            if align:
+                del chart_data['timestamps']
+            curves.append(chart_data)
+        data = {'curves': curves, 'aligned': align, 'method': method}
+        if align:
+            data['timestamps'] = (result['timestamps_ns'] / 1e6).tolist()
+        return JsonResponse(data)
+
+class CurveSearchView(View):
+    """
+    Vue de recherche paginée des courbes disponibles (sélecteur de MultiCurveView)
+    
+    Paramètres : q (texte recherché dans le message, la source, le capteur et le
+    groupe), exclude (identifiants à ignorer, répété) et page.
+    """
+    
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        curves = RobotLog.objects.filter(log_type='CURVE').select_related('curve_series', 'group')
+        
+        if query:
+            curves = curves.filter(
+                Q(message__icontains=query) |
+                Q(source__icontains=query) |
+                Q(curve_series__sensor_name__icontains=query) |
+                Q(group__name__icontains=query)
+            )
+        
+        exclude = [log_id for log_id in request.GET.getlist('exclude') if log_id.isdigit()]
+        if exclude:
+            curves = curves.exclude(id__in=exclude)
+        
+        paginator = Paginator(curves.order_by('-timestamp', '-id'), CURVE_SEARCH_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        
+        results = []
+        for log in page_obj:
+            try:
+                sensor_name = log.curve_series.sensor_name
+            except CurveSeries.DoesNotExist:
+                sensor_name = ''
+            results.append({
+                'id': log.id,
+                'message': log.message,
+                'timestamp': log.timestamp.isoformat(),
+                'sensor_name': sensor_name,
+                'group': log.group.name if log.group else None,
+            })
+        
+        return JsonResponse({
+            'results': results,
+            'page': page_obj.number,
+            'num_pages': paginator.num_pages,
+            'has_next': page_obj.has_next(),
+            'total': paginator.count,
+        })
+
 class MultiCurveView(View):
     """Vue pour afficher plusieurs courbes simultanément avec des axes Y personnalisables"""
     
     def get(self, request):
         # Récupérer les IDs et configurations des courbes sélectionnées
-        curve_configs = request.GET.getlist('curve_config')
-        curves_data = []
-        selected_logs = []
+        # Format attendu: log_id:axis_id (ex: "15:1" pour log_id=15 sur l'axe y1)
+        curve_configs = []
+        for config in request.GET.getlist('curve_config'):
+            log_id, _, axis_id = config.partition(':')
+            if log_id.isdigit() and axis_id:
+                curve_configs.append((int(log_id), axis_id, config))
+        curve_configs = curve_configs[:MAX_COMPARED_CURVES]
         
         # Définir des couleurs pour chaque axe Y
         axis_colors = {
@@ -28,49 +258,43 @@ class MultiCurveView(View):
             'y4': '#d62728'   # rouge
         }
         
-        for config in curve_configs:
-            # Format attendu: log_id:axis_id (ex: "15:1" pour log_id=15 sur l'axe y1)
-            if ':' in config:
-                log_id, axis_id = config.split(':')
-                try:
-                    log = RobotLog.objects.get(id=log_id, log_type='CURVE')
-                    selected_logs.append(log)
-                    curve_data = log.curve_measurements.all()
-                    
-                    # Déterminer min et max pour aider à la mise à l'échelle
-                    values = [float(data.value) for data in curve_data]
-                    min_val = min(values) if values else 0
-                    max_val = max(values) if values else 0
-                    
-                    # Préparer les données pour le graphique
-                    timestamps = [data.timestamp.timestamp() * 1000 for data in curve_data]
-                    
-                    yaxis = f"y{axis_id}"
-                    
-                    curves_data.append({
-                        'id': log_id,
-                        'name': log.message,
-                        'timestamps': timestamps,
-                        'values': values,
-                        'sensor_name': curve_data.first().sensor_name if curve_data.exists() else "",
-                        'yaxis': yaxis,  # Format pour Plotly: y, y2, y3, etc.
-                        'min': min_val,
-                        'max': max_val,
-                        'metadata': log.get_metadata_as_dict(),
-                        'color': axis_colors.get(yaxis, '#1f77b4')
-                    })
-                except RobotLog.DoesNotExist:
-                    continue
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement de la courbe {log_id}: {e}")
-        
-        # Obtenir toutes les courbes disponibles pour la sélection
-        available_curves = RobotLog.objects.filter(log_type='CURVE').exclude(
-            id__in=[log.id for log in selected_logs]
-        ).order_by('-timestamp')
+        # Une requête pour les logs et leurs séries, au plus une pour les statistiques
+        logs = {log.id: log for log in load_curve_logs([log_id for log_id, _, _ in curve_configs])}
+        stats = get_curves_stats(logs.values())
+        
+        curves_data = []
+        selected_curves = []
+        for log_id, axis_id, config in curve_configs:
+            log = logs.get(log_id)
+            if log is None:
+                continue
+            
+            yaxis = f"y{axis_id}"
+            color = axis_colors.get(yaxis, '#1f77b4')
+            curve_stats = stats[log_id]
+            selected_curves.append({
+                'log': log,
+                'config': config,
+                'axis_id': axis_id,
+                'sensor_name': curve_stats['sensor_name'],
+                'color': color,
+            })
+            
+            # Les points sont chargés par la page au format binaire (voir MultiCurveDataView)
+            curves_data.append({
+                'id': log.id,
+                'name': log.message,
+                'sensor_name': curve_stats['sensor_name'],
+                'yaxis': yaxis,  # Format pour Plotly: y, y2, y3, etc.
+                'min': curve_stats['min'],
+                'max': curve_stats['max'],
+                'samples_count': curve_stats['samples_count'],
+                'metadata': log.get_metadata_as_dict(),
+                'color': color
+            })
         
         return render(request, 'robot_logs/multi_curve_view.html', {
             'curves_data': json.dumps(curves_data),
-            'selected_logs': selected_logs,
-            'available_curves': available_curves
+            'selected_curves': selected_curves,
+            'max_curves': MAX_COMPARED_CURVES,
         })
@@ -8,6 +8,7 @@ import logging
 
 from .models import DBCFile
 from .forms import DBCFileForm
+from .dbc_catalog import build_dbc_catalog, has_dbc_catalog, find_signal_defs
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,15 @@ class DBCFileListView(ListView):
     def get_queryset(self):
         """Retourne les fichiers DBC triés par date de téléchargement"""
         return super().get_queryset().order_by('-uploaded_at')
+    
+    def get_context_data(self, **kwargs):
+        """Ajoute la recherche d'un signal dans les catalogues de tous les DBC (paramètre signal)"""
+        context = super().get_context_data(**kwargs)
+        signal_query = self.request.GET.get('signal', '').strip()
+        context['signal_query'] = signal_query
+        if signal_query:
+            context['signal_results'] = find_signal_defs(signal_query)
+        return context
 
 class DBCFileUploadView(View):
     """Vue pour télécharger des fichiers DBC"""
@@ -40,6 +50,14 @@ class DBCFileUploadView(View):
                 # Enregistrer le fichier DBC
                 dbc_file = form.save()
                 
+                # Catalogue des messages et signaux, établi une fois pour toutes
+                try:
+                    messages_count = build_dbc_catalog(dbc_file)
+                    logger.info(f"DBC '{dbc_file.name}' catalogué: {messages_count} messages")
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'analyse du fichier DBC: {e}", exc_info=True)
+                    messages.warning(request, f"Le fichier DBC n'a pas pu être analysé: {str(e)}")
+                
                 # Afficher un message de succès
                 messages.success(
                     request, 
@@ -68,50 +86,18 @@ class DBCFileDetailView(View):
         """Affiche les détails d'un fichier DBC"""
         dbc_file = get_object_or_404(DBCFile, pk=pk)
         
-        # Tenter de charger et parser le fichier DBC pour afficher ses informations
+        # Les messages sont lus dans le catalogue, établi ici s'il ne l'a pas été au téléversement
         try:
-            from .can_parser import DBCParser
+            if not has_dbc_catalog(dbc_file):
+                build_dbc_catalog(dbc_file)
             
-            # Initialiser le parser DBC
-            parser = DBCParser(dbc_file.file.path)
-            
-            # Si nous utilisons cantools, récupérer des informations supplémentaires
-            if hasattr(parser, 'use_cantools') and parser.use_cantools and hasattr(parser, 'db'):
-                # Extraire les informations sur les messages
-                messages_info = []
-                for message in parser.db.messages:
-                    messages_info.append({
-                        'id': hex(message.frame_id),
-                        'name': message.name,
-                        'length': message.length,
-                        'signals_count': len(message.signals),
-                        'comment': message.comment if hasattr(message, 'comment') else ''
-                    })
-                
-                context = {
-                    'dbc_file': dbc_file,
-                    'messages': messages_info,
-                    'messages_count': len(messages_info),
-                    'parser_type': 'cantools'
-                }
-            else:
-                # Parser de base
-                messages_info = []
-                for can_id, message_info in parser.messages.items():
-                    messages_info.append({
-                        'id': hex(can_id),
-                        'name': message_info.get('name', 'Inconnu'),
-                        'length': message_info.get('length', 0),
-                        'signals_count': len(message_info.get('signals', {})),
-                        'comment': ''
-                    })
-                
-                context = {
-                    'dbc_file': dbc_file,
-                    'messages': messages_info,
-                    'messages_count': len(messages_info),
-                    'parser_type': 'basic'
-                }
+            messages_info = dbc_file.message_defs.all()
+            context = {
+                'dbc_file': dbc_file,
+                'messages': messages_info,
+                'messages_count': len(messages_info),
+                'parser_type': dbc_file.parser_type
+            }
         
         except Exception as e:
             # En cas d'erreur, afficher un message et les informations de base
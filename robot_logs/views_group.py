@@ -6,14 +6,18 @@ from django.contrib import messages
 from django.http import HttpResponseRedirect, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .models import LogGroup, RobotLog, MDFFile
+from .models import LogGroup, RobotLog, MDFFile, LaserOccupancyGrid, ImageData
 from .forms import LogGroupForm, AssignLogsToGroupForm
+from .laser_occupancy import mark_occupancy_stale
 
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Nombre d'images affichées en miniature sur la page d'un groupe
+GROUP_IMAGES_PREVIEW = 24
+
 class LogGroupListView(ListView):
     """Vue pour afficher la liste des groupes de logs, utilisée comme page d'accueil"""
     model = LogGroup
@@ -129,6 +133,14 @@ class LogGroupDetailView(DetailView):
         # Ajouter le formulaire de modification
         context['form'] = LogGroupForm(instance=log_group)
         
+        # Aperçu des images du groupe (miniatures, voir image_variants)
+        group_images = ImageData.objects.filter(log__group=log_group)
+        context['group_images_count'] = group_images.count()
+        context['group_images'] = group_images.prefetch_related('thumbnails')[:GROUP_IMAGES_PREVIEW]
+        
+        # Carte d'occupation laser précalculée (voir laser_occupancy)
+        context['laser_occupancy'] = LaserOccupancyGrid.objects.filter(group=log_group).first()
+        
         # Vérifier si ce groupe est associé à un fichier MDF
         context['mdf_files'] = log_group.mdf_files.all() if hasattr(log_group, 'mdf_files') else []
         
@@ -203,6 +215,11 @@ class AssignLogsToGroupView(View):
                 group.save()
                 messages.success(request, f"Nouveau groupe '{new_group_name}' créé.")
             
+            # Groupes quittés par les logs, dont la carte d'occupation laser change aussi
+            previous_groups = list(LogGroup.objects.filter(
+                id__in=RobotLog.objects.filter(id__in=log_ids).exclude(group=group).values('group_id')
+            ))
+            
             # Assigner les logs au groupe
             count = RobotLog.objects.filter(id__in=log_ids).update(group=group)
             
@@ -229,6 +246,9 @@ class AssignLogsToGroupView(View):
                 
                 group.save()
                 
+                # Cartes d'occupation laser des groupes concernés, recalculées en arrière-plan
+                mark_occupancy_stale([group] + previous_groups)
+                
                 return redirect('robot_logs:log_group_detail', pk=group.id)
             else:
                 messages.error(request, "Erreur lors de l'assignation des logs.")
@@ -252,6 +272,7 @@ class RemoveLogsFromGroupView(View):
         
         if count:
             messages.success(request, f"{count} logs retirés du groupe '{group.name}'.")
+            mark_occupancy_stale([group])
         else:
             messages.error(request, "Aucun log n'a pu être retiré du groupe.")
             
@@ -294,6 +315,7 @@ class MergeLGroupsView(View):
         
         if log_count:
             messages.success(request, f"{log_count} logs transférés au groupe '{target_group.name}'.")
+            mark_occupancy_stale([target_group])
         
         # Rediriger vers le groupe cible
         return redirect('robot_logs:log_group_detail', pk=target_group.id)
@@ -0,0 +1,55 @@
+"""
+Module contenant les vues de suivi des importations MDF en arrière-plan.
+"""
+from django.shortcuts import render, get_object_or_404
+from django.views.generic import ListView, View
+from django.http import JsonResponse
+import logging
+
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+class ImportJobListView(ListView):
+    """Vue pour afficher la liste des tâches d'importation"""
+    
+    model = ImportJob
+    template_name = 'robot_logs/import_job_list.html'
+    context_object_name = 'import_jobs'
+    paginate_by = 20
+    
+    def get_queryset(self):
+        """Retourne les tâches triées de la plus récente à la plus ancienne"""
+        return super().get_queryset().select_related('mdf_file', 'log_group').order_by('-created_at')
+
+class ImportJobDetailView(View):
+    """Vue pour suivre l'avancement d'une tâche d'importation"""
+    
+    def get(self, request, pk):
+        """Affiche l'état de la tâche, ou le renvoie en JSON pour le rafraîchissement"""
+        job = get_object_or_404(ImportJob.objects.select_related('mdf_file', 'log_group'), pk=pk)
+        
+        # Si demandé en JSON (interrogation périodique de la page)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            data = {
+                'id': job.id,
+                'status': job.status,
+                'status_display': job.get_status_display(),
+                'finished': job.is_finished(),
+                'progress': job.get_progress_percent(),
+                'total_channels': job.total_channels,
+                'processed_channels': job.processed_channels,
+                'current_channel': job.current_channel,
+                'samples_written': job.samples_written,
+                'elapsed_seconds': round(job.get_elapsed_seconds(), 1),
+                'statistics': job.get_statistics_as_dict(),
+                'error': job.error,
+            }
+            data.update(job.get_throughput())
+            return JsonResponse(data)
+        
+        return render(request, 'robot_logs/import_job_detail.html', {
+            'job': job,
+            'statistics': job.get_statistics_as_dict(),
+            'throughput': job.get_throughput(),
+        })
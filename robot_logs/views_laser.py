@@ -0,0 +1,86 @@
+"""
+Module contenant les vues de relecture des canaux laser multi-scans.
+"""
+from django.shortcuts import get_object_or_404
+from django.views.generic import View
+from django.http import JsonResponse
+import logging
+import numpy as np
+
+from .models import RobotLog, LaserScanSeries
+from .laser_storage import get_laser_frames, DEFAULT_LASER_FRAMES
+from .chart_binary import BinaryArraysResponse, wants_binary
+from .views_curve import _parse_float_param, _parse_time_param
+
+logger = logging.getLogger(__name__)
+
+def _parse_int_param(value, default):
+    """Convertit un paramètre entier positif de la requête (default s'il est absent)"""
+    number = _parse_float_param(value)
+    if number is None:
+        if value not in (None, ''):
+            raise ValueError(f"Nombre invalide: {value}")
+        return default
+    return max(int(number), 0)
+
+class LaserScansView(View):
+    """
+    Vue renvoyant une suite de scans consécutifs d'un canal laser multi-scans
+
+    La page laser lit l'enregistrement par blocs successifs (en demandant le bloc
+    suivant pendant l'animation du bloc courant) plutôt qu'un scan par requête.
+
+    Paramètres : start (position du premier scan) ou time (millisecondes epoch ou
+    date ISO, premier scan à partir de cet instant), count (scans par bloc), step
+    (écart entre deux scans lus, pour une relecture accélérée), max_points (points
+    par scan) et format ('binary' pour le format binaire de chart_binary, JSON sinon).
+
+    Au format binaire, 'ranges' contient les distances de tous les scans à la suite
+    (count × points, NaN pour une mesure absente) et 'angles' l'angle de chaque point.
+    """
+
+    def get(self, request, log_id):
+        log = get_object_or_404(RobotLog, id=log_id, log_type='LASER2D')
+        series = LaserScanSeries.objects.filter(log=log).first()
+        if series is None:
+            return JsonResponse({'error': 'Ce log ne contient pas de scans successifs'}, status=404)
+
+        try:
+            time_ns = _parse_time_param(request.GET.get('time'))
+            if time_ns is not None:
+                start = series.get_scan_index(time_ns)
+            else:
+                start = _parse_int_param(request.GET.get('start'), 0)
+            count = _parse_int_param(request.GET.get('count'), DEFAULT_LASER_FRAMES)
+            step = _parse_int_param(request.GET.get('step'), 1)
+            max_points = _parse_int_param(request.GET.get('max_points'), 0)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        frames = get_laser_frames(series, start, count, step=step, max_points=max_points)
+        timestamps = frames['timestamps_ns'] / 1e6  # Millisecondes epoch pour JS
+        meta = {
+            'start': frames['start'],
+            'step': frames['step'],
+            'next': frames['next'],
+            'frames_count': len(timestamps),
+            'points_count': len(frames['angles']),
+            'scans_count': series.scans_count,
+            'max_range': series.max_range,
+        }
+
+        if wants_binary(request):
+            return BinaryArraysResponse({
+                'timestamps': timestamps,
+                'angles': frames['angles'],
+                'ranges': frames['ranges'].ravel(),
+            }, meta=meta)
+
+        # Les NaN ne sont pas du JSON valide : ils deviennent null
+        ranges = frames['ranges'].astype(np.float64)
+        meta.update({
+            'timestamps': timestamps.tolist(),
+            'angles': frames['angles'].astype(np.float64).tolist(),
+            'ranges': np.where(np.isnan(ranges), None, ranges).tolist(),
+        })
+        return JsonResponse(meta)